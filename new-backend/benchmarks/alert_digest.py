@@ -0,0 +1,156 @@
+# new-backend/benchmarks/alert_digest.py
+
+import argparse
+import asyncio
+import datetime
+import os
+import tempfile
+import time
+
+from fastapi_mail import ConnectionConfig
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.alert_outbox import AlertDispatcher
+from core.mail_transport import SmtpTransport
+from core.migrations import upgrade_schema
+from models.data_models import AlertOutbox
+
+# Flushes a digest of queued budget alerts through SmtpTransport to a local SMTP
+# sink and reports its throughput. It checks that the whole flush goes over one
+# pooled connection, with one email per recipient. Run from new-backend:
+#   python -m benchmarks.alert_digest [--url postgresql://...] [--recipients 500] [--alerts 5]
+# Without --url it runs against a throwaway SQLite file. It drains every due row
+# in the outbox, so point --url at a scratch database.
+
+
+class SmtpSink:
+    """
+    Minimal SMTP server on 127.0.0.1 that accepts every message and discards it,
+    counting connections and the recipients of each message.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.messages = []  # recipients of each message, in arrival order
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        recipients = []
+
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 sink ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    await reply("250-sink")
+                    await reply("250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 sink")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    recipients.append(command.split(":", 1)[1].strip().strip("<>"))
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    self.messages.append(tuple(recipients))
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+
+def _fill(session, recipients: int, alerts: int, digest_window: float):
+    """Queues `alerts` threshold crossings for each of `recipients` addresses, due for a digest."""
+    due = datetime.datetime.utcnow() - datetime.timedelta(seconds=digest_window + 1)
+    session.execute(AlertOutbox.__table__.insert(), [
+        {"recipient_email": f"owner{r}@bench.example", "dataset_name": f"bench-{r}-{a}", "threshold": 50.0 + a,
+         "spent_epsilon": 5.0 + a * 0.1, "total_epsilon": 10.0, "status": "pending", "attempts": 0,
+         "next_attempt_at": due, "created_at": due}
+        for r in range(recipients) for a in range(alerts)
+    ])
+    session.commit()
+
+
+async def _flush(session_factory, digest_window: float):
+    sink = SmtpSink()
+    port = await sink.start()
+    mail_config = ConnectionConfig(
+        MAIL_USERNAME="", MAIL_PASSWORD="", MAIL_FROM="alerts@bench.example", MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1", MAIL_STARTTLS=False, MAIL_SSL_TLS=False, USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False, SUPPRESS_SEND=0
+    )
+    dispatcher = AlertDispatcher(session_factory)
+    dispatcher.transport = SmtpTransport(mail_config)
+    dispatcher.digest_window = digest_window
+    try:
+        started = time.perf_counter()
+        alerts = await dispatcher.drain()
+        seconds = time.perf_counter() - started
+    finally:
+        await sink.stop()
+    return sink, dispatcher, alerts, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of a digest flush over one SMTP connection.")
+    parser.add_argument("--url", help="database URL (default: a temporary SQLite file)")
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--alerts", type=int, default=5, help="threshold crossings queued per recipient")
+    parser.add_argument("--digest-window", type=float, default=60.0)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'alert_digest_bench.db')}"
+    engine = create_engine(url)
+    upgrade_schema(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = session_factory()
+    _fill(session, args.recipients, args.alerts, args.digest_window)
+    session.close()
+
+    sink, dispatcher, alerts, seconds = asyncio.run(_flush(session_factory, args.digest_window))
+
+    recipients = [r for message in sink.messages for r in message]
+    expected = {f"owner{r}@bench.example" for r in range(args.recipients)}
+    if sink.connections != 1 or dispatcher.connections != 1:
+        raise SystemExit(f"expected one SMTP connection, the sink saw {sink.connections}")
+    if len(sink.messages) != args.recipients or sorted(recipients) != sorted(expected):
+        raise SystemExit(f"expected one message per recipient, got {len(sink.messages)} for {args.recipients}")
+    if alerts != args.recipients * args.alerts:
+        raise SystemExit(f"expected {args.recipients * args.alerts} alerts sent, got {alerts}")
+
+    print(f"{'recipients':>10} {'alerts':>8} {'connections':>11} {'messages':>9} {'ms':>9} "
+          f"{'messages/s':>11} {'alerts/s':>9}")
+    print(f"{args.recipients:>10} {alerts:>8} {sink.connections:>11} {len(sink.messages):>9} {seconds * 1000:>9.1f} "
+          f"{len(sink.messages) / seconds:>11.1f} {alerts / seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# new-backend/benchmarks/audit_search.py
+
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from core.audit_search import ensure_search_indexes, search_audit_logs
+from core.migrations import upgrade_schema
+from models.data_models import AuditLog
+from routers.audit_log_router import audit_log_query, newest_first
+
+# Times the audit log substring filters (one newest-first page, as GET
+# /audit-logs serves it) and the relevance search over a large audit_logs
+# table, for rare, common and short terms, and checks each filtered page against
+# the FILTER_TARGET_MS latency target at the default 10M rows. Run from new-backend:
+#   python -m benchmarks.audit_search [--url postgresql://...] [--rows 10000000]
+# Without --url it runs against a throwaway SQLite file. The table is filled
+# up to --rows once; later runs against the same database reuse it. Exits with
+# status 1 if a filtered page misses the target.
+
+# Latency a filtered page must stay under
+FILTER_TARGET_MS = 100.0
+
+USERS = [f"analyst{i}@corp{i % 37}.example" for i in range(5000)]
+ACTIONS = ["CREATE_JOB", "DELETE_DATASET", "BUDGET_RESET", "LOGIN", "UPLOAD_FILE", "BUDGET_ACCOUNTANT_CHANGED"]
+WORDS = "dataset budget epsilon query census income hospital retail sensor laplace gaussian".split()
+
+# (filter, term): a term found in one row, rare, common and too short for an index
+CASES = [
+    ("user", "needle.person"),
+    ("user", "analyst42@"),
+    ("user", "analyst"),
+    ("details", "zebrafish"),
+    ("details", "census_1234"),
+    ("details", "census"),
+    ("action", "ACCOUNTANT"),
+    ("action", "LO"),
+]
+
+
+def _fill(session_factory, rows: int, chunk: int = 100000):
+    """Tops audit_logs up to `rows` rows, one of them the needle the first cases look for."""
+    session = session_factory()
+    try:
+        present = session.execute(select(func.count()).select_from(AuditLog)).scalar()
+        rng = random.Random(present)
+        start = datetime.datetime(2026, 1, 1)
+        if present == 0:
+            session.execute(AuditLog.__table__.insert(), [{
+                "timestamp": start, "user": "needle.person@example", "action": "LOGIN",
+                "details": "Rotated key zebrafish", "status": "SUCCESS", "ip_address": "10.0.0.1",
+            }])
+            present = 1
+        while present < rows:
+            count = min(chunk, rows - present)
+            session.execute(AuditLog.__table__.insert(), [{
+                "timestamp": start + datetime.timedelta(seconds=present + i),
+                "user": rng.choice(USERS),
+                "action": rng.choice(ACTIONS),
+                "details": f"Job on dataset '{rng.choice(WORDS)}_{rng.randint(0, 9999)}' with {rng.choice(WORDS)}",
+                "status": rng.choice(("SUCCESS", "FAILED")),
+                "ip_address": "10.0.0.1",
+            } for i in range(count)])
+            session.commit()
+            present += count
+            print(f"  {present} rows", flush=True)
+    finally:
+        session.close()
+
+
+def _timed(function, repeat: int):
+    """(best time in seconds, result) of `repeat` calls."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the audit log filters and search on a large table.")
+    parser.add_argument("--url", help="database URL (default: a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--page", type=int, default=100, help="rows per filtered page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'audit_bench.db')}"
+    engine = create_engine(url)
+    upgrade_schema(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"Filling audit_logs to {args.rows} rows")
+    _fill(session_factory, args.rows)
+    # SQLite indexes the rows already there when it creates the FTS table
+    ensure_search_indexes(engine)
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE audit_logs")
+
+    session = session_factory()
+    slow = []
+    try:
+        print(f"{'filter':<10} {'term':<16} {'page ms':>9} {'rows':>5} {'target':>6} {'search ms':>10} {'hits':>5}")
+        for name, term in CASES:
+            page_seconds, page = _timed(
+                lambda: newest_first(audit_log_query(session, **{name: term})).limit(args.page).all(), args.repeat)
+            search_seconds, hits = _timed(lambda: search_audit_logs(session, term, 50), args.repeat)
+            within = page_seconds * 1000 < FILTER_TARGET_MS
+            if not within:
+                slow.append(f"{name}={term}")
+            print(f"{name:<10} {term:<16} {page_seconds * 1000:>9.1f} {len(page):>5} {'ok' if within else 'MISS':>6} "
+                  f"{search_seconds * 1000:>10.1f} {len(hits):>5}")
+    finally:
+        session.close()
+    print(f"{len(CASES) - len(slow)}/{len(CASES)} filtered pages under {FILTER_TARGET_MS:.0f} ms at {args.rows} rows")
+    if slow:
+        raise SystemExit(f"over the target: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
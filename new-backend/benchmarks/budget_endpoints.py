@@ -0,0 +1,76 @@
+# new-backend/benchmarks/budget_endpoints.py
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.migrations import upgrade_schema
+from models import data_models
+from routers.budget_router import get_budgets, get_privacy_budget
+
+# Times GET /api/privacy_budget and GET /api/budgets (their handlers, called
+# in-process) as the number of dataset budgets grows; latency per dataset
+# should stay flat. Run from new-backend:
+#   python -m benchmarks.budget_endpoints [--url postgresql://...] [--sizes 1000,10000,100000]
+# Without --url it runs against a throwaway SQLite file. The rows it inserts
+# are not removed, so point --url at a scratch database.
+
+
+def _fill(session, start: int, stop: int):
+    """Inserts datasets start+1..stop with one budget each."""
+    session.execute(data_models.Dataset.__table__.insert(), [
+        {"id": i, "name": f"bench-{i}", "source_type": "file_upload", "status": "Available"}
+        for i in range(start + 1, stop + 1)
+    ])
+    session.execute(data_models.Budget.__table__.insert(), [
+        {"id": i, "dataset_id": i, "total_epsilon": 10.0, "total_delta": 1e-5,
+         "consumed_epsilon": 0.5, "consumed_delta": 0.0, "spent_epsilon": 0.5}
+        for i in range(start + 1, stop + 1)
+    ])
+    session.commit()
+
+
+def _timed(handler, session_factory, repeat: int) -> float:
+    """Best of `repeat` calls, in seconds, each on a fresh session."""
+    best = float("inf")
+    for _ in range(repeat):
+        session = session_factory()
+        try:
+            started = time.perf_counter()
+            handler(session)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            session.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the budget endpoints by number of datasets.")
+    parser.add_argument("--url", help="database URL (default: a temporary SQLite file)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated dataset counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'budget_bench.db')}"
+    engine = create_engine(url)
+    upgrade_schema(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"{'datasets':>10} {'endpoint':<22} {'ms':>9} {'us/dataset':>11}")
+    filled = 0
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        session = session_factory()
+        _fill(session, filled, size)
+        session.close()
+        filled = size
+        for path, handler in (("/api/privacy_budget", get_privacy_budget), ("/api/budgets", get_budgets)):
+            seconds = _timed(handler, session_factory, args.repeat)
+            print(f"{size:>10} {path:<22} {seconds * 1000:>9.1f} {seconds / size * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# new-backend/core/accountant.py
+
+import math
+from typing import Iterable, Tuple
+
+import diffprivlib.mechanisms as dp_mech
+from sqlalchemy import and_, or_
+
+# How a budget composes the privacy loss of its jobs:
+#   basic     linear composition: (sum of epsilons, sum of deltas)
+#   advanced  heterogeneous advanced composition (Dwork, Rothblum & Vadhan) with
+#             slack delta' = total_delta / 2
+#   rdp       Renyi DP / zero-concentrated DP (Bun & Steinke): Gaussian jobs add
+#             rho = 1 / (2 sigma^2) per unit of sensitivity, pure-DP jobs epsilon^2 / 2,
+#             converted back to (epsilon, delta') with delta' = total_delta. The delta
+#             of group_by partition selection is not zCDP, so a budget that spent any
+#             is reported under basic composition until its next reset.
+# advanced and rdp never report more than basic composition would.
+ACCOUNTANTS = ("basic", "advanced", "rdp")
+DEFAULT_ACCOUNTANT = "basic"
+
+
+class PrivacyCost:
+    """
+    A job's contribution to the additive state every accountant is computed from:
+    epsilon, delta, epsilon^2, epsilon * (e^epsilon - 1), zCDP rho, and the part of
+    delta that rho does not cover (approx_delta). Costs add up, so a budget's state
+    changes by one fixed-size increment per job.
+    """
+
+    def __init__(self, epsilon=0.0, delta=0.0, epsilon_sq=0.0, epsilon_expm1=0.0, rho=0.0, approx_delta=0.0):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.epsilon_sq = epsilon_sq
+        self.epsilon_expm1 = epsilon_expm1
+        self.rho = rho
+        self.approx_delta = approx_delta
+
+    def __add__(self, other: "PrivacyCost") -> "PrivacyCost":
+        return PrivacyCost(self.epsilon + other.epsilon, self.delta + other.delta, self.epsilon_sq + other.epsilon_sq,
+                           self.epsilon_expm1 + other.epsilon_expm1, self.rho + other.rho,
+                           self.approx_delta + other.approx_delta)
+
+    def __sub__(self, other: "PrivacyCost") -> "PrivacyCost":
+        return PrivacyCost(self.epsilon - other.epsilon, self.delta - other.delta, self.epsilon_sq - other.epsilon_sq,
+                           self.epsilon_expm1 - other.epsilon_expm1, self.rho - other.rho,
+                           self.approx_delta - other.approx_delta)
+
+    @classmethod
+    def total(cls, costs: Iterable["PrivacyCost"]) -> "PrivacyCost":
+        result = cls()
+        for cost in costs:
+            result = result + cost
+        return result
+
+
+def gaussian_rho(epsilon: float, delta: float) -> float:
+    """
+    zCDP rho of the Gaussian mechanism _build_mechanism calibrates for (epsilon, delta):
+    the analytic Gaussian above epsilon 1, the classic one otherwise.
+    """
+    if epsilon > 1:
+        sigma = dp_mech.GaussianAnalytic(epsilon=epsilon, delta=delta, sensitivity=1)._scale
+        return 1.0 / (2.0 * sigma * sigma)
+    return epsilon * epsilon / (4.0 * math.log(1.25 / delta))
+
+
+def job_privacy_cost(mechanism: str, query_type: str, epsilon: float, delta: float) -> PrivacyCost:
+    """
+    The privacy cost of one job; count queries always use the Laplace mechanism.
+    group_by is charged epsilon^2 / 2 as if pure DP, which bounds its noise
+    whichever mechanism adds it, plus the delta of its partition selection.
+    """
+    delta = delta or 0.0
+    query_type = query_type.lower()
+    gaussian = mechanism == 'gaussian' and query_type not in ('count', 'group_by') and 0 < delta < 1
+    return PrivacyCost(
+        epsilon=epsilon,
+        delta=delta,
+        epsilon_sq=epsilon * epsilon,
+        epsilon_expm1=epsilon * math.expm1(epsilon),
+        rho=gaussian_rho(epsilon, delta) if gaussian else epsilon * epsilon / 2.0,
+        approx_delta=delta if query_type == 'group_by' else 0.0,
+    )
+
+
+def _slack(accountant: str, total_delta: float) -> float:
+    """delta' the accountant spends on its conversion back to (epsilon, delta)."""
+    if accountant == "advanced":
+        return total_delta / 2.0
+    if accountant == "rdp":
+        return total_delta
+    return 0.0
+
+
+def composed_loss(accountant: str, total_delta: float, state: PrivacyCost) -> Tuple[float, float]:
+    """(epsilon, delta) spent under `accountant`, given a budget's summed job costs."""
+    basic = (state.epsilon, state.delta)
+    slack = _slack(accountant, total_delta or 0.0)
+    if slack <= 0 or state.epsilon <= 0:
+        return basic
+    log_term = math.log(1.0 / slack)
+    if accountant == "advanced":
+        epsilon = state.epsilon_expm1 + math.sqrt(2.0 * log_term * max(state.epsilon_sq, 0.0))
+        candidate = (epsilon, state.delta + slack)
+    else:
+        rho = max(state.rho, 0.0)
+        candidate = (rho + 2.0 * math.sqrt(rho * log_term), slack + max(state.approx_delta, 0.0))
+    # The tighter bound is only reported when its delta, slack included, fits the budget
+    return candidate if candidate[0] < basic[0] and candidate[1] <= total_delta else basic
+
+
+def admission_condition(accountant: str, total_epsilon: float, total_delta: float, state, cost: PrivacyCost):
+    """
+    SQL condition that the budget still fits after adding `cost`. `state` maps the
+    PrivacyCost fields to column expressions (consumed plus reserved). The
+    composition bounds are rearranged into polynomials, so the check runs inside
+    a single conditional UPDATE without square roots in SQL.
+    """
+    epsilon = state["epsilon"] + cost.epsilon
+    delta = state["delta"] + cost.delta
+    basic = and_(epsilon <= total_epsilon, delta <= total_delta)
+    slack = _slack(accountant, total_delta or 0.0)
+    if slack <= 0:
+        return basic
+    log_term = math.log(1.0 / slack)
+
+    if accountant == "advanced":
+        # A + sqrt(2 L B) <= T  <=>  A <= T and 2 L B <= (T - A)^2
+        linear = state["epsilon_expm1"] + cost.epsilon_expm1
+        squares = state["epsilon_sq"] + cost.epsilon_sq
+        return or_(basic, and_(
+            delta + slack <= total_delta,
+            linear <= total_epsilon,
+            2.0 * log_term * squares <= (total_epsilon - linear) * (total_epsilon - linear),
+        ))
+
+    # rho + 2 sqrt(rho L) <= T  <=>  rho <= (sqrt(L + T) - sqrt(L))^2; only without approx_delta,
+    # since the slack already takes all of total_delta
+    max_rho = (math.sqrt(log_term + total_epsilon) - math.sqrt(log_term)) ** 2
+    return or_(basic, and_(state["rho"] + cost.rho <= max_rho,
+                           state["approx_delta"] + cost.approx_delta <= 0))
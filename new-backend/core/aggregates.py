@@ -0,0 +1,227 @@
+# new-backend/core/aggregates.py
+
+import math
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnAggregate:
+    """
+    Mergeable sufficient statistics of a numeric column: count, sum, mean, M2
+    (sum of squared deviations from the mean), min, max and null count.
+    Partial aggregates are combined with Chan et al.'s parallel update, which
+    stays numerically stable where a naive sum of squares would cancel.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, total=0.0, min=None, max=None, null_count=0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.total = total
+        self.min = min
+        self.max = max
+        self.null_count = null_count
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, null_count: int = 0) -> "ColumnAggregate":
+        """Aggregate of a chunk of non-null values."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return cls(null_count=null_count)
+        mean = float(values.mean())
+        return cls(
+            count=int(values.size),
+            mean=mean,
+            m2=float(np.square(values - mean).sum()),
+            total=float(values.sum()),
+            min=float(values.min()),
+            max=float(values.max()),
+            null_count=null_count,
+        )
+
+    def merge(self, other: "ColumnAggregate") -> "ColumnAggregate":
+        """Combines another partial aggregate into this one and returns self."""
+        self.null_count += other.null_count
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.total, self.min, self.max = other.total, other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (ddof=1), matching pandas' Series.var()."""
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count > 1 else float("nan")
+
+
+class ColumnSummary:
+    """
+    Everything a DP query needs from one column: the number of non-null values,
+    numeric statistics (None for non-numeric columns) and, for histograms,
+    the bin labels with their true counts.
+    """
+
+    def __init__(self, count: int, is_numeric: bool, aggregate: Optional[ColumnAggregate] = None,
+                 histogram_labels: Optional[list] = None, histogram_counts: Optional[np.ndarray] = None):
+        self.count = count
+        self.is_numeric = is_numeric
+        self.aggregate = aggregate
+        self.histogram_labels = histogram_labels
+        self.histogram_counts = histogram_counts
+
+
+def histogram_bin_labels(bin_edges: np.ndarray) -> List[str]:
+    """'low-high' labels, with just enough decimals to keep narrow bins distinct."""
+    width = float(np.min(np.diff(bin_edges))) if len(bin_edges) > 1 else 0.0
+    decimals = max(0, int(np.ceil(-np.log10(width)))) if 0 < width < 1 else 0
+    return [f"{bin_edges[i]:.{decimals}f}-{bin_edges[i+1]:.{decimals}f}" for i in range(len(bin_edges)-1)]
+
+
+def summarize_series(data: pd.Series, query_type: str, bins: int = 10) -> ColumnSummary:
+    """Summary of an in-memory column; `data` must already have its nulls dropped."""
+    is_numeric = pd.api.types.is_numeric_dtype(data)
+    aggregate = ColumnAggregate.from_values(data.to_numpy()) if is_numeric else None
+    summary = ColumnSummary(count=len(data), is_numeric=is_numeric, aggregate=aggregate)
+
+    if query_type.lower() == 'histogram' and len(data):
+        if is_numeric:
+            counts, bin_edges = np.histogram(data, bins=bins, range=(aggregate.min, aggregate.max))
+            summary.histogram_labels = histogram_bin_labels(bin_edges)
+            summary.histogram_counts = counts
+        else:
+            value_counts = data.value_counts()
+            summary.histogram_labels = value_counts.index.tolist()
+            summary.histogram_counts = value_counts.to_numpy()
+    return summary
+
+
+def _numeric_values(values: pd.Series) -> pd.Series:
+    try:
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        raise Exception(f"Column '{values.name}' has non-numeric values and cannot be summarized as a number.")
+
+
+def stream_column_summary(chunk_factory: Callable[[], Iterable[pd.Series]], query_type: str, bins: int = 10,
+                          value_range: Optional[tuple] = None, is_numeric: Optional[bool] = None) -> ColumnSummary:
+    """
+    Builds the same summary as summarize_series from a column read in chunks, so
+    memory use depends on the chunk size rather than the dataset size.
+
+    `chunk_factory` returns a fresh iterator of raw (null-containing) chunks. A
+    numeric histogram needs the column's exact range up front; without
+    `value_range` the column is read twice. `is_numeric` is the column's type
+    for the whole dataset, e.g. from its schema; without it the first chunk
+    decides and every later chunk is read as that type.
+    """
+    wants_histogram = query_type.lower() == 'histogram'
+    aggregate = ColumnAggregate()
+    category_counts = None
+    bin_counts = None
+
+    if wants_histogram and is_numeric is not False and value_range is None:
+        for chunk in chunk_factory():
+            if is_numeric is None:
+                is_numeric = pd.api.types.is_numeric_dtype(chunk)
+            if not is_numeric:
+                break
+            aggregate.merge(ColumnAggregate.from_values(_numeric_values(chunk.dropna()).to_numpy()))
+        if is_numeric and aggregate.count:
+            value_range = (aggregate.min, aggregate.max)
+        aggregate = ColumnAggregate()
+
+    for chunk in chunk_factory():
+        if is_numeric is None:
+            is_numeric = pd.api.types.is_numeric_dtype(chunk)
+        values = chunk.dropna()
+        if is_numeric:
+            values = _numeric_values(values)
+            aggregate.merge(ColumnAggregate.from_values(values.to_numpy(), null_count=len(chunk) - len(values)))
+            if wants_histogram and value_range is not None and len(values):
+                counts, _ = np.histogram(values, bins=bins, range=value_range)
+                bin_counts = counts if bin_counts is None else bin_counts + counts
+        else:
+            if pd.api.types.is_numeric_dtype(values):
+                # A chunk of digits in a text column; count it under the same labels as the rest
+                values = values.astype(str)
+            aggregate.null_count += len(chunk) - len(values)
+            aggregate.count += len(values)
+            if wants_histogram:
+                chunk_counts = values.value_counts()
+                category_counts = chunk_counts if category_counts is None else category_counts.add(chunk_counts, fill_value=0)
+
+    summary = ColumnSummary(count=aggregate.count, is_numeric=bool(is_numeric),
+                            aggregate=aggregate if is_numeric else None)
+    if wants_histogram and aggregate.count:
+        if is_numeric:
+            _, bin_edges = np.histogram([], bins=bins, range=value_range)
+            summary.histogram_labels = histogram_bin_labels(bin_edges)
+            summary.histogram_counts = bin_counts if bin_counts is not None else np.zeros(bins, dtype=np.int64)
+        else:
+            category_counts = category_counts.astype(np.int64).sort_values(ascending=False, kind="stable")
+            summary.histogram_labels = category_counts.index.tolist()
+            summary.histogram_counts = category_counts.to_numpy()
+    return summary
+
+
+class GroupSummary:
+    """Per-group counts (and sums) of a value column, with the group labels in sorted order."""
+
+    def __init__(self, labels: list, counts: np.ndarray, sums: Optional[np.ndarray] = None):
+        self.labels = labels
+        self.counts = counts
+        self.sums = sums
+
+
+def _group_totals(groups: pd.Series, values: pd.Series, with_sums: bool) -> pd.DataFrame:
+    """Count (and sum) of the non-null values per non-null group, indexed by group label."""
+    mask = groups.notna() & values.notna()
+    codes, labels = pd.factorize(groups[mask], sort=True)
+    totals = pd.DataFrame({"count": np.bincount(codes, minlength=len(labels))}, index=labels)
+    if with_sums:
+        totals["sum"] = np.bincount(codes, weights=values[mask].to_numpy(dtype=np.float64), minlength=len(labels))
+    return totals
+
+
+def _group_summary(totals: pd.DataFrame, with_sums: bool) -> GroupSummary:
+    return GroupSummary(
+        labels=totals.index.tolist(),
+        counts=totals["count"].to_numpy(dtype=np.int64),
+        sums=totals["sum"].to_numpy(dtype=np.float64) if with_sums else None,
+    )
+
+
+def summarize_groups(groups: pd.Series, values: pd.Series, with_sums: bool = True) -> GroupSummary:
+    """
+    Groups `values` by `groups` in one vectorized pass: the groups are factorized to
+    integer codes and counted/summed with np.bincount.
+    """
+    return _group_summary(_group_totals(groups, values, with_sums), with_sums)
+
+
+def stream_group_summary(chunk_factory: Callable[[], Iterable[pd.DataFrame]], group_column: str, value_column: str,
+                         with_sums: bool = True) -> GroupSummary:
+    """Chunked counterpart of summarize_groups; per-chunk totals are added up by group label."""
+    totals = None
+    for chunk in chunk_factory():
+        chunk_totals = _group_totals(chunk[group_column], chunk[value_column], with_sums)
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+    if totals is None:
+        return GroupSummary(labels=[], counts=np.zeros(0, dtype=np.int64), sums=np.zeros(0) if with_sums else None)
+    return _group_summary(totals.sort_index(), with_sums)
@@ -0,0 +1,111 @@
+# new-backend/core/alert_index.py
+
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import case, event, func, select, update
+from sqlalchemy.orm import Session
+
+from models.data_models import Alert, Budget
+
+# Entries expire after this many seconds, which bounds how long a worker acts on
+# alerts or totals another worker process has changed since it loaded them.
+ALERT_INDEX_TTL_SECONDS = float(os.getenv("ALERT_INDEX_TTL_SECONDS", "30"))
+
+# Session.info key of the budgets whose entries to drop when the session's transaction ends
+_PENDING_INVALIDATIONS = "alert_index_invalidations"
+
+
+class AlertThresholdIndex:
+    """
+    Process-wide cache of the next alert threshold each budget can cross: the
+    lowest threshold among its alerts that have not triggered yet, with the
+    budget's total epsilon. A charge that stays below it needs no query at all.
+
+    Entries are dropped once a change to alerts or the budget's totals has
+    committed (create/delete alert, update/reset budget) and after every
+    crossing, so the next charge reloads them from the database. A load that
+    overlapped an invalidation is not stored, as it may have read the state
+    from before the change. The cache is per process: changes made by other
+    workers are picked up when the entry expires (ALERT_INDEX_TTL_SECONDS).
+    """
+
+    def __init__(self, ttl_seconds: float = ALERT_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}  # budget_id -> (expiry, (total_epsilon, lowest untriggered threshold or None))
+        self._generation = 0  # bumped by every invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def next_threshold(self, db: Session, budget_id: int) -> Tuple[Optional[float], Optional[float]]:
+        """(total_epsilon, lowest untriggered threshold in percent); the threshold is None without armed alerts."""
+        with self._lock:
+            cached = self._entries.get(budget_id)
+            if cached is not None and cached[0] > time.monotonic():
+                self.hits += 1
+                return cached[1]
+            generation = self._generation
+        entry = db.execute(
+            select(Budget.total_epsilon,
+                   select(func.min(Alert.threshold))
+                   .where(Alert.budget_id == budget_id, Alert.triggered.isnot(True))
+                   .scalar_subquery())
+            .where(Budget.id == budget_id)
+        ).first()
+        entry = (entry[0], entry[1]) if entry is not None else (None, None)
+        with self._lock:
+            self.loads += 1
+            if self._generation == generation:
+                self._entries[budget_id] = (time.monotonic() + self.ttl_seconds, entry)
+        return entry
+
+    def crossed(self, db: Session, budget_id: int, consumed_epsilon: float) -> bool:
+        """Whether a budget at `consumed_epsilon` may have crossed an alert threshold; usually answered from memory."""
+        total_epsilon, threshold = self.next_threshold(db, budget_id)
+        if not total_epsilon or threshold is None:
+            return False
+        return consumed_epsilon / total_epsilon * 100 >= threshold
+
+    def invalidate(self, budget_id: Optional[int] = None):
+        """Drops one budget's entry, or every entry. Call after the change has committed."""
+        with self._lock:
+            self._generation += 1
+            if budget_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(budget_id, None)
+
+    def invalidate_after(self, db: Session, budget_id: int):
+        """Drops a budget's entry when `db`'s current transaction commits or rolls back."""
+        db.info.setdefault(_PENDING_INVALIDATIONS, set()).add(budget_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "loads": self.loads}
+
+
+def sync_alert_triggers(db: Session, budget_id: int, consumed_epsilon: float, total_epsilon: float):
+    """
+    Marks the budget's alerts at or below its consumed percentage as triggered
+    and re-arms the rest, e.g. after a reset or top-up. Invalidate the index
+    entry once this has committed.
+    """
+    percentage = consumed_epsilon / total_epsilon * 100 if total_epsilon else 0.0
+    db.execute(
+        update(Alert.__table__).where(Alert.__table__.c.budget_id == budget_id)
+        .values(triggered=case((Alert.__table__.c.threshold <= percentage, True), else_=False))
+    )
+
+
+# Consulted after every budget charge; see core/alert_outbox.py.
+alert_thresholds = AlertThresholdIndex()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending(session: Session):
+    for budget_id in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        alert_thresholds.invalidate(budget_id)
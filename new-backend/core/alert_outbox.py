@@ -0,0 +1,350 @@
+# new-backend/core/alert_outbox.py
+
+import asyncio
+import datetime
+import os
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi_mail import MessageSchema, ConnectionConfig
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from core.alert_index import alert_thresholds
+from core.database import SessionLocal
+from core.mail_transport import mail_transport
+from models.data_models import Alert, AlertOutbox
+
+# How often the dispatcher looks for due messages when nothing wakes it up, how
+# many it claims at a time, and how it retries: attempt n waits
+# ALERT_RETRY_BACKOFF_SECONDS * 2^(n-1), at most ALERT_RETRY_MAX_BACKOFF_SECONDS,
+# until ALERT_MAX_ATTEMPTS attempts have failed.
+ALERT_OUTBOX_POLL_SECONDS = float(os.getenv("ALERT_OUTBOX_POLL_SECONDS", "5"))
+ALERT_OUTBOX_BATCH_SIZE = int(os.getenv("ALERT_OUTBOX_BATCH_SIZE", "50"))
+ALERT_MAX_ATTEMPTS = int(os.getenv("ALERT_MAX_ATTEMPTS", "8"))
+ALERT_RETRY_BACKOFF_SECONDS = float(os.getenv("ALERT_RETRY_BACKOFF_SECONDS", "30"))
+ALERT_RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("ALERT_RETRY_MAX_BACKOFF_SECONDS", "3600"))
+# A message claimed this long ago and still 'sending' was abandoned by its
+# dispatcher (stopped, or failed before recording the outcome) and is claimed again.
+ALERT_CLAIM_LEASE_SECONDS = float(os.getenv("ALERT_CLAIM_LEASE_SECONDS", "300"))
+
+# Digest mode: with a window above zero, a recipient's alerts wait until the
+# oldest of them is this many seconds old and then go out as one email.
+ALERT_DIGEST_WINDOW_SECONDS = float(os.getenv("ALERT_DIGEST_WINDOW_SECONDS", "0"))
+
+_outbox = AlertOutbox.__table__
+
+
+def enqueue_threshold_alerts(db: Session, budget_id: int, dataset_name: str, consumed_epsilon: float) -> int:
+    """
+    Queues an email for every alert whose threshold the budget has reached and
+    that has not triggered yet, marking it triggered. Call in the transaction
+    that charges the budget, after the charge: the messages then commit, or roll
+    back, with it. Charges below the next threshold are answered by the
+    threshold index without a query. Returns the number queued.
+    """
+    if not alert_thresholds.crossed(db, budget_id, consumed_epsilon):
+        return 0
+    total_epsilon, _ = alert_thresholds.next_threshold(db, budget_id)
+    percentage = consumed_epsilon / total_epsilon * 100
+
+    alerts = Alert.__table__
+    queued = 0
+    due = db.execute(
+        select(alerts.c.id, alerts.c.threshold, alerts.c.email)
+        .where(alerts.c.budget_id == budget_id, alerts.c.triggered.isnot(True), alerts.c.threshold <= percentage)
+    ).all()
+    for alert in due:
+        # Conditional, so of two charges crossing the same threshold only one sends the email
+        marked = db.execute(
+            update(alerts).where(alerts.c.id == alert.id, alerts.c.triggered.isnot(True)).values(triggered=True)
+        ).rowcount == 1
+        if marked:
+            db.add(AlertOutbox(
+                alert_id=alert.id, budget_id=budget_id, recipient_email=alert.email, dataset_name=dataset_name,
+                threshold=alert.threshold, spent_epsilon=consumed_epsilon, total_epsilon=total_epsilon
+            ))
+            queued += 1
+    # The next threshold has moved on (or this transaction rolls back): reload it once it has
+    alert_thresholds.invalidate_after(db, budget_id)
+    return queued
+
+
+def alert_message(entry) -> MessageSchema:
+    """The budget alert email for an outbox row."""
+    percentage_spent = (entry.spent_epsilon / entry.total_epsilon) * 100
+    html = f"""
+    <html>
+    <body>
+        <h2>Privacy Budget Alert for Dataset: {entry.dataset_name}</h2>
+        <p>This is an automated alert to inform you that the privacy budget usage for the dataset <strong>{entry.dataset_name}</strong> has exceeded the configured threshold of {entry.threshold}%.</p>
+        <ul>
+            <li><strong>Current Epsilon Spent:</strong> {entry.spent_epsilon:.4f}</li>
+            <li><strong>Total Epsilon Budget:</strong> {entry.total_epsilon}</li>
+            <li><strong>Percentage Used:</strong> {percentage_spent:.2f}%</li>
+        </ul>
+        <p>Please review the recent queries on this dataset to manage the remaining budget effectively.</p>
+    </body>
+    </html>
+    """
+    return MessageSchema(
+        subject=f"DP Platform Alert: Budget Threshold Exceeded for {entry.dataset_name}",
+        recipients=[entry.recipient_email],
+        body=html,
+        subtype="html"
+    )
+
+
+def digest_message(recipient_email: str, entries: list) -> MessageSchema:
+    """One email listing several threshold crossings for the same recipient."""
+    rows = "".join(
+        f"""
+            <tr>
+                <td>{entry.dataset_name}</td>
+                <td>{entry.threshold}%</td>
+                <td>{entry.spent_epsilon:.4f}</td>
+                <td>{entry.total_epsilon}</td>
+                <td>{(entry.spent_epsilon / entry.total_epsilon) * 100:.2f}%</td>
+            </tr>"""
+        for entry in entries
+    )
+    datasets = sorted({entry.dataset_name for entry in entries})
+    html = f"""
+    <html>
+    <body>
+        <h2>Privacy Budget Alerts: {len(entries)} thresholds exceeded</h2>
+        <p>This is an automated digest of the privacy budget thresholds exceeded on {len(datasets)} dataset(s) since the last alert email.</p>
+        <table border="1" cellpadding="4" cellspacing="0">
+            <tr>
+                <th>Dataset</th><th>Threshold</th><th>Current Epsilon Spent</th><th>Total Epsilon Budget</th><th>Percentage Used</th>
+            </tr>{rows}
+        </table>
+        <p>Please review the recent queries on these datasets to manage the remaining budget effectively.</p>
+    </body>
+    </html>
+    """
+    return MessageSchema(
+        subject=f"DP Platform Alert: {len(entries)} Budget Thresholds Exceeded ({', '.join(datasets)})",
+        recipients=[recipient_email],
+        body=html,
+        subtype="html"
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next delivery attempt after `attempts` failed ones."""
+    return min(ALERT_RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), ALERT_RETRY_MAX_BACKOFF_SECONDS)
+
+
+def _unchanged(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def claim_due_alerts(limit: int, digest_window: float = 0.0, session_factory=SessionLocal) -> list:
+    """
+    Marks up to `limit` due messages as sending and returns them: pending ones
+    whose next attempt is due, and ones whose claim is older than
+    ALERT_CLAIM_LEASE_SECONDS. Each claim is a conditional UPDATE on the row's
+    status and claim time, so a message is only claimed once even if several
+    dispatchers poll the same outbox. With a digest window, `limit` counts
+    recipients instead: those whose oldest due message has waited that long have
+    all of their due messages claimed, so each gets a single email.
+    """
+    now = datetime.datetime.utcnow()
+    # Rows from before claimed_at was recorded have no claim time and count as expired
+    expired = and_(_outbox.c.status == "sending", or_(
+        _outbox.c.claimed_at.is_(None),
+        _outbox.c.claimed_at <= now - datetime.timedelta(seconds=ALERT_CLAIM_LEASE_SECONDS)
+    ))
+    db = session_factory()
+    try:
+        query = select(_outbox).where(or_(and_(_outbox.c.status == "pending", _outbox.c.next_attempt_at <= now),
+                                          expired))
+        if digest_window > 0:
+            ready = select(_outbox.c.recipient_email).distinct().where(or_(
+                and_(_outbox.c.status == "pending",
+                     _outbox.c.next_attempt_at <= now - datetime.timedelta(seconds=digest_window)),
+                expired
+            )).order_by(_outbox.c.recipient_email).limit(limit)
+            query = query.where(_outbox.c.recipient_email.in_(ready)).order_by(_outbox.c.recipient_email, _outbox.c.id)
+        else:
+            query = query.order_by(_outbox.c.next_attempt_at, _outbox.c.id).limit(limit)
+        due = db.execute(query).all()
+        claimed = []
+        for entry in due:
+            result = db.execute(
+                update(_outbox).where(_outbox.c.id == entry.id, _outbox.c.status == entry.status,
+                                      _unchanged(_outbox.c.claimed_at, entry.claimed_at))
+                .values(status="sending", claimed_at=now)
+            )
+            if result.rowcount == 1:
+                claimed.append(entry)
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def record_deliveries(sent: List[int], failures: List[tuple], unsent: List[int], session_factory=SessionLocal):
+    """
+    Stores the outcome of a delivery round: `sent` ids are done, `failures`
+    ((id, attempts so far, error)) are retried with backoff or given up on, and
+    `unsent` ids go back to pending without counting an attempt.
+    """
+    now = datetime.datetime.utcnow()
+    db = session_factory()
+    try:
+        if sent:
+            db.execute(update(_outbox).where(_outbox.c.id.in_(sent)).values(status="sent", sent_at=now))
+        for entry_id, attempts, error in failures:
+            attempts += 1
+            values = {"attempts": attempts, "last_error": error[:2000]}
+            if attempts >= ALERT_MAX_ATTEMPTS:
+                values["status"] = "failed"
+            else:
+                values["status"] = "pending"
+                values["next_attempt_at"] = now + datetime.timedelta(seconds=retry_delay(attempts))
+            db.execute(update(_outbox).where(_outbox.c.id == entry_id).values(**values))
+        if unsent:
+            db.execute(update(_outbox).where(_outbox.c.id.in_(unsent)).values(status="pending"))
+        db.commit()
+    finally:
+        db.close()
+
+
+class AlertDispatcher:
+    """
+    Background task that delivers queued alert emails, so job requests never wait
+    on the mail server. It wakes up when notified of new messages or every
+    ALERT_OUTBOX_POLL_SECONDS and sends everything due in one flush over one
+    transport session (one SMTP connection). In digest mode each recipient gets
+    one email per flush listing all of their crossings.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.mail_config: Optional[ConnectionConfig] = None
+        self.transport = None
+        self.digest_window = ALERT_DIGEST_WINDOW_SECONDS
+        self._task = None
+        self._wake = None
+        self.sent = 0
+        self.emails = 0
+        self.failed_attempts = 0
+        self.connections = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self, mail_config: ConnectionConfig, transport=None):
+        self.mail_config = mail_config
+        self.transport = transport or mail_transport(mail_config)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self):
+        """Wakes the dispatcher for newly queued messages; call from the event loop."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), ALERT_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f"Alert dispatch failed: {e}")
+
+    async def _claim(self) -> list:
+        return await run_in_threadpool(claim_due_alerts, ALERT_OUTBOX_BATCH_SIZE, self.digest_window,
+                                      self.session_factory)
+
+    async def drain(self) -> int:
+        """Delivers every due message over one transport session; returns the number of alerts sent."""
+        entries = await self._claim()
+        sent = 0
+        while entries:
+            connected = False
+            try:
+                async with self.transport.session() as session:
+                    connected = True
+                    self.connections += 1
+                    while entries:
+                        sent += await self._deliver(session, entries)
+                        entries = await self._claim()
+            except Exception as e:
+                if not connected:
+                    # Could not connect or log in: every claimed message counts a failed attempt
+                    self.failed_attempts += len(entries)
+                    await run_in_threadpool(record_deliveries, [],
+                                            [(entry.id, entry.attempts, str(e)) for entry in entries], [],
+                                            self.session_factory)
+                    return sent
+                # The connection dropped; _deliver has recorded its batch, so reconnect for the rest
+                entries = await self._claim()
+        return sent
+
+    def _emails(self, entries: list) -> list:
+        """Groups claimed messages into emails: one per recipient in digest mode, else one each."""
+        if self.digest_window <= 0:
+            return [[entry] for entry in entries]
+        by_recipient = OrderedDict()
+        for entry in entries:
+            by_recipient.setdefault(entry.recipient_email, []).append(entry)
+        return list(by_recipient.values())
+
+    async def _deliver(self, session, entries: list) -> int:
+        """Sends claimed messages over an open session and records the outcome."""
+        emails = self._emails(entries)
+        sent, failures = [], []
+        for index, email in enumerate(emails):
+            message = alert_message(email[0]) if len(email) == 1 else digest_message(email[0].recipient_email, email)
+            try:
+                await session.send(message)
+                sent.extend(entry.id for entry in email)
+                self.emails += 1
+            except Exception as e:
+                failures.extend((entry.id, entry.attempts, str(e)) for entry in email)
+                if not session.connected:
+                    await self._record(sent, failures, [entry.id for rest in emails[index + 1:] for entry in rest])
+                    raise
+        await self._record(sent, failures, [])
+        return len(sent)
+
+    async def _record(self, sent: List[int], failures: List[tuple], unsent: List[int]):
+        self.sent += len(sent)
+        self.failed_attempts += len(failures)
+        await run_in_threadpool(record_deliveries, sent, failures, unsent, self.session_factory)
+
+    def stats(self) -> dict:
+        db = self.session_factory()
+        try:
+            counts = dict(db.query(AlertOutbox.status, func.count(AlertOutbox.id)).group_by(AlertOutbox.status).all())
+        finally:
+            db.close()
+        return {
+            "running": self.running,
+            "transport": self.transport.name if self.transport else None,
+            "digest_window_seconds": self.digest_window,
+            "outbox": {status: counts.get(status, 0) for status in ("pending", "sending", "sent", "failed")},
+            "sent": self.sent,
+            "emails": self.emails,
+            "failed_attempts": self.failed_attempts,
+            "connections": self.connections,
+        }
+
+
+# Started and stopped with the application in main.py.
+alert_dispatcher = AlertDispatcher()
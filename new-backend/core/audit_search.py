@@ -0,0 +1,117 @@
+# new-backend/core/audit_search.py
+
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.data_models import AuditLog
+
+# Columns of audit_logs searched by substring
+SEARCH_COLUMNS = ("user", "action", "details")
+
+# SQLite's FTS5 trigram index over SEARCH_COLUMNS, kept in sync by triggers.
+# rowid is the audit log id.
+_fts = table("audit_logs_fts", column("rowid"), *(column(name) for name in SEARCH_COLUMNS))
+_fts_ready = set()  # urls of the SQLite databases the FTS table was set up in
+
+# Trigram indexes need at least three characters to narrow anything down
+MIN_INDEXED_LENGTH = 3
+# A term with this many FTS matches is unselective: a newest-first scan finds a
+# page of its matches sooner than the FTS table lists (or ranks) them all
+FTS_MAX_MATCHES = int(os.getenv("AUDIT_FTS_MAX_MATCHES", "2000"))
+
+
+def ensure_search_indexes(engine: Engine):
+    """
+    Creates SQLite's substring index over SEARCH_COLUMNS, an external-content
+    FTS5 trigram table. Safe to call on every startup. On PostgreSQL the pg_trgm
+    GIN indexes, which serve ILIKE '%...%' directly, are built concurrently by
+    core/migrations.py.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    columns = ", ".join(f'"{name}"' for name in SEARCH_COLUMNS)
+    new_values = ", ".join(f'new."{name}"' for name in SEARCH_COLUMNS)
+    old_values = ", ".join(f'old."{name}"' for name in SEARCH_COLUMNS)
+    delete_old = f"INSERT INTO audit_logs_fts(audit_logs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO audit_logs_fts(rowid, {columns}) VALUES (new.id, {new_values});"
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'audit_logs_fts'").first()
+        try:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS audit_logs_fts USING fts5({columns}, "
+                "content='audit_logs', content_rowid='id', tokenize='trigram')"
+            )
+        except Exception:
+            # SQLite older than 3.34 has no trigram tokenizer; filters stay plain LIKE scans
+            return
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS audit_logs_fts_ai AFTER INSERT ON audit_logs BEGIN {insert_new} END")
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS audit_logs_fts_ad AFTER DELETE ON audit_logs BEGIN {delete_old} END")
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS audit_logs_fts_au AFTER UPDATE ON audit_logs BEGIN {delete_old} {insert_new} END")
+        if not exists:
+            # Index the rows written before the table existed
+            conn.exec_driver_sql("INSERT INTO audit_logs_fts(audit_logs_fts) VALUES ('rebuild')")
+    _fts_ready.add(str(engine.url))
+
+
+def _use_fts(db: Session, value: str) -> bool:
+    return len(value) >= MIN_INDEXED_LENGTH and str(db.get_bind().url) in _fts_ready
+
+
+def _fts_matches(db: Session, condition) -> Optional[List[int]]:
+    """Ids of the rows of the FTS table meeting `condition`, or None from FTS_MAX_MATCHES of them on."""
+    ids = db.execute(select(_fts.c.rowid).where(condition).limit(FTS_MAX_MATCHES)).scalars().all()
+    return ids if len(ids) < FTS_MAX_MATCHES else None
+
+
+def substring_filter(db: Session, name: str, value: str):
+    """
+    Case-insensitive "`name` contains `value`" condition on AuditLog. On SQLite
+    it is answered from the FTS5 table when there is one, unless the term is
+    too short or too common for the index to beat a plain scan; on PostgreSQL
+    the ILIKE itself uses the trigram index.
+    """
+    if _use_fts(db, value):
+        ids = _fts_matches(db, _fts.c[name].like(f"%{value}%"))
+        if ids is not None:
+            return AuditLog.id.in_(ids)
+    return getattr(AuditLog, name).ilike(f"%{value}%")
+
+
+def search_audit_logs(db: Session, q: str, limit: int) -> List[Tuple[AuditLog, float]]:
+    """
+    Audit logs whose user, action or details contain `q`, best match first,
+    with a relevance score (higher is better). PostgreSQL scores by trigram
+    word similarity, SQLite's FTS5 table by bm25; elsewhere, and for queries too
+    short or too common for the FTS5 table to help, every match scores 1.0 and
+    the newest come first.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        score = func.greatest(*(func.word_similarity(q, getattr(AuditLog, name)) for name in SEARCH_COLUMNS))
+        rows = (db.query(AuditLog, score.label("score"))
+                .filter(or_(*(getattr(AuditLog, name).ilike(f"%{q}%") for name in SEARCH_COLUMNS)))
+                .order_by(score.desc(), AuditLog.timestamp.desc(), AuditLog.id.desc())
+                .limit(limit).all())
+        return [(log, float(score)) for log, score in rows]
+
+    # A quoted FTS5 string is a phrase; the trigram tokenizer matches it as a substring
+    phrase = '"' + q.replace('"', '""') + '"'
+    if _use_fts(db, q) and _fts_matches(db, text("audit_logs_fts MATCH :phrase").bindparams(phrase=phrase)) is not None:
+        ranked = db.execute(
+            text("SELECT rowid, bm25(audit_logs_fts) AS score FROM audit_logs_fts "
+                 "WHERE audit_logs_fts MATCH :phrase ORDER BY score, rowid DESC LIMIT :limit"),
+            {"phrase": phrase, "limit": limit},
+        ).all()
+        logs = {log.id: log for log in db.query(AuditLog).filter(AuditLog.id.in_([row_id for row_id, _ in ranked]))}
+        # bm25 is lower for better matches
+        return [(logs[row_id], -score) for row_id, score in ranked if row_id in logs]
+
+    logs = (db.query(AuditLog)
+            .filter(or_(*(getattr(AuditLog, name).ilike(f"%{q}%") for name in SEARCH_COLUMNS)))
+            .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+            .limit(limit).all())
+    return [(log, 1.0) for log in logs]
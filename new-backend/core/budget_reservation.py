@@ -0,0 +1,318 @@
+# new-backend/core/budget_reservation.py
+
+import asyncio
+import datetime
+import os
+import socket
+import uuid
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from core.accountant import PrivacyCost, admission_condition, composed_loss
+from core.database import SessionLocal
+from models.data_models import Budget, Job
+
+# Budget charges follow a reserve -> convert | release protocol. Every step is a
+# single UPDATE whose arithmetic runs in the database, so concurrent jobs never
+# read-modify-write the budget row and no application lock is needed.
+#
+# A budget keeps the running sums of its jobs' PrivacyCost fields, consumed
+# (spent_*) and held by queued jobs (reserved_*). consumed_epsilon/delta is the
+# composed loss its accountant derives from the spent sums, so each job is an
+# O(1) update whatever the accountant.
+#
+# Each reservation is held by the Job rows it was taken for, which record their
+# share of it (the same reserved_* columns), the budget, and the process holding
+# them under a lease. Converting or releasing a job's share is tied to the job
+# leaving Queued/Running, a conditional UPDATE that matches once, so a share is
+# never returned twice. Processes renew the leases of their own jobs; jobs whose
+# lease expired belong to a process that stopped and are failed by whichever
+# process notices first, releasing exactly what they held.
+_budgets = Budget.__table__
+_jobs = Job.__table__
+
+# Identifies this process as the holder of the jobs it reserves budget for
+RESERVATION_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# A job's lease is renewed every JOB_LEASE_RENEW_SECONDS while it is in flight;
+# one not renewed for JOB_LEASE_SECONDS is taken to be abandoned.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_LEASE_RENEW_SECONDS = float(os.getenv("JOB_LEASE_RENEW_SECONDS", "30"))
+
+IN_FLIGHT_STATUSES = ("Queued", "Running")
+INTERRUPTED_ERROR = "Interrupted before completion: the server running it stopped."
+
+# PrivacyCost field -> (spent column, reserved column); jobs record their share in the reserved column
+_COST_COLUMNS = {
+    "epsilon": ("spent_epsilon", "reserved_epsilon"),
+    "delta": ("spent_delta", "reserved_delta"),
+    "epsilon_sq": ("spent_epsilon_sq", "reserved_epsilon_sq"),
+    "epsilon_expm1": ("spent_epsilon_expm1", "reserved_epsilon_expm1"),
+    "rho": ("spent_rho", "reserved_rho"),
+    "approx_delta": ("spent_approx_delta", "reserved_approx_delta"),
+}
+
+# Reservation attempts before giving up on a budget whose settings keep changing under it.
+_RESERVE_ATTEMPTS = 3
+
+
+def _unchanged(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def spent_cost(budget: Budget) -> PrivacyCost:
+    """The summed cost of the jobs charged to a budget since its last reset."""
+    return PrivacyCost(**{field: getattr(budget, spent) or 0.0 for field, (spent, _) in _COST_COLUMNS.items()})
+
+
+def refresh_consumed(budget: Budget):
+    """Recomputes consumed_epsilon/delta, e.g. after the accountant or total_delta changed."""
+    budget.consumed_epsilon, budget.consumed_delta = composed_loss(budget.accountant, budget.total_delta,
+                                                                   spent_cost(budget))
+
+
+def reset_spent(budget: Budget):
+    """Clears what a budget has consumed; reservations of jobs still in flight stay."""
+    for spent, _ in _COST_COLUMNS.values():
+        setattr(budget, spent, 0.0)
+    budget.consumed_epsilon = 0.0
+    budget.consumed_delta = 0.0
+
+
+def _lease_expiry() -> datetime.datetime:
+    return datetime.datetime.utcnow() + datetime.timedelta(seconds=JOB_LEASE_SECONDS)
+
+
+def reserve_for_jobs(db: Session, budget_id: int, jobs: List[Tuple[Job, PrivacyCost]]) -> bool:
+    """
+    Atomically sets aside the jobs' combined cost if the budget's accountant says
+    consumed plus reserved cost leaves room for it, and adds the new Job rows as
+    its holders, leased to this process. The UPDATE is conditional, so of two
+    racing reservations that do not both fit only one matches the row; it also
+    requires the accountant and totals it was built for to be unchanged. Commits
+    the caller's session, making the reservation visible to other workers
+    immediately, so the session must have nothing else pending. Returns False,
+    adding nothing, when it does not fit.
+    """
+    try:
+        if not _reserve(db, budget_id, PrivacyCost.total(cost for _, cost in jobs)):
+            db.rollback()
+            return False
+        expires_at = _lease_expiry()
+        for job, cost in jobs:
+            job.budget_id = budget_id
+            for field, (_, reserved) in _COST_COLUMNS.items():
+                setattr(job, reserved, getattr(cost, field))
+            job.lease_owner = RESERVATION_OWNER
+            job.lease_expires_at = expires_at
+            db.add(job)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _reserve(db: Session, budget_id: int, cost: PrivacyCost) -> bool:
+    held = {field: _budgets.c[spent] + _budgets.c[reserved] for field, (spent, reserved) in _COST_COLUMNS.items()}
+    values = {reserved: _budgets.c[reserved] + getattr(cost, field) for field, (_, reserved) in _COST_COLUMNS.items()}
+    settings_query = select(_budgets.c.accountant, _budgets.c.total_epsilon, _budgets.c.total_delta) \
+        .where(_budgets.c.id == budget_id)
+    for _ in range(_RESERVE_ATTEMPTS):
+        settings = db.execute(settings_query).first()
+        if settings is None:
+            return False
+        accountant, total_epsilon, total_delta = settings
+        statement = (
+            update(_budgets)
+            .where(_budgets.c.id == budget_id)
+            .where(_unchanged(_budgets.c.accountant, accountant))
+            .where(_unchanged(_budgets.c.total_epsilon, total_epsilon))
+            .where(_unchanged(_budgets.c.total_delta, total_delta))
+            .where(admission_condition(accountant, total_epsilon, total_delta or 0.0, held, cost))
+            .values(**values)
+        )
+        if db.execute(statement).rowcount == 1:
+            return True
+        if db.execute(settings_query).first() == settings:
+            return False
+    return False
+
+
+def _convert(db: Session, budget_id: int, cost: PrivacyCost, spent: PrivacyCost) -> float:
+    values = {}
+    for field, (spent_column, reserved_column) in _COST_COLUMNS.items():
+        values[reserved_column] = _budgets.c[reserved_column] - getattr(cost, field)
+        values[spent_column] = _budgets.c[spent_column] + getattr(spent, field)
+    db.execute(
+        update(_budgets)
+        .where(_budgets.c.id == budget_id)
+        .values(lifetime_epsilon=_budgets.c.lifetime_epsilon + spent.epsilon,
+                lifetime_delta=_budgets.c.lifetime_delta + spent.delta, **values)
+    )
+
+    row = db.execute(
+        select(_budgets.c.accountant, _budgets.c.total_delta,
+               *(_budgets.c[spent_column] for spent_column, _ in _COST_COLUMNS.values()))
+        .where(_budgets.c.id == budget_id)
+    ).first()
+    accountant, total_delta = row[0], row[1]
+    state = PrivacyCost(*(value or 0.0 for value in row[2:]))
+    consumed_epsilon, consumed_delta = composed_loss(accountant, total_delta, state)
+    db.execute(
+        update(_budgets)
+        .where(_budgets.c.id == budget_id)
+        .values(consumed_epsilon=consumed_epsilon, consumed_delta=consumed_delta)
+    )
+    return consumed_epsilon
+
+
+def _release(db: Session, budget_id: int, cost: PrivacyCost):
+    db.execute(
+        update(_budgets)
+        .where(_budgets.c.id == budget_id)
+        .values(**{reserved: _budgets.c[reserved] - getattr(cost, field)
+                   for field, (_, reserved) in _COST_COLUMNS.items()})
+    )
+
+
+def _end_hold(db: Session, job_id: int, status: str, values: dict,
+              lease_expired_before: Optional[datetime.datetime] = None) -> Optional[Tuple[int, PrivacyCost]]:
+    """
+    Moves a job holding a reservation out of Queued/Running, and returns the
+    budget and cost it held, or None if it no longer held one.
+    """
+    held = db.execute(
+        select(_jobs.c.budget_id, *(_jobs.c[reserved] for _, reserved in _COST_COLUMNS.values()))
+        .where(_jobs.c.id == job_id)
+    ).first()
+    if held is None or held[0] is None:
+        return None
+    statement = (
+        update(_jobs)
+        .where(_jobs.c.id == job_id, _jobs.c.status.in_(IN_FLIGHT_STATUSES))
+        .values(status=status, lease_owner=None, lease_expires_at=None, **values)
+    )
+    if lease_expired_before is not None:
+        statement = statement.where(_jobs.c.lease_expires_at <= lease_expired_before)
+    if db.execute(statement).rowcount != 1:
+        return None
+    return held[0], PrivacyCost(*(value or 0.0 for value in held[1:]))
+
+
+def start_job(db: Session, job_id: int) -> bool:
+    """
+    Moves a queued job of this process to Running and renews its lease; False if
+    it is no longer queued here (e.g. its lease expired and it was failed). Runs
+    in the caller's transaction.
+    """
+    return db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id, _jobs.c.status == "Queued", _jobs.c.lease_owner == RESERVATION_OWNER)
+        .values(status="Running", lease_expires_at=_lease_expiry())
+    ).rowcount == 1
+
+
+def convert_job_reservation(db: Session, job_id: int, spent: Optional[PrivacyCost] = None,
+                            status: str = "Completed", **values) -> Optional[float]:
+    """
+    Completes an in-flight job with the column `values` given (e.g. its result)
+    and turns its reservation into consumed budget. Only `spent` (default: all of
+    it) is charged; the rest of the reservation is returned. Runs in the caller's
+    transaction, so the charge commits together with the job's result; the first
+    budget UPDATE locks the row, so the composed loss written after it sees every
+    charge. Returns the composed epsilon consumed after this charge, for alert
+    thresholds, or None if the job no longer held its reservation, in which case
+    the caller should roll back.
+    """
+    held = _end_hold(db, job_id, status, values)
+    if held is None:
+        return None
+    budget_id, cost = held
+    return _convert(db, budget_id, cost, cost if spent is None else spent)
+
+
+def release_job_reservation(db: Session, job_id: int, status: str = "Failed", **values) -> bool:
+    """
+    Ends an in-flight job unspent, e.g. when it failed, with the column `values`
+    given and returns its reservation. Runs in the caller's transaction. Returns
+    False if the job no longer held its reservation.
+    """
+    held = _end_hold(db, job_id, status, values)
+    if held is not None:
+        _release(db, *held)
+    return held is not None
+
+
+def renew_leases(db: Session) -> int:
+    """Extends the leases of this process's in-flight jobs; returns how many it holds."""
+    return db.execute(
+        update(_jobs)
+        .where(_jobs.c.lease_owner == RESERVATION_OWNER, _jobs.c.status.in_(IN_FLIGHT_STATUSES))
+        .values(lease_expires_at=_lease_expiry())
+    ).rowcount
+
+
+def release_expired_reservations(db: Session) -> int:
+    """
+    Fails the in-flight jobs whose lease has expired, those of a process that
+    stopped, and returns what each held. Jobs of live processes keep their
+    reservations. Commits the caller's session; returns the number of jobs failed.
+    """
+    now = datetime.datetime.utcnow()
+    expired = db.execute(
+        select(_jobs.c.id)
+        .where(_jobs.c.status.in_(IN_FLIGHT_STATUSES), _jobs.c.lease_expires_at <= now)
+    ).scalars().all()
+    failed = 0
+    for job_id in expired:
+        # Conditional on the lease still being expired, in case its holder renewed it meanwhile
+        held = _end_hold(db, job_id, "Failed", {"errors": INTERRUPTED_ERROR}, lease_expired_before=now)
+        if held is not None:
+            _release(db, *held)
+            failed += 1
+    db.commit()
+    return failed
+
+
+class JobLeases:
+    """
+    Background task that renews the leases of this process's in-flight jobs and
+    reclaims the reservations of jobs whose holder stopped renewing theirs.
+    """
+
+    def __init__(self):
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(JOB_LEASE_RENEW_SECONDS)
+            try:
+                await run_in_threadpool(self.tick)
+            except Exception as e:
+                print(f"Job lease renewal failed: {e}")
+
+    @staticmethod
+    def tick():
+        db = SessionLocal()
+        try:
+            renew_leases(db)
+            db.commit()
+            release_expired_reservations(db)
+        finally:
+            db.close()
+
+
+# Started and stopped with the application in main.py.
+job_leases = JobLeases()
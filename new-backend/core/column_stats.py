@@ -0,0 +1,111 @@
+# new-backend/core/column_stats.py
+
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core.aggregates import ColumnAggregate, ColumnSummary
+from core.dataset_cache import source_fingerprint
+from models import data_models
+
+# Category counts are only stored for columns with at most this many distinct values;
+# beyond that the table would rival the data itself.
+MAX_STORED_CATEGORIES = int(os.getenv("MAX_STORED_CATEGORIES", "1000"))
+
+
+def content_fingerprint(file_path: str, table_name: Optional[str] = None) -> str:
+    """Identifies the current content of a dataset file from its metadata, without reading it."""
+    return json.dumps(list(source_fingerprint(file_path)) + [table_name])
+
+
+def series_stats(series: pd.Series) -> dict:
+    """
+    Sufficient statistics of a column, including nulls: count, sum, sum of squared
+    deviations from the mean, min, max and null count for numeric columns; the
+    value counts for categorical ones (None when there are too many categories).
+    """
+    values = series.dropna()
+    stats = {"numeric": pd.api.types.is_numeric_dtype(values), "null_count": int(len(series) - len(values)),
+             "count": int(len(values)), "sum": None, "m2": None, "min": None, "max": None, "categories": None}
+    if stats["numeric"]:
+        aggregate = ColumnAggregate.from_values(values.to_numpy())
+        stats.update(sum=aggregate.total, m2=aggregate.m2, min=aggregate.min, max=aggregate.max)
+    else:
+        counts = values.value_counts()
+        if len(counts) <= MAX_STORED_CATEGORIES and all(isinstance(label, str) for label in counts.index):
+            stats["categories"] = {label: int(n) for label, n in counts.items()}
+    return stats
+
+
+def stats_from_summary(summary: ColumnSummary) -> dict:
+    """Converts a variance (or categorical histogram) summary computed at the source into stored stats."""
+    aggregate = summary.aggregate
+    stats = {"numeric": summary.is_numeric, "count": summary.count, "null_count": None,
+             "sum": None, "m2": None, "min": None, "max": None, "categories": None}
+    if aggregate is not None:
+        stats.update(null_count=aggregate.null_count, sum=aggregate.total, m2=aggregate.m2,
+                     min=aggregate.min, max=aggregate.max)
+    elif summary.histogram_labels is not None and len(summary.histogram_labels) <= MAX_STORED_CATEGORIES \
+            and all(isinstance(label, str) for label in summary.histogram_labels):
+        stats["categories"] = dict(zip(summary.histogram_labels, summary.histogram_counts.tolist()))
+    return stats
+
+
+def column_stats_from_model(column: data_models.DatasetColumn) -> dict:
+    """Reads the stats persisted on a column back into the series_stats layout."""
+    return {
+        "numeric": column.value_sum is not None,
+        "count": column.value_count,
+        "null_count": column.null_count,
+        "sum": column.value_sum,
+        "m2": column.sum_squared_deviations,
+        "min": column.min_val,
+        "max": column.max_val,
+        "categories": {c.value: c.count for c in column.category_counts} if column.category_counts else None,
+    }
+
+
+def apply_column_stats(column: data_models.DatasetColumn, stats: dict):
+    """Stores stats on a column row, replacing its previous category counts."""
+    column.value_count = stats["count"]
+    column.null_count = stats["null_count"]
+    column.value_sum = stats["sum"]
+    column.sum_squared_deviations = stats["m2"]
+    if stats["numeric"]:
+        column.min_val = stats["min"]
+        column.max_val = stats["max"]
+    column.category_counts = [
+        data_models.ColumnCategoryCount(value=label, count=n) for label, n in (stats["categories"] or {}).items()
+    ]
+
+
+def summary_from_stats(stats: dict, query_type: str) -> Optional[ColumnSummary]:
+    """
+    Rebuilds the summary a query needs from stored stats, or returns None when the
+    stats cannot answer it (numeric histograms depend on the requested bins).
+    """
+    query_type = query_type.lower()
+    if stats is None or stats.get("count") is None:
+        return None
+    if not stats["numeric"]:
+        if query_type != 'histogram':
+            return ColumnSummary(count=stats["count"], is_numeric=False)
+        if stats["categories"] is None:
+            return None
+        ordered = sorted(stats["categories"].items(), key=lambda item: item[1], reverse=True)
+        return ColumnSummary(
+            count=stats["count"], is_numeric=False,
+            histogram_labels=[label for label, _ in ordered],
+            histogram_counts=np.array([n for _, n in ordered], dtype=np.int64)
+        )
+    if query_type == 'histogram' or stats["sum"] is None or stats["m2"] is None:
+        return None
+    count = stats["count"]
+    aggregate = ColumnAggregate(
+        count=count, mean=stats["sum"] / count if count else 0.0, m2=stats["m2"], total=stats["sum"],
+        min=stats["min"], max=stats["max"], null_count=stats["null_count"] or 0
+    )
+    return ColumnSummary(count=count, is_numeric=True, aggregate=aggregate)
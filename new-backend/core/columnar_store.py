@@ -0,0 +1,55 @@
+# new-backend/core/columnar_store.py
+
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+
+def columnar_path_for(source_path: str, table_name: Optional[str] = None) -> str:
+    """Returns the Parquet path stored beside an uploaded CSV or SQLite file."""
+    base, _ = os.path.splitext(source_path)
+    if table_name:
+        base = f"{base}.{table_name}"
+    return f"{base}.parquet"
+
+
+def write_columnar_copy(df: pd.DataFrame, source_path: str, table_name: Optional[str] = None) -> Optional[str]:
+    """
+    Writes a Parquet copy of an uploaded dataset so later reads can load single
+    columns. Returns the path, or None if the frame cannot be stored as Parquet
+    (e.g. pyarrow is missing or a column mixes incompatible types); the raw file
+    remains the source of truth in that case.
+    """
+    columnar_path = columnar_path_for(source_path, table_name)
+    try:
+        df.to_parquet(columnar_path, index=False)
+        return os.path.abspath(columnar_path)
+    except Exception as e:
+        print(f"Columnar conversion skipped for {source_path}: {e}")
+        if os.path.exists(columnar_path):
+            os.remove(columnar_path)
+        return None
+
+
+def columnar_column_names(columnar_path: str) -> List[str]:
+    """Reads the column names from the Parquet footer without touching the data pages."""
+    import pyarrow.parquet as pq
+    return pq.read_schema(columnar_path).names
+
+
+def read_columnar(columnar_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Reads the requested columns (or all of them) from the Parquet copy."""
+    if columns is not None:
+        available = set(columnar_column_names(columnar_path))
+        columns = [c for c in columns if c in available]
+    return pd.read_parquet(columnar_path, columns=columns)
+
+
+def read_columnar_head(columnar_path: str, n: int) -> pd.DataFrame:
+    """Reads only the first `n` rows, decoding a single record batch."""
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(columnar_path)
+    for batch in parquet_file.iter_batches(batch_size=n):
+        return batch.to_pandas()
+    return parquet_file.schema_arrow.empty_table().to_pandas()
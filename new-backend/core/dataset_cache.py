@@ -0,0 +1,108 @@
+# new-backend/core/dataset_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Upper bound (in bytes) for all DataFrames kept in memory by this process.
+DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def source_fingerprint(*paths):
+    """
+    Identifies the current content of one or more source files by
+    (absolute path, modification time, size). A re-written file gets a new fingerprint.
+    """
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Approximate in-memory size of a DataFrame, including object columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetCache:
+    """
+    Process-wide LRU cache of loaded DataFrames, bounded by a byte budget.
+
+    Entries are keyed by dataset id plus the source fingerprint, so a changed file
+    is never served stale. Cached frames are shared between requests and must be
+    treated as read-only by callers.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (DataFrame, size in bytes)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, dataset_id: int, fingerprint: tuple, loader, variant=None) -> pd.DataFrame:
+        key = (dataset_id, fingerprint, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Load outside the lock so a slow parse does not block unrelated datasets.
+        df = loader()
+        nbytes = frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            return df
+
+        with self._lock:
+            # Older versions of this dataset can never be hit again.
+            for stale_key in [k for k in self._entries if k[0] == dataset_id and k[1] != fingerprint]:
+                self._remove(stale_key)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (df, nbytes)
+            self._current_bytes += nbytes
+            while self._current_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+        return df
+
+    def invalidate(self, dataset_id: int):
+        """Drops every cached frame for a dataset, e.g. after a re-upload or delete."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dataset_id]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "current_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self._current_bytes -= nbytes
+
+
+# Shared by the job, simulation and dataset preview endpoints.
+dataset_cache = DatasetCache(DATASET_CACHE_MAX_BYTES)
@@ -0,0 +1,143 @@
+# new-backend/core/job_queue.py
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+
+class JobQueue:
+    """
+    In-process FIFO queue of submitted jobs drained by a bounded pool of asyncio
+    workers. The pool size follows Settings.max_concurrent_queries, so at most
+    that many jobs execute at the same time; the rest wait in the queue.
+    """
+
+    def __init__(self, handler=None):
+        # handler: async callable receiving the submitted payload; returns True if the job completed
+        self.handler = handler
+        self._loop = None
+        self._queue = None
+        self._workers = {}          # worker index -> asyncio.Task
+        self._busy = set()          # indices of workers currently running a job
+        self._size = 0
+        self._pending = OrderedDict()   # job_id -> enqueue time, in queue order
+        self._recent_waits = deque(maxlen=1000)
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def start(self, size: int):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self.resize(size)
+
+    async def stop(self):
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._busy.clear()
+        self._queue = None
+
+    def resize(self, size: int):
+        """Grows or shrinks the worker pool. Busy workers above the new size exit after their current job."""
+        self._size = max(1, int(size or 1))
+        if not self.running:
+            return
+        self._call_on_loop(self._spawn_or_cancel_workers)
+
+    def _call_on_loop(self, callback, *args):
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            callback(*args)
+        else:
+            # Called from a threadpool endpoint (e.g. the settings update or job submission).
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _spawn_or_cancel_workers(self):
+        for index in range(self._size):
+            if index not in self._workers:
+                self._workers[index] = asyncio.create_task(self._worker(index))
+        for index, task in list(self._workers.items()):
+            if index >= self._size and index not in self._busy:
+                task.cancel()
+                del self._workers[index]
+
+    def submit(self, job_id: int, payload) -> int:
+        """Enqueues a job and returns its 1-based position in the queue."""
+        if not self.running:
+            raise RuntimeError("The job queue is not running.")
+        self._pending[job_id] = time.monotonic()
+        self._call_on_loop(self._queue.put_nowait, (job_id, payload))
+        self.submitted += 1
+        return len(self._pending)
+
+    def position(self, job_id: int):
+        """1-based queue position of a job that has not started yet, or None."""
+        for position, pending_id in enumerate(list(self._pending), start=1):
+            if pending_id == job_id:
+                return position
+        return None
+
+    def current_wait(self, job_id: int):
+        """Seconds a still-queued job has been waiting, or None."""
+        enqueued_at = self._pending.get(job_id)
+        return time.monotonic() - enqueued_at if enqueued_at is not None else None
+
+    def stats(self) -> dict:
+        waits = sorted(self._recent_waits)
+        started = len(waits)
+        return {
+            "workers": self._size,
+            "busy_workers": len(self._busy),
+            "queue_depth": len(self._pending),
+            "submitted": self.submitted,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self.total_wait_seconds / max(self.started, 1), 4),
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "p50_wait_seconds": round(waits[started // 2], 4) if started else 0.0,
+            "p95_wait_seconds": round(waits[min(started - 1, int(started * 0.95))], 4) if started else 0.0,
+        }
+
+    async def _worker(self, index: int):
+        while index < self._size:
+            job_id, payload = await self._queue.get()
+            self._busy.add(index)
+            enqueued_at = self._pending.pop(job_id, time.monotonic())
+            wait = time.monotonic() - enqueued_at
+            self.started += 1
+            self._recent_waits.append(wait)
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            try:
+                if await self.handler(payload):
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Queued job {job_id} failed: {e}")
+            finally:
+                self._busy.discard(index)
+                self._queue.task_done()
+        self._workers.pop(index, None)
+
+
+# Started on application startup with the configured worker count.
+job_queue = JobQueue()
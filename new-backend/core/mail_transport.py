@@ -0,0 +1,44 @@
+# new-backend/core/mail_transport.py
+
+from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from fastapi_mail.connection import Connection
+
+
+class _SmtpSession:
+    """One SMTP connection, opened on enter and closed on exit; every message sent in between reuses it."""
+
+    def __init__(self, mail_config: ConnectionConfig):
+        self.mail_config = mail_config
+        self._mail = FastMail(mail_config)
+        self._connection = Connection(mail_config)
+
+    async def __aenter__(self) -> "_SmtpSession":
+        await self._connection.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._connection.__aexit__(exc_type, exc, tb)
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.mail_config.SUPPRESS_SEND) or self._connection.session.is_connected
+
+    async def send(self, message: MessageSchema):
+        prepared = await self._mail.get_message(message)
+        if not self.mail_config.SUPPRESS_SEND:
+            await self._connection.session.send_message(prepared)
+
+
+class SmtpTransport:
+    name = "smtp"
+
+    def __init__(self, mail_config: ConnectionConfig):
+        self.mail_config = mail_config
+
+    def session(self) -> _SmtpSession:
+        return _SmtpSession(self.mail_config)
+
+
+def mail_transport(mail_config: ConnectionConfig):
+    """The transport alert emails are delivered through: the configured SMTP server."""
+    return SmtpTransport(mail_config)
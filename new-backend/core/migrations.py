@@ -0,0 +1,228 @@
+# new-backend/core/migrations.py
+
+import datetime
+import math
+from typing import Callable, Dict, List, Set, Tuple, Union
+
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+from core.audit_search import SEARCH_COLUMNS
+from models.data_models import AuditLog, Base, Budget
+
+# Arbitrary key of the PostgreSQL advisory lock that serializes upgrades started
+# by several workers at once
+_UPGRADE_LOCK_KEY = 7305114
+
+
+def _backfill_spent_costs(conn: Connection):
+    """
+    Budgets from before the spent_* sums only know the loss their jobs composed
+    to under basic composition, consumed_epsilon/delta. It is charged as the cost
+    of a single (epsilon, delta) job, which bounds the jobs it composes, so the
+    accountants keep counting what was spent instead of starting from zero.
+    """
+    budgets = Budget.__table__
+    rows = conn.execute(select(budgets.c.id, budgets.c.consumed_epsilon, budgets.c.consumed_delta)).all()
+    if not rows:
+        return
+    conn.execute(
+        update(budgets).where(budgets.c.id == bindparam("budget_id")).values(
+            spent_epsilon=bindparam("epsilon"), spent_delta=bindparam("delta"),
+            spent_epsilon_sq=bindparam("epsilon_sq"), spent_epsilon_expm1=bindparam("epsilon_expm1"),
+            # (epsilon, delta)-DP is delta-approximate epsilon^2/2-zCDP
+            spent_rho=bindparam("rho"), spent_approx_delta=bindparam("delta"),
+        ),
+        [{"budget_id": budget_id, "epsilon": epsilon, "delta": delta, "epsilon_sq": epsilon * epsilon,
+          "epsilon_expm1": epsilon * math.expm1(epsilon), "rho": epsilon * epsilon / 2.0}
+         for budget_id, epsilon, delta in ((row[0], row[1] or 0.0, row[2] or 0.0) for row in rows)]
+    )
+
+
+def _fail_unleased_jobs(conn: Connection):
+    """
+    Jobs left in flight by a version that did not record their reservations
+    cannot be released one by one: they are failed, and the reservations they
+    held on the budgets, only theirs before this upgrade, are dropped.
+    """
+    conn.exec_driver_sql(
+        "UPDATE jobs SET status = 'Failed', errors = 'Interrupted by a server upgrade before completion.' "
+        "WHERE status IN ('Queued', 'Running')"
+    )
+    budgets = Budget.__table__
+    conn.execute(update(budgets).values(**{column.name: 0.0 for column in budgets.columns
+                                           if column.name.startswith("reserved_")}))
+
+
+# Run once, in the transaction that adds the (table, column) to an existing
+# table, to give the rows already there a meaningful value: SQL statements or
+# functions of the connection.
+BACKFILLS: Dict[Tuple[str, str], List[Union[str, Callable[[Connection], None]]]] = {
+    ("budgets", "spent_epsilon"): [_backfill_spent_costs],
+    ("budgets", "lifetime_epsilon"): ["UPDATE budgets SET lifetime_epsilon = COALESCE(consumed_epsilon, 0)"],
+    ("budgets", "lifetime_delta"): ["UPDATE budgets SET lifetime_delta = COALESCE(consumed_delta, 0)"],
+    ("jobs", "lease_expires_at"): [_fail_unleased_jobs],
+}
+
+
+def _backfill_audit_timestamps(conn: Connection):
+    """Entries logged without a time sort as the oldest, at the epoch."""
+    audit_logs = AuditLog.__table__
+    conn.execute(update(audit_logs).where(audit_logs.c.timestamp.is_(None)).values(timestamp=datetime.datetime(1970, 1, 1)))
+
+
+# Columns made NOT NULL after their table was created, with what fills in the
+# NULLs already there before the constraint is added.
+NOT_NULL_BACKFILLS: Dict[Tuple[str, str], List[Union[str, Callable[[Connection], None]]]] = {
+    ("audit_logs", "timestamp"): [_backfill_audit_timestamps],
+}
+
+
+def _dedupe_category_counts(conn: Connection):
+    """Keeps the first of the counts concurrent stats refreshes stored twice for a value."""
+    conn.exec_driver_sql(
+        "DELETE FROM column_category_counts WHERE id NOT IN "
+        "(SELECT MIN(id) FROM column_category_counts GROUP BY column_id, value)"
+    )
+
+
+# Run before an index is created on an existing table, e.g. to remove the rows a
+# new unique index would reject.
+INDEX_BACKFILLS: Dict[str, List[Union[str, Callable[[Connection], None]]]] = {
+    "uq_column_category_counts_column_value": [_dedupe_category_counts],
+}
+
+
+def _run_backfills(conn: Connection, backfills: List[Union[str, Callable[[Connection], None]]]):
+    for backfill in backfills:
+        if callable(backfill):
+            backfill(conn)
+        else:
+            conn.exec_driver_sql(backfill)
+
+
+def add_missing_columns(conn: Connection) -> Set[Tuple[str, str]]:
+    """
+    ALTERs every existing table to add the model columns it lacks, with their
+    server defaults, and returns the (table, column) pairs added. Tables that
+    do not exist yet are left to create_all.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added = set()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            spec = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f"ALTER TABLE {conn.dialect.identifier_preparer.format_table(table)} ADD COLUMN {spec}")
+            added.add((table.name, column.name))
+    return added
+
+
+def add_not_null_constraints(conn: Connection) -> Set[Tuple[str, str]]:
+    """
+    Backfills the NULLs of every NOT_NULL_BACKFILLS column the database still
+    has nullable and, on PostgreSQL, adds the constraint. SQLite cannot alter a
+    column, so there the NULLs are filled in on every upgrade instead. Returns
+    the (table, column) pairs constrained.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    constrained = set()
+    for (table_name, column_name), backfills in NOT_NULL_BACKFILLS.items():
+        if table_name not in existing_tables:
+            continue
+        column = next((c for c in inspector.get_columns(table_name) if c["name"] == column_name), None)
+        if column is None or not column["nullable"]:
+            continue
+        _run_backfills(conn, backfills)
+        if conn.dialect.name == "postgresql":
+            preparer = conn.dialect.identifier_preparer
+            conn.exec_driver_sql(f"ALTER TABLE {preparer.quote(table_name)} "
+                                 f"ALTER COLUMN {preparer.quote(column_name)} SET NOT NULL")
+            constrained.add((table_name, column_name))
+    return constrained
+
+
+# PostgreSQL indexes built with CREATE INDEX CONCURRENTLY, outside the upgrade
+# transaction, so building them on a large table does not block its writes:
+# index name -> (table, definition following ON <table>, extension it needs)
+CONCURRENT_INDEXES: Dict[str, Tuple[str, str, str]] = {
+    # Trigram indexes serving the ILIKE '%...%' audit log filters and search
+    f"ix_audit_logs_{name}_trgm": ("audit_logs", f'USING gin ("{name}" gin_trgm_ops)', "pg_trgm")
+    for name in SEARCH_COLUMNS
+}
+
+
+def create_concurrent_indexes(engine: Engine):
+    """
+    Builds the CONCURRENT_INDEXES that are missing, or were left invalid by an
+    interrupted build, without locking their tables against writes. CONCURRENTLY
+    cannot run inside a transaction, so this works on an autocommit connection
+    and takes the upgrade lock for the session instead.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"SELECT pg_advisory_lock({_UPGRADE_LOCK_KEY})")
+        try:
+            for name, (table_name, definition, extension) in CONCURRENT_INDEXES.items():
+                try:
+                    conn.exec_driver_sql(f"CREATE EXTENSION IF NOT EXISTS {extension}")
+                except Exception as e:
+                    # Needs CREATE on the database; without the index, queries fall back to scans
+                    print(f"Index {name} skipped: {e}")
+                    continue
+                valid = conn.execute(
+                    text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                         "WHERE c.relname = :name"), {"name": name}
+                ).scalar()
+                if valid:
+                    continue
+                if valid is not None:
+                    conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                conn.exec_driver_sql(f"CREATE INDEX CONCURRENTLY {name} ON {table_name} {definition}")
+                print(f"Schema upgraded; built index {name}")
+        finally:
+            conn.exec_driver_sql(f"SELECT pg_advisory_unlock({_UPGRADE_LOCK_KEY})")
+
+
+def upgrade_schema(engine: Engine):
+    """
+    Brings the database up to the models: creates missing tables, adds the
+    columns introduced since a table was created and backfills them, makes
+    columns NOT NULL that have become so, then creates missing indexes, on
+    PostgreSQL building CONCURRENT_INDEXES last. Runs on every startup; a no-op
+    once up to date.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_UPGRADE_LOCK_KEY})")
+        added = add_missing_columns(conn)
+        for key in sorted(added):
+            _run_backfills(conn, BACKFILLS.get(key, []))
+        constrained = add_not_null_constraints(conn)
+        Base.metadata.create_all(bind=conn)
+        # create_all skips tables that already exist; add indexes introduced since they were created
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            present = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in present:
+                    _run_backfills(conn, INDEX_BACKFILLS.get(index.name, []))
+                    index.create(bind=conn)
+    if added:
+        print(f"Schema upgraded; added columns: {', '.join(f'{t}.{c}' for t, c in sorted(added))}")
+    if constrained:
+        print(f"Schema upgraded; NOT NULL columns: {', '.join(f'{t}.{c}' for t, c in sorted(constrained))}")
+    if engine.dialect.name == "postgresql":
+        create_concurrent_indexes(engine)
+
+
+if __name__ == "__main__":
+    # python -m core.migrations, to upgrade ahead of a deploy
+    from core.database import engine
+    upgrade_schema(engine)
@@ -0,0 +1,156 @@
+# new-backend/core/noise.py
+
+import math
+import os
+from statistics import NormalDist
+from typing import Optional
+
+import numpy as np
+import diffprivlib.mechanisms as dp_mech
+
+_UNIT = 2.0 ** -53
+
+
+def secure_uniform(size: int) -> np.ndarray:
+    """Uniform floats in [0, 1) drawn from the operating system's CSPRNG."""
+    raw = np.frombuffer(os.urandom(8 * int(size)), dtype=np.uint64)
+    return (raw >> np.uint64(11)).astype(np.float64) * _UNIT
+
+
+def _uniform(size: int, rng: Optional[np.random.Generator]) -> np.ndarray:
+    return secure_uniform(size) if rng is None else rng.random(size)
+
+
+def standard_laplace(size: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Unit-scale Laplace samples. Without `rng` this is the same four-uniform sampler
+    as diffprivlib's Laplace.randomise on the secure source, evaluated for a whole
+    array at once; with `rng` (simulations) numpy's single-draw sampler is used.
+    """
+    if rng is not None:
+        return rng.laplace(size=size)
+    u1, u2, u3, u4 = _uniform(4 * size, rng).reshape(4, size)
+    return np.log(1 - u1) * np.cos(np.pi * u2) + np.log(1 - u3) * np.cos(np.pi * u4)
+
+
+def standard_normal(size: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Unit normal samples via Box-Muller. Like diffprivlib's Gaussian.randomise,
+    each sample averages two independent normals (here the cosine and sine branch).
+    With `rng`, numpy's own normal sampler is used instead.
+    """
+    if rng is not None:
+        return rng.standard_normal(size)
+    u1, u2 = _uniform(2 * size, rng).reshape(2, size)
+    radius = np.sqrt(-2.0 * np.log(1 - u1))
+    return radius * (np.cos(2 * np.pi * u2) + np.sin(2 * np.pi * u2)) / np.sqrt(2)
+
+
+def mechanism_noise(mechanism, size: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Draws `size` zero-mean noise samples with the same distribution that
+    `mechanism.randomise` adds to a single value.
+    """
+    if isinstance(mechanism, dp_mech.Laplace):
+        scale = mechanism.sensitivity / (mechanism.epsilon - np.log(1 - mechanism.delta))
+        return -scale * standard_laplace(size, rng)
+    if isinstance(mechanism, dp_mech.Gaussian):  # also covers GaussianAnalytic
+        return mechanism._scale * standard_normal(size, rng)
+    raise ValueError(f"Vectorized noise is not available for {type(mechanism).__name__}.")
+
+
+def randomise_array(values, mechanism, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Vectorized equivalent of applying `mechanism.randomise` to every element."""
+    values = np.asarray(values, dtype=np.float64)
+    return values + mechanism_noise(mechanism, values.size, rng).reshape(values.shape)
+
+
+def select_released_bins(noisy_counts: np.ndarray, threshold: Optional[float] = None, top_k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of the histogram bins to release. Both filters act on already noised
+    counts, so they are post-processing and do not change the privacy guarantee.
+    With `top_k` the indices are ordered by descending noisy count.
+    """
+    indices = np.arange(noisy_counts.size)
+    if threshold is not None:
+        indices = indices[noisy_counts >= threshold]
+    if top_k is not None and top_k < indices.size:
+        top = np.argpartition(-noisy_counts[indices], top_k - 1)[:top_k]
+        indices = indices[top]
+    if top_k is not None:
+        indices = indices[np.argsort(-noisy_counts[indices], kind="stable")]
+    return indices
+
+
+def partition_threshold(mechanism, delta: float) -> float:
+    """
+    Noisy-count threshold for releasing groups whose keys come from the data: a
+    group holding a single record passes it with probability at most `delta`, so
+    the set of released groups does not reveal rare ones. `mechanism` noises
+    counts of sensitivity 1.
+    """
+    if isinstance(mechanism, dp_mech.Laplace):
+        scale = mechanism.sensitivity / (mechanism.epsilon - np.log(1 - mechanism.delta))
+        return 1.0 + scale * math.log(1.0 / (2.0 * delta))
+    if isinstance(mechanism, dp_mech.Gaussian):
+        return 1.0 + mechanism._scale * NormalDist().inv_cdf(1.0 - delta)
+    raise ValueError(f"No partition threshold for {type(mechanism).__name__}.")
+
+
+# --- CLOSED-FORM NOISE DISTRIBUTIONS ---
+
+class LaplaceNoise:
+    """Zero-mean Laplace noise with scale b: E|X| = b and |X| is exponential."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+
+    def cdf(self, x) -> np.ndarray:
+        z = np.asarray(x, dtype=np.float64) / self.scale
+        return np.where(z < 0, 0.5 * np.exp(np.minimum(z, 0)), 1 - 0.5 * np.exp(-np.maximum(z, 0)))
+
+    def ppf(self, p: float) -> float:
+        return self.scale * math.log(2 * p) if p < 0.5 else -self.scale * math.log(2 - 2 * p)
+
+    @property
+    def mean_abs(self) -> float:
+        return self.scale
+
+    def abs_cdf(self, x: float) -> float:
+        return 1 - math.exp(-x / self.scale) if x > 0 else 0.0
+
+    def abs_ppf(self, p: float) -> float:
+        return -self.scale * math.log(1 - p)
+
+
+class GaussianNoise:
+    """Zero-mean normal noise with standard deviation sigma: E|X| = sigma * sqrt(2/pi)."""
+
+    def __init__(self, sigma: float):
+        self.sigma = sigma
+        self._normal = NormalDist(0.0, sigma)
+
+    def cdf(self, x) -> np.ndarray:
+        return np.array([self._normal.cdf(v) for v in np.atleast_1d(x)], dtype=np.float64)
+
+    def ppf(self, p: float) -> float:
+        return self._normal.inv_cdf(p)
+
+    @property
+    def mean_abs(self) -> float:
+        return self.sigma * math.sqrt(2 / math.pi)
+
+    def abs_cdf(self, x: float) -> float:
+        return 2 * self._normal.cdf(x) - 1 if x > 0 else 0.0
+
+    def abs_ppf(self, p: float) -> float:
+        return self._normal.inv_cdf((1 + p) / 2)
+
+
+def noise_distribution(mechanism):
+    """The distribution of the noise `mechanism.randomise` adds, for closed-form utility estimates."""
+    if isinstance(mechanism, dp_mech.Laplace):
+        return LaplaceNoise(mechanism.sensitivity / (mechanism.epsilon - np.log(1 - mechanism.delta)))
+    if isinstance(mechanism, dp_mech.Gaussian):  # also covers GaussianAnalytic
+        return GaussianNoise(mechanism._scale)
+    raise ValueError(f"No closed-form noise distribution for {type(mechanism).__name__}.")
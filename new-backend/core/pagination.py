@@ -0,0 +1,41 @@
+# new-backend/core/pagination.py
+
+import base64
+import datetime
+import json
+from typing import Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Query, Session
+
+
+def encode_cursor(timestamp: datetime.datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended at."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """(timestamp, id) of an encode_cursor cursor; raises ValueError for anything else."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.datetime.fromisoformat(timestamp), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def estimate_count(db: Session, query: Query) -> int:
+    """
+    Number of rows `query` matches. On PostgreSQL this is the planner's estimate
+    from EXPLAIN, which reads table statistics instead of the rows; other
+    databases count exactly.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        compiled = query.statement.compile(bind)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return db.execute(select(func.count()).select_from(query.statement.subquery())).scalar()
@@ -0,0 +1,47 @@
+# new-backend/core/privacy_ledger.py
+
+import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.data_models import Budget, PrivacyLedgerEntry
+
+
+def record_spend(db: Session, dataset_id: int, budget_id: int, epsilon: float, delta: float,
+                 job_id: Optional[int] = None) -> PrivacyLedgerEntry:
+    """Appends a spend to the ledger in the caller's transaction, next to the budget charge it records."""
+    entry = PrivacyLedgerEntry(dataset_id=dataset_id, budget_id=budget_id, job_id=job_id,
+                               entry_type="spend", epsilon=epsilon, delta=delta)
+    db.add(entry)
+    return entry
+
+
+def record_reset(db: Session, budget: Budget) -> PrivacyLedgerEntry:
+    """Appends a reset, recording the consumed budget it clears; the spends before it stay in the ledger."""
+    entry = PrivacyLedgerEntry(dataset_id=budget.dataset_id, budget_id=budget.id, entry_type="reset",
+                               epsilon=budget.consumed_epsilon or 0.0, delta=budget.consumed_delta or 0.0)
+    db.add(entry)
+    return entry
+
+
+def window_spend(db: Session, dataset_id: int, since: datetime.datetime,
+                 until: Optional[datetime.datetime] = None) -> dict:
+    """
+    Epsilon/delta spent on a dataset in [since, until), resets notwithstanding.
+    One aggregate over an index range scan of (dataset_id, created_at).
+    """
+    query = db.query(
+        func.coalesce(func.sum(PrivacyLedgerEntry.epsilon), 0.0),
+        func.coalesce(func.sum(PrivacyLedgerEntry.delta), 0.0),
+        func.count(PrivacyLedgerEntry.id),
+    ).filter(
+        PrivacyLedgerEntry.dataset_id == dataset_id,
+        PrivacyLedgerEntry.created_at >= since,
+        PrivacyLedgerEntry.entry_type == "spend",
+    )
+    if until is not None:
+        query = query.filter(PrivacyLedgerEntry.created_at < until)
+    epsilon, delta, count = query.one()
+    return {"epsilon": float(epsilon), "delta": float(delta), "spends": int(count)}
@@ -0,0 +1,87 @@
+# new-backend/core/process_pool.py
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# "thread" runs computations in the calling worker thread, "process" ships them
+# to a pool of warm worker processes so CPU-bound work is not limited by the GIL.
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread").lower()
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _warm_worker():
+    """Initializer run once per worker process: pay the import cost before the first task."""
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import diffprivlib.mechanisms  # noqa: F401
+    import routers.job_router  # noqa: F401
+    import routers.simulation_router  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+def process_pool_enabled() -> bool:
+    return JOB_EXECUTOR == "process"
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" avoids forking a process that already runs an event loop and DB connections.
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        return _pool
+
+
+def start_process_pool():
+    """Starts every worker up front so the first requests do not pay for process start-up."""
+    if not process_pool_enabled():
+        return
+    pool = get_process_pool()
+    for future in [pool.submit(_ping) for _ in range(PROCESS_POOL_WORKERS)]:
+        future.result()
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def run_compute(fn, *args):
+    """
+    Runs a CPU-bound function and returns its result, in a worker process when the
+    process executor is enabled. `fn` must be a module-level function and its
+    arguments small and picklable: pass file paths and parameters, never DataFrames.
+    Blocks the calling thread, so call it from a threadpool, not the event loop.
+    """
+    if not process_pool_enabled():
+        return fn(*args)
+    return get_process_pool().submit(fn, *args).result()
+
+
+def map_compute(fn, arg_tuples):
+    """
+    Runs `fn(*args)` for every tuple in `arg_tuples` in parallel and returns the
+    results in order: across the process pool when it is enabled, otherwise on
+    one thread per core (numpy releases the GIL for its bulk array work).
+    """
+    arg_tuples = list(arg_tuples)
+    if process_pool_enabled():
+        pool = get_process_pool()
+        return [future.result() for future in [pool.submit(fn, *args) for args in arg_tuples]]
+    with ThreadPoolExecutor(max_workers=min(len(arg_tuples), os.cpu_count() or 1) or 1) as pool:
+        return list(pool.map(lambda args: fn(*args), arg_tuples))
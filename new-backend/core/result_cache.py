@@ -0,0 +1,83 @@
+# new-backend/core/result_cache.py
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Simulation results are kept for this many seconds, for at most this many parameter sets.
+SIMULATION_CACHE_TTL_SECONDS = float(os.getenv("SIMULATION_CACHE_TTL_SECONDS", "300"))
+SIMULATION_CACHE_MAX_ENTRIES = int(os.getenv("SIMULATION_CACHE_MAX_ENTRIES", "256"))
+
+
+class ResultCache:
+    """
+    Process-wide LRU cache of computed results with a time-to-live.
+
+    Keys are tuples whose first element is the dataset id, so every result for a
+    dataset can be dropped at once. Callers include the dataset's content version
+    in the key, which keeps a re-written file from being answered stale.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (result, time stored)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple):
+        """Returns (result, age in seconds) for a live entry, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Copies keep a caller's changes to the response out of the cache.
+            return copy.deepcopy(entry[0]), now - entry[1]
+
+    def put(self, key: tuple, result):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(result), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, dataset_id: int):
+        """Drops every cached result for a dataset, e.g. after a re-upload or delete."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dataset_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Shared by the simulation endpoints.
+simulation_cache = ResultCache(SIMULATION_CACHE_MAX_ENTRIES, SIMULATION_CACHE_TTL_SECONDS)
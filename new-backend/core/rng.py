@@ -0,0 +1,61 @@
+# new-backend/core/rng.py
+
+import os
+import secrets
+from typing import Callable, Optional
+
+import numpy as np
+
+# Seeded (reproducible) noise is meant for tests and simulations. Real releases
+# draw from the OS CSPRNG unless this is switched on explicitly.
+ALLOW_SEEDED_RELEASES = os.getenv("ALLOW_SEEDED_RELEASES", "false").lower() in ("1", "true", "yes")
+
+# Samples drawn from one stream when a large draw is split into shards. Fixed, so
+# the draws of a seed do not depend on how many workers happen to run them.
+RNG_SHARD_SIZE = int(os.getenv("RNG_SHARD_SIZE", "1000000"))
+
+
+def resolve_seed(seed: Optional[int] = None) -> int:
+    """
+    The root seed of a run: the given one, or fresh OS entropy that can be
+    reported back so the run can be replayed. Fresh seeds have 53 bits, which a
+    JSON number (a JavaScript double) carries exactly.
+    """
+    return int(seed) if seed is not None else secrets.randbits(53)
+
+
+def stream_generator(seed: int, *key: int) -> np.random.Generator:
+    """
+    Generator of one independent stream of a seeded run, e.g. one shard, sweep
+    point or batch. The same (seed, key) always yields the same draws, and
+    SeedSequence spawn keys keep the streams of different keys independent.
+    Only integers cross process boundaries, so workers rebuild their own stream.
+    """
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=tuple(key))))
+
+
+def sharded_draw(draw: Callable[[int, np.random.Generator], np.ndarray], size: int, seed: int,
+                 *key: int, first_shard: int = 0, shard_size: int = RNG_SHARD_SIZE) -> np.ndarray:
+    """
+    Draws `size` samples as consecutive shards of at most `shard_size`, shard i
+    coming from stream (seed, *key, i). `draw(n, generator)` returns n samples.
+    A long run can be drawn piecewise by starting each piece at `first_shard`;
+    pieces that are whole shards reproduce the single draw exactly.
+    """
+    shards = [
+        draw(min(shard_size, size - start), stream_generator(seed, *key, first_shard + index))
+        for index, start in enumerate(range(0, size, shard_size))
+    ]
+    return np.concatenate(shards) if shards else np.zeros(0)
+
+
+def release_generator(seed: Optional[int] = None) -> Optional[np.random.Generator]:
+    """
+    Randomness for a real release: None (the CSPRNG samplers in core.noise)
+    unless a seed is given and ALLOW_SEEDED_RELEASES is on.
+    """
+    if seed is None:
+        return None
+    if not ALLOW_SEEDED_RELEASES:
+        raise ValueError("Seeded releases are disabled; set ALLOW_SEEDED_RELEASES to reproduce job results.")
+    return stream_generator(seed)
@@ -0,0 +1,96 @@
+# new-backend/core/sqlite_pushdown.py
+
+import sqlite3
+
+import numpy as np
+
+from core.aggregates import ColumnAggregate, ColumnSummary, GroupSummary, histogram_bin_labels
+from core.streaming import quote_identifier
+
+# Histogram edges compared per table scan, well within SQLite's limits on
+# result columns and bound parameters.
+_EDGES_PER_SCAN = 500
+
+
+def summarize_sqlite_column(file_path: str, table_name: str, column: str, query_type: str, bins: int = 10) -> ColumnSummary:
+    """
+    Builds a column summary with aggregate SQL run inside the SQLite file, so only a
+    handful of scalars (or one row per histogram bin/category) reach Python.
+    Values whose storage class is not INTEGER or REAL make the column non-numeric,
+    as pandas would treat it.
+    """
+    query_type = query_type.lower()
+    col, table = quote_identifier(column), quote_identifier(table_name)
+    connection = sqlite3.connect(file_path)
+    try:
+        row_count, count, non_numeric, total, min_val, max_val = connection.execute(
+            f"SELECT COUNT(*), COUNT({col}), "
+            f"TOTAL(CASE WHEN {col} IS NOT NULL AND typeof({col}) NOT IN ('integer', 'real') THEN 1 END), "
+            f"TOTAL({col}), MIN({col}), MAX({col}) FROM {table}"
+        ).fetchone()
+
+        if non_numeric:
+            summary = ColumnSummary(count=count, is_numeric=False)
+            if query_type == 'histogram' and count:
+                rows = connection.execute(
+                    f"SELECT {col}, COUNT(*) AS n FROM {table} WHERE {col} IS NOT NULL GROUP BY {col} ORDER BY n DESC"
+                ).fetchall()
+                summary.histogram_labels = [row[0] for row in rows]
+                summary.histogram_counts = np.array([row[1] for row in rows], dtype=np.int64)
+            return summary
+
+        aggregate = ColumnAggregate(null_count=row_count - count)
+        if count:
+            aggregate = ColumnAggregate(count=count, mean=total / count, total=total, min=float(min_val),
+                                        max=float(max_val), null_count=row_count - count)
+        summary = ColumnSummary(count=count, is_numeric=True, aggregate=aggregate)
+        if not count:
+            return summary
+
+        if query_type in ('variance', 'std'):
+            # Sum of squared deviations around the mean rather than SUM(x*x) - n*mean^2,
+            # which loses all precision when the mean is large relative to the spread.
+            (aggregate.m2,) = connection.execute(
+                f"SELECT TOTAL(({col} - ?1) * ({col} - ?1)) FROM {table} WHERE {col} IS NOT NULL",
+                (aggregate.mean,)
+            ).fetchone()
+
+        elif query_type == 'histogram':
+            # Same bins as np.histogram(values, bins, range=(min, max)): bin i holds
+            # edges[i] <= x < edges[i+1], the last one x == max too. Counting the values
+            # at or above each inner edge in one scan and differencing compares against
+            # the exact edges, where arithmetic on x would round differently than numpy.
+            _, bin_edges = np.histogram([], bins=bins, range=(aggregate.min, aggregate.max))
+            inner_edges = [float(edge) for edge in bin_edges[1:-1]]
+            at_or_above = []
+            for start in range(0, len(inner_edges), _EDGES_PER_SCAN):
+                edges = inner_edges[start:start + _EDGES_PER_SCAN]
+                at_or_above.extend(connection.execute(
+                    "SELECT " + ", ".join(f"COUNT(CASE WHEN {col} >= ? THEN 1 END)" for _ in edges) + f" FROM {table}",
+                    edges
+                ).fetchone())
+            counts = -np.diff(np.array([count, *at_or_above, 0], dtype=np.int64))
+            summary.histogram_labels = histogram_bin_labels(bin_edges)
+            summary.histogram_counts = counts
+        return summary
+    finally:
+        connection.close()
+
+
+def summarize_sqlite_groups(file_path: str, table_name: str, group_column: str, value_column: str,
+                            with_sums: bool = True) -> GroupSummary:
+    """GROUP BY counts (and sums) of a value column, computed inside the SQLite file."""
+    group, value, table = quote_identifier(group_column), quote_identifier(value_column), quote_identifier(table_name)
+    connection = sqlite3.connect(file_path)
+    try:
+        rows = connection.execute(
+            f"SELECT {group}, COUNT({value}), TOTAL({value}) FROM {table} "
+            f"WHERE {group} IS NOT NULL AND {value} IS NOT NULL GROUP BY {group} ORDER BY {group}"
+        ).fetchall()
+    finally:
+        connection.close()
+    return GroupSummary(
+        labels=[row[0] for row in rows],
+        counts=np.array([row[1] for row in rows], dtype=np.int64),
+        sums=np.array([row[2] for row in rows], dtype=np.float64) if with_sums else None,
+    )
@@ -0,0 +1,78 @@
+# new-backend/core/streaming.py
+
+import os
+import sqlite3
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+# Datasets whose raw file is larger than this are aggregated chunk by chunk instead
+# of being loaded into memory. Set to 0 to stream every dataset.
+STREAMING_THRESHOLD_BYTES = int(os.getenv("STREAMING_THRESHOLD_BYTES", str(1024 * 1024 * 1024)))
+STREAMING_CHUNK_ROWS = int(os.getenv("STREAMING_CHUNK_ROWS", "250000"))
+
+
+def should_stream(file_path: str) -> bool:
+    return os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES
+
+
+def quote_identifier(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def column_exists(source_type: str, file_path: str, table_name: Optional[str], columnar_path: Optional[str],
+                  column: str) -> bool:
+    """Checks a column name against the source's header or schema without reading any rows."""
+    if columnar_path:
+        from core.columnar_store import columnar_column_names
+        return column in columnar_column_names(columnar_path)
+    if source_type == "local_database":
+        with sqlite3.connect(file_path) as connection:
+            rows = connection.execute(f"PRAGMA table_info({quote_identifier(table_name)})").fetchall()
+        return column in {row[1] for row in rows}
+    return column in pd.read_csv(file_path, nrows=0).columns
+
+
+def iter_frame_chunks(source_type: str, file_path: str, table_name: Optional[str], columnar_path: Optional[str],
+                      columns: List[str], chunk_rows: int = STREAMING_CHUNK_ROWS,
+                      text_columns: Iterable[str] = ()) -> Iterator[pd.DataFrame]:
+    """
+    Yields the given columns of a dataset in chunks of at most `chunk_rows` rows,
+    including nulls. Only one chunk is held in memory at a time. CSV types are
+    inferred per chunk, so columns known to be non-numeric should be listed in
+    `text_columns` to be read as strings in every chunk.
+    """
+    if columnar_path:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(columnar_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+
+    elif source_type == "local_database":
+        # sqlite3 steps through the result set lazily, so fetchmany acts as a server-side cursor.
+        connection = sqlite3.connect(file_path)
+        try:
+            selected = ", ".join(quote_identifier(column) for column in columns)
+            cursor = connection.execute(f"SELECT {selected} FROM {quote_identifier(table_name)}")
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                # Build through a frame so SQLite's dynamic typing is inferred like read_sql_table does.
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        finally:
+            connection.close()
+
+    else:
+        dtype = {column: str for column in text_columns} or None
+        with pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows, dtype=dtype) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+def iter_column_chunks(source_type: str, file_path: str, table_name: Optional[str], columnar_path: Optional[str],
+                       column: str, chunk_rows: int = STREAMING_CHUNK_ROWS, as_text: bool = False) -> Iterator[pd.Series]:
+    """Yields one column of a dataset in chunks; see iter_frame_chunks."""
+    text_columns = [column] if as_text else []
+    for chunk in iter_frame_chunks(source_type, file_path, table_name, columnar_path, [column], chunk_rows, text_columns):
+        yield chunk[column]
@@ -1,8 +1,15 @@
 # backend/main.py
 import os
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from core.database import engine
+from core.database import engine, SessionLocal
+from core.job_queue import job_queue
+from core.alert_outbox import alert_dispatcher
+from core.budget_reservation import job_leases, release_expired_reservations
+from core.audit_search import ensure_search_indexes
+from core.migrations import upgrade_schema
+from core.process_pool import start_process_pool, shutdown_process_pool
 from models import data_models
 from routers import dataset_router, job_router, budget_router, policy_router, dashboard_router, alert_router, audit_log_router, report_router, simulation_router, settings_router, schema_importer, template_router,schedule_router
 from routers.connectors import file_upload , local_database
@@ -10,8 +17,10 @@ from fastapi_mail import ConnectionConfig
 from dotenv import load_dotenv
 
 load_dotenv()
-# This line creates the database tables if they don't exist
-data_models.Base.metadata.create_all(bind=engine)
+# Creates missing tables and adds the columns and indexes introduced since they were created
+upgrade_schema(engine)
+# SQLite's FTS table for the audit log filters and search; PostgreSQL's indexes come with upgrade_schema
+ensure_search_indexes(engine)
 
 # Mail configuration
 
@@ -47,6 +56,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods, including POST, GET, etc.
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count-Estimate", "X-Success-Count-Estimate",
+                    "X-Failed-Count-Estimate"],  # Audit log paging headers readable by the frontend
 )
 # --- END OF FIX ---
 
@@ -69,6 +80,33 @@ app.include_router(schedule_router.router)
 
 app.state.mail_config = conf
 
+
+@app.on_event("startup")
+async def start_job_queue():
+    # Size the worker pool from the stored settings and fail the jobs of stopped processes
+    db = SessionLocal()
+    try:
+        settings = db.query(data_models.Settings).first()
+        max_workers = settings.max_concurrent_queries if settings else 10
+        release_expired_reservations(db)
+    finally:
+        db.close()
+    await job_queue.start(max_workers)
+    # Keeps this process's jobs leased and reclaims those of processes that stopped
+    await job_leases.start()
+    # Delivers alert emails queued by budget charges
+    await alert_dispatcher.start(app.state.mail_config)
+    # No-op unless JOB_EXECUTOR=process
+    await run_in_threadpool(start_process_pool)
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+    await job_leases.stop()
+    await alert_dispatcher.stop()
+    shutdown_process_pool()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Differential Privacy API"}
@@ -2,7 +2,7 @@
 
 import datetime
 import json
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, Float, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from core.database import Base # Using your existing Base
 
@@ -22,6 +22,8 @@ class Dataset(Base):
     row_count = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     privacy_unit_key = Column(String, default="user_id")
+    # Fingerprint of the source file the stored column statistics were computed from.
+    stats_fingerprint = Column(String, nullable=True)
     l0_sensitivity = Column(Integer, default=12)
     linf_sensitivity = Column(Integer, default=1)
     
@@ -51,8 +53,28 @@ class DatasetColumn(Base):
     clamp = Column(Boolean, default=True)
     is_pii = Column(Boolean, default=False)
     is_categorical = Column(Boolean, default=False)
+    # Sufficient statistics computed at ingest (numeric columns); together with
+    # min_val/max_val they answer count/sum/mean/variance/std without a scan.
+    value_count = Column(Integer, nullable=True)
+    null_count = Column(Integer, nullable=True)
+    value_sum = Column(Float, nullable=True)
+    sum_squared_deviations = Column(Float, nullable=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id")) # Changed to Integer to match the primary key
     dataset = relationship("Dataset", back_populates="columns")
+    category_counts = relationship("ColumnCategoryCount", back_populates="column", cascade="all, delete-orphan")
+
+
+class ColumnCategoryCount(Base):
+    """Value counts of a categorical column, computed at ingest."""
+    __tablename__ = "column_category_counts"
+    id = Column(Integer, primary_key=True, index=True)
+    column_id = Column(Integer, ForeignKey("columns.id"), index=True)
+    value = Column(String)
+    count = Column(Integer)
+    column = relationship("DatasetColumn", back_populates="category_counts")
+
+    # One count per value; a unique index, so upgrade_schema adds it to existing tables
+    __table_args__ = (Index('uq_column_category_counts_column_value', 'column_id', 'value', unique=True),)
 
 
 class Job(Base):
@@ -67,10 +89,24 @@ class Job(Base):
     result = Column(String, nullable=True)
     errors = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow) # Corrected to match your version
+    # The job's share of its budget's reservation while it is Queued or Running, and
+    # the process holding it until lease_expires_at; see core/budget_reservation.py
+    budget_id = Column(Integer, nullable=True)
+    reserved_epsilon = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_delta = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_epsilon_sq = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_epsilon_expm1 = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_rho = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_approx_delta = Column(Float, nullable=False, default=0.0, server_default="0")
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
     
     dataset = relationship("Dataset", back_populates="jobs")
     results = relationship("JobResult", back_populates="job") # Your original relationship
 
+    # Expired leases are looked up by (status, lease_expires_at)
+    __table_args__ = (Index('ix_jobs_status_lease_expires', 'status', 'lease_expires_at'),)
+
 
 class JobResult(Base):
     """SQLAlchemy model for the results of a DP job."""
@@ -89,11 +125,51 @@ class Budget(Base):
     dataset_id = Column(Integer, ForeignKey('datasets.id'))
     total_epsilon = Column(Float)
     total_delta = Column(Float, default=5e-5)
+    # Composition rule of the budget: "basic", "advanced" or "rdp"; see core/accountant.py
+    accountant = Column(String, nullable=False, default="basic", server_default="basic")
+    # Privacy loss composed by the accountant from the spent_* sums
     consumed_epsilon = Column(Float, default=0.0)
     consumed_delta = Column(Float, default=0.0)
+    # Sums of the costs of the jobs charged since the last reset
+    spent_epsilon = Column(Float, nullable=False, default=0.0, server_default="0")
+    spent_delta = Column(Float, nullable=False, default=0.0, server_default="0")
+    spent_epsilon_sq = Column(Float, nullable=False, default=0.0, server_default="0")
+    spent_epsilon_expm1 = Column(Float, nullable=False, default=0.0, server_default="0")
+    spent_rho = Column(Float, nullable=False, default=0.0, server_default="0")
+    spent_approx_delta = Column(Float, nullable=False, default=0.0, server_default="0")
+    # Held by jobs that are queued or running; see core/budget_reservation.py
+    reserved_epsilon = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_delta = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_epsilon_sq = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_epsilon_expm1 = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_rho = Column(Float, nullable=False, default=0.0, server_default="0")
+    reserved_approx_delta = Column(Float, nullable=False, default=0.0, server_default="0")
+    # Everything ever charged to the dataset; unlike consumed_*, never reset
+    lifetime_epsilon = Column(Float, nullable=False, default=0.0, server_default="0")
+    lifetime_delta = Column(Float, nullable=False, default=0.0, server_default="0")
     dataset = relationship("Dataset", back_populates="budget")
 
 
+class PrivacyLedgerEntry(Base):
+    """
+    Append-only history of budget changes: one row per spend or reset, never
+    updated or deleted. The ids are plain columns rather than foreign keys so the
+    history outlives deleted jobs and datasets.
+    """
+    __tablename__ = 'privacy_ledger'
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_id = Column(Integer, nullable=False)
+    budget_id = Column(Integer, nullable=True)
+    job_id = Column(Integer, nullable=True)
+    entry_type = Column(String, nullable=False) # "spend" or "reset"
+    epsilon = Column(Float, nullable=False, default=0.0) # spent, or cleared by a reset
+    delta = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    # Windowed totals are a range scan over (dataset_id, created_at)
+    __table_args__ = (Index('ix_privacy_ledger_dataset_created', 'dataset_id', 'created_at'),)
+
+
 class Policy(Base):
     """SQLAlchemy model for storing global privacy guardrails."""
     __tablename__ = "policy"
@@ -112,17 +188,52 @@ class Alert(Base):
     budget = relationship("Budget")
 
 
+class AlertOutbox(Base):
+    """
+    Budget alert emails waiting for delivery. Rows are written in the same
+    transaction as the budget charge that crossed the threshold and drained by
+    the dispatcher in core/alert_outbox.py. The email fields are stored as they
+    were at that moment, so later budget changes or a deleted alert do not
+    alter a pending message.
+    """
+    __tablename__ = 'alert_outbox'
+    id = Column(Integer, primary_key=True, index=True)
+    alert_id = Column(Integer, nullable=True)
+    budget_id = Column(Integer, nullable=True)
+    recipient_email = Column(String, nullable=False)
+    dataset_name = Column(String, nullable=False)
+    threshold = Column(Float, nullable=False)
+    spent_epsilon = Column(Float, nullable=False)
+    total_epsilon = Column(Float, nullable=False)
+    status = Column(String, nullable=False, default="pending") # pending, sending, sent or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True) # when a dispatcher last marked it sending
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    # The dispatcher polls for due rows by (status, next_attempt_at)
+    __table_args__ = (Index('ix_alert_outbox_status_next_attempt', 'status', 'next_attempt_at'),)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    timestamp = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
     user = Column(String)
     action = Column(String)
     details = Column(String)
     status = Column(String)       
     ip_address = Column(String)   
 
+    # Pages are keyset scans in (timestamp, id) order, optionally within one status
+    __table_args__ = (
+        Index('ix_audit_logs_timestamp_id', 'timestamp', 'id'),
+        Index('ix_audit_logs_status_timestamp_id', 'status', 'timestamp', 'id'),
+    )
+
 
 class Report(Base):
     __tablename__ = "reports"
@@ -1,53 +1,26 @@
 # new-backend/routers/alert_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from core.database import get_db
 from models.data_models import Alert, Budget # Import Budget to use it in the join
 from schemas.data_schemas import AlertCreate, Alert as AlertSchema
 from typing import List
-from fastapi_mail import FastMail, MessageSchema
 from models import data_models
+from core.alert_outbox import alert_dispatcher
+from core.alert_index import alert_thresholds
 
 router = APIRouter(
     prefix="/api/v1/alerts",
     tags=["alerts"],
 )
 
-async def send_alert_email(
-    request: Request,
-    recipient_email: str,
-    dataset_name: str,
-    spent_epsilon: float,
-    total_epsilon: float,
-    threshold: float
-):
-    """Sends a budget alert email."""
-    percentage_spent = (spent_epsilon / total_epsilon) * 100
-    html = f"""
-    <html>
-    <body>
-        <h2>Privacy Budget Alert for Dataset: {dataset_name}</h2>
-        <p>This is an automated alert to inform you that the privacy budget usage for the dataset <strong>{dataset_name}</strong> has exceeded the configured threshold of {threshold}%.</p>
-        <ul>
-            <li><strong>Current Epsilon Spent:</strong> {spent_epsilon:.4f}</li>
-            <li><strong>Total Epsilon Budget:</strong> {total_epsilon}</li>
-            <li><strong>Percentage Used:</strong> {percentage_spent:.2f}%</li>
-        </ul>
-        <p>Please review the recent queries on this dataset to manage the remaining budget effectively.</p>
-    </body>
-    </html>
-    """
-
-    message = MessageSchema(
-        subject=f"DP Platform Alert: Budget Threshold Exceeded for {dataset_name}",
-        recipients=[recipient_email],
-        body=html,
-        subtype="html"
-    )
-
-    fm = FastMail(request.app.state.mail_config)
-    await fm.send_message(message)
+@router.get("/outbox/stats")
+def get_alert_outbox_stats():
+    """Returns outbox sizes by status, delivery counters of the alert dispatcher and threshold index hits."""
+    stats = alert_dispatcher.stats()
+    stats["threshold_index"] = alert_thresholds.stats()
+    return stats
 
 
 @router.post("/", response_model=AlertSchema)
@@ -56,10 +29,13 @@ def create_alert(alert: AlertCreate, db: Session = Depends(get_db)):
     if not budget:
         raise HTTPException(status_code=404, detail=f"Budget for dataset_id {alert.dataset_id} not found.")
 
+    # An alert whose threshold the budget has already reached does not fire until the budget is reset
+    percentage_spent = (budget.consumed_epsilon or 0.0) / budget.total_epsilon * 100 if budget.total_epsilon else 0.0
     db_alert = Alert(
         budget_id=budget.id,
         threshold=alert.threshold,
-        email=alert.email
+        email=alert.email,
+        triggered=alert.threshold <= percentage_spent
     )
     db.add(db_alert)
     log_entry = data_models.AuditLog(
@@ -71,6 +47,7 @@ def create_alert(alert: AlertCreate, db: Session = Depends(get_db)):
     )
     db.add(log_entry)
     db.commit()
+    alert_thresholds.invalidate(budget.id)
     db.refresh(db_alert)
     return db_alert
 
@@ -88,6 +65,8 @@ def delete_alert(alert_id: int, db: Session = Depends(get_db)):
     db_alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if db_alert is None:
         raise HTTPException(status_code=404, detail="Alert not found")
+    budget_id = db_alert.budget_id
     db.delete(db_alert)
     db.commit()
+    alert_thresholds.invalidate(budget_id)
     return None
\ No newline at end of file
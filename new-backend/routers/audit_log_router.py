@@ -2,7 +2,8 @@
 
 import os
 import re
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, datetime
@@ -16,11 +17,21 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 from core.database import get_db
+from core.pagination import encode_cursor, decode_cursor, estimate_count
+from core.audit_search import search_audit_logs, substring_filter
 from models import data_models
 from schemas import data_schemas
 
 router = APIRouter()
 
+# Rows per page of GET /audit-logs when no limit is given, and the most a client may ask for
+AUDIT_LOG_PAGE_SIZE = int(os.getenv("AUDIT_LOG_PAGE_SIZE", "100"))
+AUDIT_LOG_MAX_PAGE_SIZE = int(os.getenv("AUDIT_LOG_MAX_PAGE_SIZE", "1000"))
+# Results of GET /audit-logs/search when no limit is given
+AUDIT_LOG_SEARCH_LIMIT = int(os.getenv("AUDIT_LOG_SEARCH_LIMIT", "50"))
+# Statuses audit entries are logged with
+AUDIT_STATUSES = ("SUCCESS", "FAILED")
+
 # --- Professional PDF Generation Class ---
 class PDF(FPDF):
     def header(self):
@@ -129,20 +140,77 @@ def create_bar_chart(data, title):
     buf.seek(0)
     return buf
 
-# --- Endpoints ---
-@router.get("/audit-logs", response_model=List[data_schemas.AuditLog])
-def get_audit_logs(db: Session = Depends(get_db), start_date: Optional[date] = None, end_date: Optional[date] = None, user: Optional[str] = None, action: Optional[str] = None, status: Optional[str] = None):
+# --- Query Helpers ---
+def audit_log_query(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None, user: Optional[str] = None, action: Optional[str] = None, status: Optional[str] = None, details: Optional[str] = None):
+    """
+    Audit logs matching the filters, unordered. All text filters are case-insensitive
+    substring matches: user, action and details are served by the indexes of
+    core/audit_search.py, and a full status (SUCCESS/FAILED), which contains no
+    other status, is matched exactly on the (status, timestamp, id) index.
+    """
     query = db.query(data_models.AuditLog)
     if start_date: query = query.filter(data_models.AuditLog.timestamp >= start_date)
     if end_date: query = query.filter(data_models.AuditLog.timestamp < datetime.combine(end_date, datetime.max.time()))
-    if user: query = query.filter(data_models.AuditLog.user.ilike(f"%{user}%"))
-    if action: query = query.filter(data_models.AuditLog.action.ilike(f"%{action}%"))
-    if status: query = query.filter(data_models.AuditLog.status.ilike(f"%{status}%"))
-    return query.order_by(data_models.AuditLog.timestamp.desc()).all()
+    if user: query = query.filter(substring_filter(db, "user", user))
+    if action: query = query.filter(substring_filter(db, "action", action))
+    if details: query = query.filter(substring_filter(db, "details", details))
+    if status:
+        if status.upper() in AUDIT_STATUSES:
+            query = query.filter(data_models.AuditLog.status == status.upper())
+        else:
+            query = query.filter(data_models.AuditLog.status.ilike(f"%{status}%"))
+    return query
+
+def newest_first(query):
+    return query.order_by(data_models.AuditLog.timestamp.desc(), data_models.AuditLog.id.desc())
+
+# --- Endpoints ---
+@router.get("/audit-logs", response_model=List[data_schemas.AuditLog])
+def get_audit_logs(response: Response, db: Session = Depends(get_db), start_date: Optional[date] = None, end_date: Optional[date] = None, user: Optional[str] = None, action: Optional[str] = None, status: Optional[str] = None,
+                   details: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None, include_total: bool = False):
+    """
+    One page of audit logs, newest first. Pages are keyset-paginated on
+    (timestamp, id): pass the X-Next-Cursor header of a page as `cursor` to get
+    the next one; the header is absent on the last page. With include_total the
+    X-Total-Count-Estimate, X-Success-Count-Estimate and X-Failed-Count-Estimate
+    headers carry the number of matching rows, in all and by status, estimated
+    from planner statistics on PostgreSQL rather than counted.
+    """
+    limit = max(1, min(limit or AUDIT_LOG_PAGE_SIZE, AUDIT_LOG_MAX_PAGE_SIZE))
+    query = audit_log_query(db, start_date, end_date, user, action, status, details)
+    if include_total:
+        response.headers["X-Total-Count-Estimate"] = str(estimate_count(db, query))
+        for status_value, header in (("SUCCESS", "X-Success-Count-Estimate"), ("FAILED", "X-Failed-Count-Estimate")):
+            response.headers[header] = str(estimate_count(db, query.filter(data_models.AuditLog.status == status_value)))
+
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(tuple_(data_models.AuditLog.timestamp, data_models.AuditLog.id) < after)
+
+    # One extra row tells whether another page follows
+    logs = newest_first(query).limit(limit + 1).all()
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].timestamp, logs[-1].id)
+    return logs
+
+@router.get("/audit-logs/search", response_model=List[data_schemas.AuditLogSearchResult])
+def search_logs(q: str = Query(..., min_length=1), limit: Optional[int] = None, db: Session = Depends(get_db)):
+    """Audit logs whose user, action or details contain `q`, most relevant first."""
+    limit = max(1, min(limit or AUDIT_LOG_SEARCH_LIMIT, AUDIT_LOG_MAX_PAGE_SIZE))
+    results = []
+    for log, score in search_audit_logs(db, q, limit):
+        result = data_schemas.AuditLogSearchResult.model_validate(log)
+        result.score = score
+        results.append(result)
+    return results
 
 @router.get("/audit-logs/report", response_class=StreamingResponse)
-def generate_audit_report(db: Session = Depends(get_db), start_date: Optional[date] = None, end_date: Optional[date] = None, user: Optional[str] = None, action: Optional[str] = None, status: Optional[str] = None):
-    logs = get_audit_logs(db, start_date, end_date, user, action, status)
+def generate_audit_report(db: Session = Depends(get_db), start_date: Optional[date] = None, end_date: Optional[date] = None, user: Optional[str] = None, action: Optional[str] = None, status: Optional[str] = None, details: Optional[str] = None):
+    logs = newest_first(audit_log_query(db, start_date, end_date, user, action, status, details)).all()
     if not logs:
         raise HTTPException(status_code=404, detail="No audit logs found for the selected criteria.")
 
@@ -1,20 +1,44 @@
 # new-backend/routers/budget_router.py
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
+import datetime
 
+from core.accountant import ACCOUNTANTS
+from core.alert_index import alert_thresholds, sync_alert_triggers
+from core.budget_reservation import refresh_consumed, reset_spent
 from core.database import get_db
+from core.privacy_ledger import record_reset, window_spend
 from schemas import data_schemas
 from models import data_models
 
 router = APIRouter()
 
 
+# Columns of the Budget schema, selected directly so listing budgets builds no ORM objects.
+BUDGET_COLUMNS = [getattr(data_models.Budget, name) for name in data_schemas.Budget.model_fields]
+
+
+def _check_accountant(accountant: str):
+    if accountant not in ACCOUNTANTS:
+        raise HTTPException(status_code=400, detail=f"Accountant '{accountant}' not supported; use one of {', '.join(ACCOUNTANTS)}.")
+
+
+def _locked_budget(db: Session, budget_id: int):
+    """
+    Loads a budget for a read-modify-write of its totals or spent sums. FOR UPDATE
+    holds off reservations and charges until the caller commits, so consumed
+    budget is recomputed from spent sums no concurrent job has changed since.
+    """
+    return db.query(data_models.Budget).with_for_update().populate_existing() \
+        .filter(data_models.Budget.id == budget_id).first()
+
+
 @router.get("/api/budgets", response_model=List[data_schemas.Budget])
 def get_budgets(db: Session = Depends(get_db)):
-    budgets = db.query(data_models.Budget).all()
-    return budgets
+    return [row._asdict() for row in db.query(*BUDGET_COLUMNS).order_by(data_models.Budget.id)]
 
 
 @router.post("/api/budgets", response_model=data_schemas.Budget, status_code=201)
@@ -22,10 +46,12 @@ def create_budget(budget_data: data_schemas.BudgetCreate, db: Session = Depends(
     existing_budget = db.query(data_models.Budget).filter(data_models.Budget.dataset_id == budget_data.dataset_id).first()
     if existing_budget:
         raise HTTPException(status_code=400, detail="Budget for this dataset already exists")
+    _check_accountant(budget_data.accountant)
 
     new_budget = data_models.Budget(
         dataset_id=budget_data.dataset_id,
         total_epsilon=budget_data.total_epsilon,
+        accountant=budget_data.accountant,
         consumed_epsilon=0.0
     )
     # Add an audit log entry
@@ -45,13 +71,17 @@ def create_budget(budget_data: data_schemas.BudgetCreate, db: Session = Depends(
 
 @router.put("/api/budgets/{budget_id}", response_model=data_schemas.Budget)
 def update_budget(budget_id: int, budget_data: data_schemas.BudgetUpdate, db: Session = Depends(get_db)):
-    budget = db.query(data_models.Budget).filter(data_models.Budget.id == budget_id).first()
+    budget = _locked_budget(db, budget_id)
     if not budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     
     # Update fields from the request
     budget.total_epsilon += budget_data.epsilon_to_add
     budget.total_delta += budget_data.delta_to_add
+    # The advanced and RDP bounds depend on total_delta
+    refresh_consumed(budget)
+    # Alerts above the new usage percentage fire again
+    sync_alert_triggers(db, budget.id, budget.consumed_epsilon, budget.total_epsilon)
 
     log_entry = data_models.AuditLog(
         user="system",
@@ -64,19 +94,54 @@ def update_budget(budget_id: int, budget_data: data_schemas.BudgetUpdate, db: Se
 
     
     db.commit()
+    alert_thresholds.invalidate(budget.id)
+    db.refresh(budget)
+    return budget
+
+
+@router.put("/api/budgets/{budget_id}/accountant", response_model=data_schemas.Budget)
+def update_budget_accountant(budget_id: int, budget_data: data_schemas.BudgetAccountantUpdate, db: Session = Depends(get_db)):
+    """
+    Switches how the budget composes its jobs' privacy loss. The consumed budget
+    is recomputed from the jobs already charged, so no spend is lost or counted twice.
+    """
+    budget = _locked_budget(db, budget_id)
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    _check_accountant(budget_data.accountant)
+
+    previous = budget.accountant
+    budget.accountant = budget_data.accountant
+    refresh_consumed(budget)
+    sync_alert_triggers(db, budget.id, budget.consumed_epsilon, budget.total_epsilon)
+
+    log_entry = data_models.AuditLog(
+        user="system",
+        action="BUDGET_ACCOUNTANT_CHANGED",
+        details=f"Accountant for dataset ID {budget.dataset_id} changed from '{previous}' to '{budget.accountant}'.",
+        status="SUCCESS",
+        ip_address="127.0.0.1"
+    )
+    db.add(log_entry)
+    db.commit()
+    alert_thresholds.invalidate(budget.id)
     db.refresh(budget)
     return budget
 
 
 @router.post("/api/budgets/{budget_id}/reset", response_model=data_schemas.Budget)
 def reset_budget(budget_id: int, db: Session = Depends(get_db)):
-    budget = db.query(data_models.Budget).filter(data_models.Budget.id == budget_id).first()
+    budget = _locked_budget(db, budget_id)
     if not budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    # Reset consumed values to zero
-    budget.consumed_epsilon = 0.0
-    budget.consumed_delta = 0.0 # <-- Also reset delta
+    # The ledger keeps what is cleared here, so the spends before the reset stay on record
+    record_reset(db, budget)
+
+    # Reset consumed values, and the job costs they are composed from, to zero
+    reset_spent(budget)
+    # ...and re-arm the budget's alerts
+    sync_alert_triggers(db, budget.id, 0.0, budget.total_epsilon)
 
     log_entry = data_models.AuditLog(
         user="system",
@@ -87,36 +152,54 @@ def reset_budget(budget_id: int, db: Session = Depends(get_db)):
     )
     db.add(log_entry)
     db.commit()
+    alert_thresholds.invalidate(budget.id)
     db.refresh(budget)
     return budget
 
 
 @router.get("/api/privacy_budget", response_model=data_schemas.PrivacyBudget)
 def get_privacy_budget(db: Session = Depends(get_db)):
-    all_budgets = db.query(data_models.Budget).all()
-
-    # Epsilon calculations
-    total_budget = sum(b.total_epsilon for b in all_budgets)
-    used_budget = sum(b.consumed_epsilon for b in all_budgets)
+    """
+    Platform-wide budget totals plus one entry per dataset budget, with epsilon and
+    delta used as composed by each budget's accountant: one aggregate
+    query and one joined projection of budget fields and dataset name, without
+    loading Budget/Dataset objects.
+    """
+    Budget, Dataset = data_models.Budget, data_models.Dataset
+
+    # Epsilon and delta totals, summed by the database (SUM skips NULL deltas)
+    total_budget, used_budget, total_delta, used_delta = db.query(
+        func.coalesce(func.sum(Budget.total_epsilon), 0.0),
+        func.coalesce(func.sum(Budget.consumed_epsilon), 0.0),
+        func.coalesce(func.sum(Budget.total_delta), 0.0),
+        func.coalesce(func.sum(Budget.consumed_delta), 0.0),
+    ).one()
 
     remaining_budget = total_budget - used_budget
     percentage_used = (used_budget / total_budget * 100) if total_budget > 0 else 0
-
-    # --- NEW: Delta calculations ---
-    total_delta = sum(b.total_delta for b in all_budgets if b.total_delta)
-    used_delta = sum(b.consumed_delta for b in all_budgets if b.consumed_delta)
     remaining_delta = total_delta - used_delta
     percentage_used_delta = (used_delta / total_delta * 100) if total_delta > 0 else 0
 
+    rows = db.query(
+        Budget.id,
+        func.coalesce(Dataset.name, "Unknown"),
+        Budget.consumed_epsilon,
+        func.coalesce(Budget.consumed_delta, 0.0),
+        Budget.total_epsilon,
+        Budget.total_delta,
+        Budget.accountant,
+    ).outerjoin(Dataset, Dataset.id == Budget.dataset_id).order_by(Budget.id)
+
     dataset_budgets = [
         data_schemas.DatasetBudget(
-            id=b.id,
-            name=b.dataset.name if b.dataset else "Unknown",
-            budget_used=b.consumed_epsilon,
-            delta_used=b.consumed_delta, 
-            total_epsilon=b.total_epsilon, 
-            total_delta=b.total_delta      
-        ) for b in all_budgets
+            id=budget_id,
+            name=name,
+            budget_used=budget_used,
+            delta_used=delta_used,
+            total_epsilon=total_epsilon,
+            total_delta=total_delta_row,
+            accountant=accountant
+        ) for budget_id, name, budget_used, delta_used, total_epsilon, total_delta_row, accountant in rows
     ]
 
     return data_schemas.PrivacyBudget(
@@ -129,4 +212,36 @@ def get_privacy_budget(db: Session = Depends(get_db)):
         remaining_delta=round(remaining_delta, 6),
         percentage_used_delta=round(percentage_used_delta, 2),
         datasets=dataset_budgets
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/api/budgets/{budget_id}/window", response_model=data_schemas.BudgetWindow)
+def get_budget_window(budget_id: int, days: float = 30, db: Session = Depends(get_db)):
+    """
+    Epsilon/delta spent on the budget's dataset over the last `days` days (a
+    rolling window), from the privacy ledger. Budget resets do not erase spends.
+    """
+    budget = db.query(data_models.Budget).filter(data_models.Budget.id == budget_id).first()
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="days must be positive.")
+
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    spent = window_spend(db, budget.dataset_id, since)
+    return data_schemas.BudgetWindow(
+        budget_id=budget.id, dataset_id=budget.dataset_id, days=days, since=since,
+        epsilon_spent=spent["epsilon"], delta_spent=spent["delta"], spends=spent["spends"]
+    )
+
+
+@router.get("/api/budgets/{budget_id}/ledger", response_model=List[data_schemas.PrivacyLedgerEntry])
+def get_budget_ledger(budget_id: int, limit: int = 100, db: Session = Depends(get_db)):
+    """The most recent privacy ledger entries (spends and resets) of the budget's dataset."""
+    budget = db.query(data_models.Budget).filter(data_models.Budget.id == budget_id).first()
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return db.query(data_models.PrivacyLedgerEntry) \
+        .filter(data_models.PrivacyLedgerEntry.dataset_id == budget.dataset_id) \
+        .order_by(data_models.PrivacyLedgerEntry.created_at.desc(), data_models.PrivacyLedgerEntry.id.desc()) \
+        .limit(max(1, min(limit, 1000))).all()
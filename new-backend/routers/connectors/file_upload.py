@@ -5,6 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
 from sqlalchemy.orm import Session
 
 from core.database import get_db
+from core.dataset_cache import dataset_cache
+from core.result_cache import simulation_cache
+from core.columnar_store import write_columnar_copy
+from core.column_stats import series_stats, apply_column_stats, content_fingerprint
 from models import data_models
 from schemas import data_schemas
 
@@ -27,6 +31,7 @@ def upload_file(
     existing_dataset = db.query(data_models.Dataset).filter(data_models.Dataset.name == dataset_name).first()
 
     file_path = ""
+    columnar_path = None
     try:
         file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
         with open(file_path, "wb") as buffer:
@@ -34,6 +39,12 @@ def upload_file(
 
         df = pd.read_csv(file_path)
 
+        # Keep a Parquet copy beside the CSV so jobs can read single columns.
+        connection_details = {"path": os.path.abspath(file_path)}
+        columnar_path = write_columnar_copy(df, file_path)
+        if columnar_path:
+            connection_details["columnar_path"] = columnar_path
+
         if existing_dataset:
             # If it's a schema-only import, update it.
             if existing_dataset.status == "Schema Imported (No Data)":
@@ -49,13 +60,18 @@ def upload_file(
                 # Update the existing dataset
                 existing_dataset.description = f"Uploaded CSV file: {file.filename}"
                 existing_dataset.source_type = "file_upload"
-                existing_dataset.connection_details = {"path": os.path.abspath(file_path)}
+                existing_dataset.connection_details = connection_details
                 existing_dataset.total_records = len(df)
                 existing_dataset.row_count = len(df)
+                for db_column in existing_dataset.columns:
+                    apply_column_stats(db_column, series_stats(df[db_column.name]))
+                existing_dataset.stats_fingerprint = content_fingerprint(file_path)
                 existing_dataset.status = "Available" # Update status
 
                 
                 db.commit()
+                dataset_cache.invalidate(existing_dataset.id)
+                simulation_cache.invalidate(existing_dataset.id)
                 db.refresh(existing_dataset)
                 return existing_dataset
             else:
@@ -67,7 +83,7 @@ def upload_file(
             name=dataset_name,
             description=f"Uploaded CSV file: {file.filename}",
             source_type="file_upload",
-            connection_details={"path": os.path.abspath(file_path)},
+            connection_details=connection_details,
             total_records=len(df),
             row_count=len(df)
         )
@@ -87,8 +103,11 @@ def upload_file(
                 max_val=float(column_data.max()) if is_numeric and not column_data.empty else None,
                 is_pii='id' in col_name.lower() or 'email' in col_name.lower()
             )
+            apply_column_stats(db_column, series_stats(df[col_name]))
             db.add(db_column)
         
+        new_dataset.stats_fingerprint = content_fingerprint(file_path)
+
         settings = db.query(data_models.Settings).first()
         default_epsilon = settings.global_epsilon if settings else 10.0
 
@@ -110,6 +129,8 @@ def upload_file(
     except Exception as e:
         if os.path.exists(file_path):
             os.remove(file_path)
+        if columnar_path and os.path.exists(columnar_path):
+            os.remove(columnar_path)
         # Re-raise HTTPException to show the user, otherwise raise a generic 500
         if isinstance(e, HTTPException):
             raise e
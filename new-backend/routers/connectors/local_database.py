@@ -6,6 +6,10 @@ from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import Session
 
 from core.database import get_db
+from core.dataset_cache import dataset_cache
+from core.result_cache import simulation_cache
+from core.columnar_store import write_columnar_copy
+from core.column_stats import series_stats, apply_column_stats, content_fingerprint
 from models import data_models
 from schemas import data_schemas
 
@@ -28,6 +32,7 @@ def upload_database_file(
 
     file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
     temp_engine = None
+    columnar_path = None
 
     try:
         with open(file_path, "wb") as buffer:
@@ -43,6 +48,12 @@ def upload_database_file(
         table_to_read = table_names[0]
         df = pd.read_sql_table(table_to_read, temp_engine)
 
+        # Keep a Parquet copy of the table so jobs can read single columns.
+        connection_details = {"path": os.path.abspath(file_path), "table": table_to_read}
+        columnar_path = write_columnar_copy(df, file_path, table_to_read)
+        if columnar_path:
+            connection_details["columnar_path"] = columnar_path
+
         if existing_dataset:
             if existing_dataset.status == "Schema Imported (No Data)":
                 schema_columns = {col.name for col in existing_dataset.columns}
@@ -55,12 +66,17 @@ def upload_database_file(
 
                 existing_dataset.description = f"Uploaded DB: {file.filename}, Table: {table_to_read}"
                 existing_dataset.source_type = "local_database"
-                existing_dataset.connection_details = {"path": os.path.abspath(file_path), "table": table_to_read}
+                existing_dataset.connection_details = connection_details
                 existing_dataset.total_records = len(df)
                 existing_dataset.row_count = len(df)
+                for db_column in existing_dataset.columns:
+                    apply_column_stats(db_column, series_stats(df[db_column.name]))
+                existing_dataset.stats_fingerprint = content_fingerprint(file_path, table_to_read)
                 existing_dataset.status = "Available"
                 
                 db.commit()
+                dataset_cache.invalidate(existing_dataset.id)
+                simulation_cache.invalidate(existing_dataset.id)
                 db.refresh(existing_dataset)
                 return existing_dataset
             else:
@@ -70,7 +86,7 @@ def upload_database_file(
             name=dataset_name,
             description=f"Uploaded DB: {file.filename}, Table: {table_to_read}",
             source_type="local_database",
-            connection_details={"path": os.path.abspath(file_path), "table": table_to_read},
+            connection_details=connection_details,
             total_records=len(df),
             row_count=len(df)
         )
@@ -92,8 +108,11 @@ def upload_database_file(
                 clamp=is_numeric,
                 is_categorical=column_data.nunique() < 50
             )
+            apply_column_stats(db_column, series_stats(df[col_name]))
             db.add(db_column)
         
+        new_dataset.stats_fingerprint = content_fingerprint(file_path, table_to_read)
+
         settings = db.query(data_models.Settings).first()
         default_epsilon = settings.global_epsilon if settings else 10.0
 
@@ -117,6 +136,8 @@ def upload_database_file(
     except Exception as e:
         if os.path.exists(file_path):
             os.remove(file_path)
+        if columnar_path and os.path.exists(columnar_path):
+            os.remove(columnar_path)
         if isinstance(e, HTTPException):
             raise e
         raise HTTPException(status_code=500, detail=f"Failed to process database file: {str(e)}")
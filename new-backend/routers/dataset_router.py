@@ -2,9 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 from core.database import get_db
+from core.dataset_cache import dataset_cache
+from core.result_cache import simulation_cache
+from core.alert_index import alert_thresholds
 from schemas import data_schemas
 from models import data_models
-from routers.job_router import get_dataframe_from_source
+from routers.job_router import get_preview_from_source
 
 import pandas as pd
 
@@ -50,10 +53,22 @@ def delete_dataset(dataset_id: int, db: Session = Depends(get_db)):
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
     
+    budget_id = dataset.budget.id if dataset.budget else None
     db.delete(dataset)
     db.commit()
+    dataset_cache.invalidate(dataset_id)
+    simulation_cache.invalidate(dataset_id)
+    if budget_id is not None:
+        alert_thresholds.invalidate(budget_id)
     return None
 
+
+@router.get("/api/datasets/cache/stats")
+def get_dataset_cache_stats():
+    """Returns hit/miss counters and memory usage of the in-process dataset cache."""
+    return dataset_cache.stats()
+
+
 @router.get("/api/datasets/{dataset_id}/preview")
 def get_dataset_preview(dataset_id: int, db: Session = Depends(get_db)):
     """
@@ -83,7 +98,7 @@ def get_dataset_preview(dataset_id: int, db: Session = Depends(get_db)):
     # --- END OF FIX ---
 
     try:
-        df = get_dataframe_from_source(dataset)
+        df = get_preview_from_source(dataset, n=10)
         # Replace NaN, inf, -inf with None for JSON serialization
         df = df.replace([float('inf'), float('-inf')], pd.NA)
         df = df.where(pd.notnull(df), pd.NA)
@@ -1,143 +1,229 @@
 import os
 import json
+from collections import defaultdict
+from types import SimpleNamespace
 import pandas as pd
 import numpy as np
 import diffprivlib.mechanisms as dp_mech
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from typing import List
+from sqlalchemy import create_engine, inspect, select, MetaData, Table
+from typing import List, Optional
 
 # Core application imports
-from core.database import get_db
+from core.database import get_db, SessionLocal
+from core.dataset_cache import dataset_cache, source_fingerprint
+from core.columnar_store import read_columnar, read_columnar_head
+from core.job_queue import job_queue
+from core.process_pool import run_compute
+from core.noise import randomise_array, select_released_bins, partition_threshold
+from core.rng import ALLOW_SEEDED_RELEASES, release_generator
+from core.accountant import PrivacyCost, job_privacy_cost
+from core.budget_reservation import reserve_for_jobs, start_job, convert_job_reservation, release_job_reservation
+from core.privacy_ledger import record_spend
+from core.alert_outbox import enqueue_threshold_alerts, alert_dispatcher
+from core.aggregates import (
+    ColumnSummary, GroupSummary, summarize_series, stream_column_summary, summarize_groups, stream_group_summary
+)
+from core.streaming import should_stream, column_exists, iter_column_chunks, iter_frame_chunks
+from core.sqlite_pushdown import summarize_sqlite_column, summarize_sqlite_groups
+from core.column_stats import (
+    content_fingerprint, series_stats, stats_from_summary, column_stats_from_model,
+    apply_column_stats, summary_from_stats
+)
 from schemas import data_schemas
 from models import data_models
 
-# Import the email sending utility from the alert router
-from .alert_router import send_alert_email
-from models.data_models import Budget
-
 
 router = APIRouter()
 
 
 # --- HELPER FUNCTIONS FOR DATA LOADING AND DP CALCULATIONS ---
 
-def get_dataframe_from_source(dataset: data_models.Dataset) -> pd.DataFrame:
+def resolve_source(dataset: data_models.Dataset):
     """
-    Correctly reads the dataset's source_type and uses the right
-    method to load the data into a pandas DataFrame.
+    Validates the dataset's connection details and returns
+    (source_type, file_path, table_name, columnar_path).
     """
     source_type = dataset.source_type
     conn_details = dataset.connection_details
+    table_name = None
+
+    if source_type == "file_upload" or source_type == "csv":
+        file_path = conn_details.get("path") or conn_details.get("filepath")
+        if not file_path or not os.path.exists(file_path):
+            raise FileNotFoundError(f"Data file not found at path: {file_path}")
+
+    elif source_type == "local_database":
+        file_path = conn_details.get("path") or conn_details.get("db_path")
+        table_name = conn_details.get("table") or conn_details.get("table_name")
+        if not file_path or not os.path.exists(file_path):
+            raise FileNotFoundError(f"Database file not found at path: {file_path}")
+        if not table_name:
+            raise ValueError("Table name not found in connection details for database.")
+
+    else:
+        raise NotImplementedError(f"Data source type '{source_type}' is not supported.")
 
+    # Only trust the Parquet copy while it is at least as new as the raw upload.
+    columnar_path = conn_details.get("columnar_path")
+    if columnar_path and (not os.path.exists(columnar_path) or
+                          os.path.getmtime(columnar_path) < os.path.getmtime(file_path)):
+        columnar_path = None
+
+    return source_type, file_path, table_name, columnar_path
+
+
+def _read_sqlite_table(file_path: str, table_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    engine = create_engine(f"sqlite:///{file_path}")
     try:
-        if source_type == "file_upload" or source_type == "csv":
-            file_path = conn_details.get("path")
-            if not file_path or not os.path.exists(file_path):
-                raise FileNotFoundError(f"Data file not found at path: {file_path}")
-            return pd.read_csv(file_path)
-
-        elif source_type == "local_database":
-            file_path = conn_details.get("path")
-            table_name = conn_details.get("table")
-            if not file_path or not os.path.exists(file_path):
-                raise FileNotFoundError(f"Database file not found at path: {file_path}")
-            if not table_name:
-                raise ValueError("Table name not found in connection details for database.")
-            
-            engine = create_engine(f"sqlite:///{file_path}")
-            with engine.connect() as connection:
-                return pd.read_sql_table(table_name, connection)
-        
-        else:
-            raise NotImplementedError(f"Data source type '{source_type}' is not supported.")
+        with engine.connect() as connection:
+            if columns is not None:
+                available = {c["name"] for c in inspect(connection).get_columns(table_name)}
+                columns = [c for c in columns if c in available]
+            return pd.read_sql_table(table_name, connection, columns=columns)
+    finally:
+        engine.dispose()
+
+
+def get_dataframe_from_source(dataset: data_models.Dataset, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Correctly reads the dataset's source_type and uses the right
+    method to load the data into a pandas DataFrame.
+
+    When `columns` is given only those columns are read (unknown names are
+    skipped), preferably from the Parquet copy written at ingest. Loaded frames
+    are served from the shared dataset cache while the source file is unchanged,
+    so callers must not modify the returned DataFrame in place.
+    """
+    try:
+        source_type, file_path, table_name, columnar_path = resolve_source(dataset)
+        variant = tuple(sorted(set(columns))) if columns is not None else None
+
+        if columnar_path:
+            return dataset_cache.get_or_load(
+                dataset.id, source_fingerprint(columnar_path),
+                lambda: read_columnar(columnar_path, columns), variant
+            )
+
+        if source_type == "local_database":
+            return dataset_cache.get_or_load(
+                dataset.id, source_fingerprint(file_path) + (table_name,),
+                lambda: _read_sqlite_table(file_path, table_name, columns), variant
+            )
+
+        usecols = (lambda c: c in variant) if variant is not None else None
+        return dataset_cache.get_or_load(
+            dataset.id, source_fingerprint(file_path),
+            lambda: pd.read_csv(file_path, usecols=usecols), variant
+        )
 
     except Exception as e:
         # Re-raise the exception to be handled by the main job logic
         raise e
 
 
-def run_dp_calculation(query_type: str, mechanism: str, data: pd.Series, epsilon: float, delta: float):
-    """Performs the differential privacy calculation."""
-    if data.empty:
-        return {"private_value": 0, "actual_value": 0}
+def get_preview_from_source(dataset: data_models.Dataset, n: int = 10) -> pd.DataFrame:
+    """Reads only the first `n` rows of a dataset, bypassing the cache."""
+    source_type, file_path, table_name, columnar_path = resolve_source(dataset)
+    if columnar_path:
+        return read_columnar_head(columnar_path, n)
+    if source_type == "local_database":
+        engine = create_engine(f"sqlite:///{file_path}")
+        try:
+            with engine.connect() as connection:
+                table = Table(table_name, MetaData(), autoload_with=connection)
+                return pd.read_sql_query(select(table).limit(n), connection)
+        finally:
+            engine.dispose()
+    return pd.read_csv(file_path, nrows=n)
 
-    actual_value = 0
-    private_value = 0
-    sensitivity = 1.0 # Default sensitivity for count
 
-    # Determine sensitivity based on query type and data range
-    if query_type.lower() in ['sum', 'mean', 'std']:
-        min_val = data.min()
-        max_val = data.max()
-        if pd.isna(min_val) or pd.isna(max_val):
-             raise ValueError("Min/max values for sensitivity calculation are null.")
-        sensitivity = float(max_val - min_val)
-    elif query_type.lower() == 'variance':
-        min_val = data.min()
-        max_val = data.max()
-        if pd.isna(min_val) or pd.isna(max_val):
-            raise ValueError("Min/max values for sensitivity calculation are null.")
-        sensitivity = float((max_val - min_val) ** 2)
-
-    # Select the correct DP mechanism
+def _build_mechanism(mechanism: str, epsilon: float, delta: float, sensitivity: float):
+    """Selects the correct DP mechanism for the requested noise type."""
     if mechanism.lower() == 'laplace':
-        dp_mechanism = dp_mech.Laplace(epsilon=epsilon, sensitivity=sensitivity)
+        return dp_mech.Laplace(epsilon=epsilon, sensitivity=sensitivity)
     elif mechanism.lower() == 'gaussian':
         if not delta or delta <= 0:
             raise ValueError("Gaussian mechanism requires a non-zero delta.")
-        
+
         if epsilon > 1:
             # Use GaussianAnalytic for epsilons > 1
-            dp_mechanism = dp_mech.GaussianAnalytic(epsilon=epsilon, delta=delta, sensitivity=sensitivity)
+            return dp_mech.GaussianAnalytic(epsilon=epsilon, delta=delta, sensitivity=sensitivity)
         else:
             # Use the standard Gaussian for epsilons <= 1
-            dp_mechanism = dp_mech.Gaussian(epsilon=epsilon, delta=delta, sensitivity=sensitivity)
+            return dp_mech.Gaussian(epsilon=epsilon, delta=delta, sensitivity=sensitivity)
     else:
         raise HTTPException(status_code=400, detail=f"Mechanism '{mechanism}' not supported.")
 
+
+def _randomise(mechanism, value: float, rng: Optional[np.random.Generator]) -> float:
+    """mechanism.randomise(value), or a draw from the same distribution on `rng` for a seeded release."""
+    if rng is None:
+        return mechanism.randomise(value)
+    return float(randomise_array([value], mechanism, rng)[0])
+
+
+def release_from_summary(query_type: str, mechanism: str, summary: ColumnSummary, epsilon: float, delta: float,
+                         threshold: Optional[float] = None, top_k: Optional[int] = None,
+                         rng: Optional[np.random.Generator] = None):
+    """
+    Adds DP noise to the statistic a query asks for, given the column's summary.
+    The summary may come from an in-memory column or from a chunked scan; the
+    released values do not depend on how it was computed. Noise comes from the
+    CSPRNG unless a seeded `rng` is given (see core.rng.release_generator).
+    """
+    if summary.count == 0:
+        return {"private_value": 0, "actual_value": 0}
+
+    if top_k is not None and top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1.")
+
+    query_type = query_type.lower()
+    aggregate = summary.aggregate
+    sensitivity = 1.0 # Default sensitivity for count
+
+    # Determine sensitivity based on query type and data range
+    if query_type in ['sum', 'mean', 'std', 'variance']:
+        if aggregate is None or aggregate.min is None or aggregate.max is None:
+            raise ValueError("Min/max values for sensitivity calculation are null.")
+        sensitivity = float(aggregate.max - aggregate.min)
+        if query_type == 'variance':
+            sensitivity = sensitivity ** 2
+
+    dp_mechanism = _build_mechanism(mechanism, epsilon, delta, sensitivity)
+
     # Perform the calculation
-    if query_type.lower() == 'count':
-        actual_value = float(len(data))
+    if query_type == 'count':
+        actual_value = float(summary.count)
         # Sensitivity for count is always 1, regardless of data range
         count_mechanism = dp_mech.Laplace(epsilon=epsilon, sensitivity=1)
-        private_value = count_mechanism.randomise(actual_value)
-    elif query_type.lower() == 'sum':
-        actual_value = float(data.sum())
-        private_value = dp_mechanism.randomise(actual_value)
-    elif query_type.lower() == 'mean':
-        actual_value = float(data.mean())
-        private_value = dp_mechanism.randomise(actual_value)
-    elif query_type.lower() == 'variance':
-        actual_value = float(data.var())
-        private_value = dp_mechanism.randomise(actual_value)
-    elif query_type.lower() == 'std':
-        actual_value = float(data.std())
-        private_value = dp_mechanism.randomise(actual_value)
-    elif query_type.lower() == 'histogram':
-        sensitivity = 1
-        if mechanism.lower() == 'laplace':
-            dp_mechanism = dp_mech.Laplace(epsilon=epsilon, sensitivity=sensitivity)
-        elif mechanism.lower() == 'gaussian':
-            if epsilon > 1:
-            # Use GaussianAnalytic for epsilons > 1
-                dp_mechanism = dp_mech.GaussianAnalytic(epsilon=epsilon, delta=delta, sensitivity=sensitivity)
-            else:
-            # Use the standard Gaussian for epsilons <= 1
-                dp_mechanism = dp_mech.Gaussian(epsilon=epsilon, delta=delta, sensitivity=sensitivity)
-
-        if pd.api.types.is_numeric_dtype(data):
-            min_val, max_val = data.min(), data.max()
-            counts, bin_edges = np.histogram(data, bins=10, range=(min_val, max_val))
-            bin_labels = [f"{bin_edges[i]:.0f}-{bin_edges[i+1]:.0f}" for i in range(len(bin_edges)-1)]
-            actual_histogram = dict(zip(bin_labels, counts.tolist()))
-            private_histogram = {k: dp_mechanism.randomise(float(v)) for k, v in actual_histogram.items()}
-        else:
-            actual_counts = data.value_counts().to_dict()
-            private_histogram = {k: dp_mechanism.randomise(v) for k, v in actual_counts.items()}
-            actual_histogram = actual_counts
-        
+        private_value = _randomise(count_mechanism, actual_value, rng)
+    elif query_type == 'sum':
+        actual_value = float(aggregate.total)
+        private_value = _randomise(dp_mechanism, actual_value, rng)
+    elif query_type == 'mean':
+        actual_value = float(aggregate.mean)
+        private_value = _randomise(dp_mechanism, actual_value, rng)
+    elif query_type == 'variance':
+        actual_value = float(aggregate.variance)
+        private_value = _randomise(dp_mechanism, actual_value, rng)
+    elif query_type == 'std':
+        actual_value = float(aggregate.std)
+        private_value = _randomise(dp_mechanism, actual_value, rng)
+    elif query_type == 'histogram':
+        dp_mechanism = _build_mechanism(mechanism, epsilon, delta, 1)
+        bin_labels = summary.histogram_labels
+        counts = summary.histogram_counts
+
+        # Noise every bin in one vectorized draw instead of one randomise() call per bin
+        noisy_counts = randomise_array(counts, dp_mechanism, rng)
+        released = select_released_bins(noisy_counts, threshold, top_k)
+        released_labels = [bin_labels[i] for i in released]
+        private_histogram = dict(zip(released_labels, noisy_counts[released].tolist()))
+        actual_histogram = dict(zip(released_labels, counts[released].tolist()))
+
         return {"private_histogram": private_histogram, "actual_histogram": actual_histogram}
     else:
         raise HTTPException(status_code=400, detail=f"Query type '{query_type}' not supported.")
@@ -145,39 +231,490 @@ def run_dp_calculation(query_type: str, mechanism: str, data: pd.Series, epsilon
     return {"private_value": round(private_value, 2), "actual_value": round(actual_value, 2)}
 
 
-# --- ASYNC HELPER FOR SENDING ALERTS ---
+def _check_bins(bins: int):
+    if bins is None or bins < 1:
+        raise HTTPException(status_code=400, detail="Histogram bin count must be at least 1.")
 
-async def check_and_trigger_alerts(request: Request, db: Session, budget: Budget, dataset_name: str, initial_spent_epsilon: float):
-    """Checks for alerts and sends emails if thresholds are crossed."""
-    if budget.total_epsilon == 0:
-        return
 
-    final_spent_epsilon = budget.consumed_epsilon
-    initial_percentage = (initial_spent_epsilon / budget.total_epsilon) * 100
-    final_percentage = (final_spent_epsilon / budget.total_epsilon) * 100
+def run_dp_calculation(query_type: str, mechanism: str, data: pd.Series, epsilon: float, delta: float,
+                       bins: int = 10, threshold: Optional[float] = None, top_k: Optional[int] = None,
+                       rng: Optional[np.random.Generator] = None):
+    """
+    Performs the differential privacy calculation on an in-memory column. `bins`,
+    `threshold` and `top_k` only apply to histograms: the number of bins for
+    numeric columns, and optional filters on the noisy counts (minimum count,
+    largest k bins).
+    """
+    _check_bins(bins)
+    summary = summarize_series(data, query_type, bins)
+    return release_from_summary(query_type, mechanism, summary, epsilon, delta, threshold, top_k, rng)
 
-    # This is the corrected query with the JOIN
-    alerts = db.query(data_models.Alert).join(Budget).filter(Budget.id == budget.id).all()
 
-    for alert in alerts:
-        if initial_percentage < alert.threshold <= final_percentage:
-            print(f"ALERT TRIGGERED: Sending email to {alert.email} for dataset '{dataset_name}'.")
-            await send_alert_email(
-                request=request,
-                recipient_email=alert.email,
-                dataset_name=dataset_name,
-                spent_epsilon=final_spent_epsilon,
-                total_epsilon=budget.total_epsilon,
-                threshold=alert.threshold
-            )
+GROUP_AGGREGATES = ('count', 'sum', 'mean')
+
+
+def release_groups(aggregate: str, mechanism: str, groups: GroupSummary, value_summary: Optional[ColumnSummary],
+                   epsilon: float, delta: float, rng: Optional[np.random.Generator] = None,
+                   threshold: Optional[float] = None, top_k: Optional[int] = None) -> dict:
+    """
+    Adds noise to the count, sum or mean of every group in one vectorized draw.
+    Each record falls in exactly one group, so all groups share the job's epsilon.
+    Sum and mean use the value column's range as sensitivity, like their
+    single-value counterparts; `value_summary` is only needed for them.
+
+    The group keys come from the data, so only groups whose noisy count clears
+    partition_threshold for the job's delta are released; `threshold` and
+    `top_k` filter further, as for histograms. A count job selects on the counts
+    it releases; sum and mean spend half of epsilon on the selection counts.
+    Gaussian noise keeps half of delta for itself.
+    """
+    if top_k is not None and top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1.")
+    if not groups.labels:
+        return {"private_groups": {}, "actual_groups": {}}
+
+    aggregate = aggregate.lower()
+    value_delta = delta / 2 if mechanism.lower() == 'gaussian' else 0.0
+    selection_delta = delta - value_delta
+    if aggregate == 'count':
+        count_epsilon = value_epsilon = epsilon
+    else:
+        count_epsilon = value_epsilon = epsilon / 2
+
+    count_mechanism = _build_mechanism(mechanism, count_epsilon, value_delta, 1.0)
+    noisy_counts = randomise_array(groups.counts, count_mechanism, rng)
+    if aggregate == 'count':
+        actual, noisy = groups.counts.astype(np.float64), noisy_counts
+    else:
+        value_aggregate = value_summary.aggregate if value_summary is not None else None
+        if value_aggregate is None or value_aggregate.min is None or value_aggregate.max is None:
+            raise ValueError("Min/max values for sensitivity calculation are null.")
+        sensitivity = float(value_aggregate.max - value_aggregate.min)
+        actual = groups.sums if aggregate == 'sum' else groups.sums / groups.counts
+        noisy = randomise_array(actual, _build_mechanism(mechanism, value_epsilon, value_delta, sensitivity), rng)
+
+    minimum = partition_threshold(count_mechanism, selection_delta)
+    released = select_released_bins(noisy_counts, max(minimum, threshold) if threshold is not None else minimum, top_k)
+    labels = [groups.labels[i] for i in released]
+    return {
+        "private_groups": dict(zip(labels, np.round(noisy[released], 2).tolist())),
+        "actual_groups": dict(zip(labels, np.round(actual[released], 2).tolist())),
+    }
+
+
+def run_group_dp_calculation(aggregate: str, mechanism: str, groups: pd.Series, values: pd.Series,
+                             epsilon: float, delta: float, rng: Optional[np.random.Generator] = None,
+                             threshold: Optional[float] = None, top_k: Optional[int] = None) -> dict:
+    """Noisy per-group count/sum/mean of an in-memory column, grouped by another column."""
+    with_sums = aggregate.lower() != 'count'
+    value_summary = summarize_series(values.dropna(), 'count') if with_sums else None
+    return release_groups(aggregate, mechanism, summarize_groups(groups, values, with_sums), value_summary,
+                          epsilon, delta, rng, threshold, top_k)
+
+
+def job_cost(job_data: data_schemas.JobCreate) -> PrivacyCost:
+    """The job's privacy cost, as the budget accountants compose it."""
+    return job_privacy_cost(job_data.mechanism.lower(), job_data.query_type, job_data.epsilon, job_data.delta or 0.0)
+
+
+def _check_seed(job_data: data_schemas.JobCreate):
+    if job_data.seed is not None and not ALLOW_SEEDED_RELEASES:
+        raise HTTPException(status_code=400, detail="Seeded jobs are disabled on this server (ALLOW_SEEDED_RELEASES).")
+
+
+def _check_group_job(job_data: data_schemas.JobCreate):
+    if not job_data.group_by_column:
+        raise HTTPException(status_code=400, detail="group_by_column is required for group_by queries.")
+    if job_data.group_aggregate.lower() not in GROUP_AGGREGATES:
+        raise HTTPException(status_code=400, detail=f"Group aggregate '{job_data.group_aggregate}' not supported.")
+    if not job_data.delta or not 0 < job_data.delta < 1:
+        raise HTTPException(status_code=400, detail="group_by needs a delta between 0 and 1: only groups whose noisy count clears a threshold set by delta are released.")
+
+
+def job_columns(job_data: data_schemas.JobCreate) -> List[str]:
+    """Dataset columns a job reads."""
+    if job_data.query_type.lower() == 'group_by' and job_data.group_by_column:
+        return sorted({job_data.column_name, job_data.group_by_column})
+    return [job_data.column_name]
+
+
+def job_label(job_data: data_schemas.JobCreate) -> str:
+    """Query description stored on the job row."""
+    if job_data.query_type.lower() == 'group_by':
+        return f"GROUP_BY {job_data.group_aggregate.upper()} on {job_data.column_name} by {job_data.group_by_column}"
+    return f"{job_data.query_type.upper()} on {job_data.column_name}"
+
+
+def execute_group_query(job_data: data_schemas.JobCreate, df: pd.DataFrame) -> dict:
+    """Validates a group_by job against a loaded frame and runs the grouped DP calculation."""
+    _check_group_job(job_data)
+    for column_name in (job_data.column_name, job_data.group_by_column):
+        if column_name not in df.columns:
+            raise Exception(f"Column '{column_name}' not found in the dataset.")
+    if job_data.group_aggregate.lower() != 'count' and not pd.api.types.is_numeric_dtype(df[job_data.column_name]):
+        raise Exception(f"Column '{job_data.column_name}' is not numeric and cannot be used for this query.")
+
+    return run_group_dp_calculation(
+        aggregate=job_data.group_aggregate,
+        mechanism=job_data.mechanism,
+        groups=df[job_data.group_by_column],
+        values=df[job_data.column_name],
+        epsilon=job_data.epsilon,
+        delta=job_data.delta or 0.0,
+        rng=release_generator(job_data.seed),
+        threshold=job_data.threshold,
+        top_k=job_data.top_k
+    )
+
+
+def execute_job_query(job_data: data_schemas.JobCreate, df: pd.DataFrame) -> dict:
+    """Validates the requested column against a loaded frame and runs the DP calculation."""
+    if job_data.query_type.lower() == 'group_by':
+        return execute_group_query(job_data, df)
+
+    column_name = job_data.column_name
+    if column_name not in df.columns:
+        raise Exception(f"Column '{column_name}' not found in the dataset.")
+
+    if job_data.query_type.lower() != 'histogram' and not pd.api.types.is_numeric_dtype(df[column_name]):
+        raise Exception(f"Column '{column_name}' is not numeric and cannot be used for this query.")
+
+    return run_dp_calculation(
+        query_type=job_data.query_type,
+        mechanism=job_data.mechanism,
+        data=df[column_name].dropna(),
+        epsilon=job_data.epsilon,
+        delta=job_data.delta or 0.0,
+        bins=job_data.bins,
+        threshold=job_data.threshold,
+        top_k=job_data.top_k,
+        rng=release_generator(job_data.seed)
+    )
+
+
+def column_is_numeric(dataset, column_name: str) -> Optional[bool]:
+    """Whether the dataset's schema records the column as numeric; None if it records no type for it."""
+    dtype = (getattr(dataset, "column_types", None) or {}).get(column_name)
+    if not dtype:
+        return None
+    try:
+        return pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype))
+    except TypeError:
+        return None
+
+
+def summarize_source_column(dataset, column_name: str, query_type: str, bins: int = 10,
+                            value_range: Optional[tuple] = None) -> ColumnSummary:
+    """
+    Summarizes one column without loading the dataset into a DataFrame. SQLite
+    tables are aggregated by SQL inside the database file; other sources are
+    scanned in chunks, with memory bounded by STREAMING_CHUNK_ROWS. A known
+    `value_range` saves the extra pass a chunked numeric histogram needs.
+    """
+    _check_bins(bins)
+    source_type, file_path, table_name, columnar_path = resolve_source(dataset)
+    if source_type == "local_database":
+        columnar_path = None
+    if not column_exists(source_type, file_path, table_name, columnar_path, column_name):
+        raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in the dataset.")
+
+    if source_type == "local_database":
+        return summarize_sqlite_column(file_path, table_name, column_name, query_type, bins)
+    is_numeric = column_is_numeric(dataset, column_name)
+    return stream_column_summary(
+        lambda: iter_column_chunks(source_type, file_path, table_name, columnar_path, column_name,
+                                   as_text=is_numeric is False),
+        query_type, bins, value_range, is_numeric
+    )
+
+
+def release_job_summary(job_data: data_schemas.JobCreate, summary: ColumnSummary) -> dict:
+    """Counterpart of execute_job_query for a column that was already summarized."""
+    _check_bins(job_data.bins)
+    if job_data.query_type.lower() != 'histogram' and not summary.is_numeric:
+        raise Exception(f"Column '{job_data.column_name}' is not numeric and cannot be used for this query.")
+
+    return release_from_summary(
+        query_type=job_data.query_type,
+        mechanism=job_data.mechanism,
+        summary=summary,
+        epsilon=job_data.epsilon,
+        delta=job_data.delta or 0.0,
+        threshold=job_data.threshold,
+        top_k=job_data.top_k,
+        rng=release_generator(job_data.seed)
+    )
+
+
+def aggregates_at_source(dataset) -> bool:
+    """
+    True when queries should be answered from aggregates computed at the source
+    instead of a loaded DataFrame: always for SQLite tables (pushed down as SQL),
+    and for other datasets above the streaming threshold.
+    """
+    source_type, file_path, _, _ = resolve_source(dataset)
+    return source_type == "local_database" or should_stream(file_path)
+
+
+def fresh_column_stats(dataset, column_name: str) -> Optional[dict]:
+    """The column's stored stats, if they were computed from the dataset's current content."""
+    stats = (getattr(dataset, "column_stats", None) or {}).get(column_name)
+    if stats is None or not getattr(dataset, "stats_fingerprint", None):
+        return None
+    try:
+        _, file_path, table_name, _ = resolve_source(dataset)
+    except Exception:
+        return None
+    return stats if content_fingerprint(file_path, table_name) == dataset.stats_fingerprint else None
+
+
+def execute_job(job_data: data_schemas.JobCreate, dataset, load_frame) -> dict:
+    """
+    Answers a job from the cheapest input available: stored column stats when they
+    are fresh and sufficient, then aggregates computed at the source, and only
+    otherwise the DataFrame returned by `load_frame()`.
+    """
+    if job_data.query_type.lower() == 'group_by':
+        return execute_group_job(job_data, dataset, load_frame)
+
+    stats = fresh_column_stats(dataset, job_data.column_name)
+    summary = summary_from_stats(stats, job_data.query_type)
+    if summary is not None:
+        return release_job_summary(job_data, summary)
+
+    if aggregates_at_source(dataset):
+        value_range = (stats["min"], stats["max"]) if stats and stats["numeric"] and stats["count"] else None
+        summary = summarize_source_column(dataset, job_data.column_name, job_data.query_type, job_data.bins, value_range)
+        return release_job_summary(job_data, summary)
+
+    return execute_job_query(job_data, load_frame())
+
+
+def execute_group_job(job_data: data_schemas.JobCreate, dataset, load_frame) -> dict:
+    """
+    Runs a group_by job: as one GROUP BY statement for SQLite tables, a chunked
+    scan above the streaming threshold, or a vectorized pass over the loaded frame.
+    """
+    if not aggregates_at_source(dataset):
+        return execute_group_query(job_data, load_frame())
+
+    _check_group_job(job_data)
+    source_type, file_path, table_name, columnar_path = resolve_source(dataset)
+    if source_type == "local_database":
+        columnar_path = None
+    for column_name in (job_data.column_name, job_data.group_by_column):
+        if not column_exists(source_type, file_path, table_name, columnar_path, column_name):
+            raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in the dataset.")
+
+    with_sums = job_data.group_aggregate.lower() != 'count'
+    value_summary = None
+    if with_sums:
+        # Numeric check and sensitivity range, from stored stats when they are fresh.
+        value_summary = summary_from_stats(fresh_column_stats(dataset, job_data.column_name), 'count') \
+            or summarize_source_column(dataset, job_data.column_name, 'count')
+        if not value_summary.is_numeric:
+            raise Exception(f"Column '{job_data.column_name}' is not numeric and cannot be used for this query.")
+
+    if source_type == "local_database":
+        groups = summarize_sqlite_groups(file_path, table_name, job_data.group_by_column, job_data.column_name, with_sums)
+    else:
+        columns = job_columns(job_data)
+        text_columns = [column for column in columns if column_is_numeric(dataset, column) is False]
+        groups = stream_group_summary(
+            lambda: iter_frame_chunks(source_type, file_path, table_name, columnar_path, columns,
+                                      text_columns=text_columns),
+            job_data.group_by_column, job_data.column_name, with_sums
+        )
+    return release_groups(job_data.group_aggregate, job_data.mechanism, groups, value_summary,
+                          job_data.epsilon, job_data.delta or 0.0, release_generator(job_data.seed),
+                          job_data.threshold, job_data.top_k)
+
+
+def _error_detail(e: Exception) -> str:
+    return e.detail if isinstance(e, HTTPException) else str(e)
+
+
+def dataset_source(dataset: data_models.Dataset, columns: Optional[List[str]] = None) -> dict:
+    """
+    Picklable description of where a dataset's data lives, handed to worker processes,
+    with the schema types and stored stats of the given columns.
+    """
+    source = {"id": dataset.id, "source_type": dataset.source_type, "connection_details": dataset.connection_details}
+    if columns:
+        source["column_types"] = {c.name: c.dtype for c in dataset.columns if c.name in columns}
+        source["stats_fingerprint"] = dataset.stats_fingerprint
+        source["column_stats"] = {c.name: column_stats_from_model(c) for c in dataset.columns if c.name in columns}
+    return source
+
+
+def compute_job_result(source: dict, job_params: dict) -> dict:
+    """Executor entry point: reads the job's column from disk and runs the DP query."""
+    job_data = data_schemas.JobCreate(**job_params)
+    dataset = SimpleNamespace(**source)
+    return execute_job(job_data, dataset, lambda: get_dataframe_from_source(dataset, columns=job_columns(job_data)))
+
+
+def compute_job_group(source: dict, job_params_list: List[dict]) -> List[tuple]:
+    """
+    Executor entry point for batches: loads the dataset at most once for all jobs
+    and returns a (result, error) pair per job.
+    """
+    jobs = [data_schemas.JobCreate(**params) for params in job_params_list]
+    dataset = SimpleNamespace(**source)
+    frames = []
+
+    def load_frame():
+        if not frames:
+            frames.append(get_dataframe_from_source(dataset, columns=sorted({c for j in jobs for c in job_columns(j)})))
+        return frames[0]
+
+    outcomes = []
+    for job_data in jobs:
+        try:
+            outcomes.append((execute_job(job_data, dataset, load_frame), None))
+        except Exception as e:
+            outcomes.append((None, _error_detail(e)))
+    return outcomes
+
+
+def compute_dataset_stats(source: dict, column_names: List[str]) -> dict:
+    """Executor entry point: recomputes the stored stats of the given columns from the data."""
+    dataset = SimpleNamespace(**source)
+    if not aggregates_at_source(dataset):
+        df = get_dataframe_from_source(dataset, columns=column_names)
+        return {name: series_stats(df[name]) for name in column_names if name in df.columns}
+
+    stats = {}
+    for name in column_names:
+        try:
+            summary = summarize_source_column(dataset, name, 'variance')
+            if not summary.is_numeric:
+                summary = summarize_source_column(dataset, name, 'histogram')
+        except HTTPException:
+            continue
+        stats[name] = stats_from_summary(summary)
+    return stats
+
+
+def _locked_dataset(db: Session, dataset_id: int):
+    """
+    Loads a dataset for a refresh of its stored column stats. FOR UPDATE holds off
+    other refreshes of the same dataset until the caller commits.
+    """
+    return db.query(data_models.Dataset).with_for_update().populate_existing() \
+        .filter(data_models.Dataset.id == dataset_id).first()
+
+
+def refresh_column_stats(db: Session, dataset: data_models.Dataset) -> bool:
+    """
+    Recomputes the dataset's stored column stats if its file changed since they were
+    computed (or they never were) and commits them, so the session must have nothing
+    else pending. The dataset row is locked and the fingerprint checked again first:
+    of several jobs finding the same stale stats only one recomputes them, the others
+    wait for its commit and find them current. Returns True when the stats were refreshed.
+    """
+    try:
+        _, file_path, table_name, _ = resolve_source(dataset)
+    except Exception:
+        return False  # the query itself reports the unreadable source
+    fingerprint = content_fingerprint(file_path, table_name)
+    if dataset.stats_fingerprint == fingerprint or not dataset.columns:
+        return False
+
+    try:
+        dataset = _locked_dataset(db, dataset.id)
+        if dataset is None or dataset.stats_fingerprint == fingerprint:
+            db.commit()
+            return False
+        for column in dataset.columns:
+            # Another refresh may have replaced the counts this session loaded
+            db.expire(column, ["category_counts"])
+        stats = run_compute(compute_dataset_stats, dataset_source(dataset), [c.name for c in dataset.columns])
+        for column in dataset.columns:
+            if column.name in stats:
+                apply_column_stats(column, stats[column.name])
+        dataset.stats_fingerprint = fingerprint
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _run_queued_job(job_id: int, job_data: data_schemas.JobCreate):
+    """
+    Executes a queued job on a worker thread with its own session. The job holds
+    the budget reserved when it was submitted: the reservation becomes consumed
+    budget in the same commit as the result and any alert emails it triggers, or
+    is released if the job does not complete. A job whose reservation was taken
+    back meanwhile (its lease expired) is not run, or its result is discarded.
+    Returns whether the job completed.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(data_models.Job).filter(data_models.Job.id == job_id).first()
+        if not job or not start_job(db, job_id):
+            db.rollback()
+            return False
+        db.commit()
+        dataset = job.dataset
+
+        try:
+            refresh_column_stats(db, dataset)
+            result_dict = run_compute(compute_job_result, dataset_source(dataset, job_columns(job_data)), job_data.dict())
+
+            consumed_epsilon = convert_job_reservation(db, job_id, result=json.dumps(result_dict))
+            if consumed_epsilon is None:
+                db.rollback()
+                return False
+            record_spend(db, dataset.id, job.budget_id, job_data.epsilon, job_cost(job_data).delta, job_id)
+            enqueue_threshold_alerts(db, job.budget_id, dataset.name, consumed_epsilon)
+            db.commit()
+            return True
+
+        except Exception as e:
+            db.rollback()
+            release_job_reservation(db, job_id, errors=_error_detail(e))
+            db.commit()
+            return False
+    finally:
+        db.close()
+
+
+async def process_queued_job(payload: dict) -> bool:
+    """Job queue handler: runs the job off the event loop; alert emails are left to the dispatcher."""
+    completed = await run_in_threadpool(_run_queued_job, payload["job_id"], payload["job_data"])
+    if completed:
+        alert_dispatcher.notify()
+    return completed
+
+
+job_queue.handler = process_queued_job
+
+
+def _with_queue_metrics(job_schema: data_schemas.JobDetail) -> data_schemas.JobDetail:
+    if job_schema.status == "Queued":
+        job_schema.queue_position = job_queue.position(job_schema.id)
+        wait = job_queue.current_wait(job_schema.id)
+        job_schema.wait_seconds = round(wait, 4) if wait is not None else None
+    job_schema.queue_depth = job_queue.stats()["queue_depth"]
+    return job_schema
+
 
 # --- API ENDPOINTS ---
 
-@router.post("/api/jobs", response_model=data_schemas.Job, status_code=201)
-async def create_job(job_data: data_schemas.JobCreate, request: Request, db: Session = Depends(get_db)):
+@router.post("/api/jobs", response_model=data_schemas.JobDetail, status_code=202)
+def create_job(job_data: data_schemas.JobCreate, db: Session = Depends(get_db)):
+    """
+    Validates the request, reserves the job's budget, records the job as Queued and
+    hands it to the worker pool. Poll GET /api/jobs/{job_id} for the result.
+    """
     dataset = db.query(data_models.Dataset).filter(data_models.Dataset.id == job_data.dataset_id).first()
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
+    _check_seed(job_data)
+    if job_data.query_type.lower() == 'group_by':
+        _check_group_job(job_data)
 
     budget = db.query(data_models.Budget).filter(data_models.Budget.dataset_id == job_data.dataset_id).first()
     if not budget:
@@ -185,8 +722,18 @@ async def create_job(job_data: data_schemas.JobCreate, request: Request, db: Ses
 
     job_delta = job_data.delta or 0.0
 
-    if (budget.consumed_epsilon + job_data.epsilon) > budget.total_epsilon or \
-       (budget.consumed_delta + job_delta) > budget.total_delta:
+    # Reserve the job's cost in one conditional UPDATE, committed with the Queued
+    # job row that holds it, so concurrent submissions can never overspend the
+    # budget between them. The budget's accountant decides what still fits.
+    new_job = data_models.Job(
+        dataset_id=dataset.id,
+        status="Queued",
+        query_type=job_label(job_data),
+        epsilon=job_data.epsilon,
+        delta=job_delta,
+        mechanism=job_data.mechanism
+    )
+    if not reserve_for_jobs(db, budget.id, [(new_job, job_cost(job_data))]):
         log_entry = data_models.AuditLog(
             user="system", action="CREATE_JOB",
             details=f"Job '{job_data.query_type}' failed for dataset '{dataset.name}': Privacy budget exceeded.",
@@ -196,15 +743,6 @@ async def create_job(job_data: data_schemas.JobCreate, request: Request, db: Ses
         db.commit()
         raise HTTPException(status_code=400, detail="Privacy budget exceeded for epsilon or delta")
 
-    new_job = data_models.Job(
-        dataset_id=dataset.id,
-        status="Running",
-        query_type=f"{job_data.query_type.upper()} on {job_data.column_name}",
-        epsilon=job_data.epsilon,
-        delta=job_delta,
-        mechanism=job_data.mechanism
-    )
-    db.add(new_job)
     log_entry = data_models.AuditLog(
         user="system", action="CREATE_JOB",
         details=f"Job '{job_data.query_type}' created for dataset '{dataset.name}'.",
@@ -215,47 +753,175 @@ async def create_job(job_data: data_schemas.JobCreate, request: Request, db: Ses
     db.refresh(new_job)
 
     try:
-        df = get_dataframe_from_source(dataset)
-        column_name = job_data.column_name
-        if column_name not in df.columns:
-            raise Exception(f"Column '{column_name}' not found in the dataset.")
+        job_queue.submit(new_job.id, {
+            "job_id": new_job.id,
+            "job_data": job_data,
+        })
+    except RuntimeError as e:
+        release_job_reservation(db, new_job.id, errors=str(e))
+        db.commit()
+        raise HTTPException(status_code=503, detail=str(e))
 
-        if job_data.query_type.lower() != 'histogram' and not pd.api.types.is_numeric_dtype(df[column_name]):
-            raise Exception(f"Column '{column_name}' is not numeric and cannot be used for this query.")
+    response_schema = data_schemas.JobDetail.from_orm(new_job)
+    response_schema.dataset_name = dataset.name
+    return _with_queue_metrics(response_schema)
 
-        result_dict = run_dp_calculation(
-            query_type=job_data.query_type,
-            mechanism=job_data.mechanism,
-            data=df[column_name].dropna(),
-            epsilon=job_data.epsilon,
-            delta=job_delta
-        )
 
-        new_job.status = "Completed"
-        new_job.result = json.dumps(result_dict)
-        
-        # Store the budget state *before* consumption
-        initial_spent = budget.consumed_epsilon
-        
-        budget.consumed_epsilon += job_data.epsilon
-        budget.consumed_delta += job_delta
-        db.commit()
+@router.get("/api/jobs/queue/stats")
+def get_job_queue_stats():
+    """Returns worker pool size, queue depth and wait-time metrics of the job queue."""
+    return job_queue.stats()
 
-        # Call the corrected alert checking function
-        await check_and_trigger_alerts(request, db, budget, dataset.name, initial_spent)
 
-        db.refresh(new_job)
+@router.post("/api/jobs/batch", response_model=data_schemas.JobBatchResult)
+async def create_jobs_batch(batch: data_schemas.JobBatchCreate):
+    """
+    Runs many jobs in one request. Each dataset is loaded once for all of its jobs,
+    the combined epsilon/delta of a dataset's jobs is reserved up front together
+    with their Running job rows, and every budget charge, result and audit entry is
+    written in a single commit.
+    """
+    if not batch.jobs:
+        raise HTTPException(status_code=400, detail="The batch must contain at least one job.")
+    for job_data in batch.jobs:
+        _check_seed(job_data)
+        if job_data.query_type.lower() == 'group_by':
+            _check_group_job(job_data)
+
+    # Loading and computation run off the event loop; alert emails are queued in the batch's commit.
+    results = await run_in_threadpool(_run_job_batch, batch)
+    alert_dispatcher.notify()
+
+    return data_schemas.JobBatchResult(
+        results=results,
+        completed=sum(1 for r in results if r.error is None),
+        failed=sum(1 for r in results if r.error is not None)
+    )
 
-    except Exception as e:
-        new_job.status = "Failed"
-        new_job.errors = str(e)
-        db.commit()
-        db.refresh(new_job)
-        raise HTTPException(status_code=400, detail=str(e))
 
-    response_schema = data_schemas.Job.from_orm(new_job)
-    response_schema.dataset_name = dataset.name
-    return response_schema
+def _run_job_batch(batch: data_schemas.JobBatchCreate) -> List[data_schemas.JobBatchItemResult]:
+    """
+    Runs a batch on a worker thread with its own session. If it fails, its jobs
+    that still hold their reservation are failed and release it.
+    """
+    held_job_ids = []  # jobs holding reservations taken by this batch
+    db = SessionLocal()
+    try:
+        try:
+            results, created_jobs = _run_reserved_job_batch(batch, db, held_job_ids)
+        except Exception as e:
+            db.rollback()
+            for job_id in held_job_ids:
+                release_job_reservation(db, job_id, errors=_error_detail(e))
+            db.commit()
+            raise
+
+        for index, job, dataset_name in created_jobs:
+            db.refresh(job)
+            job_schema = data_schemas.Job.from_orm(job)
+            job_schema.dataset_name = dataset_name
+            results[index].job = job_schema
+        return results
+    finally:
+        db.close()
+
+
+def _run_reserved_job_batch(batch: data_schemas.JobBatchCreate, db: Session, held_job_ids: list):
+    results = [data_schemas.JobBatchItemResult(index=i) for i in range(len(batch.jobs))]
+    jobs_by_dataset = defaultdict(list)
+    for index, job_data in enumerate(batch.jobs):
+        jobs_by_dataset[job_data.dataset_id].append((index, job_data))
+
+    # Every dataset's jobs are reserved before the first one runs, since each
+    # reservation commits the session along with the Running job rows holding it.
+    reserved = []         # (dataset, jobs, [(Job row, its cost)])
+    refused = []          # (dataset, number of jobs) whose budget had no room
+    for dataset_id, items in jobs_by_dataset.items():
+        dataset = db.query(data_models.Dataset).filter(data_models.Dataset.id == dataset_id).first()
+        if not dataset:
+            for index, _ in items:
+                results[index].error = "Dataset not found"
+            continue
+
+        budget = db.query(data_models.Budget).filter(data_models.Budget.dataset_id == dataset_id).first()
+        if not budget:
+            for index, _ in items:
+                results[index].error = "No budget found for this dataset."
+            continue
+
+        jobs = [
+            (data_models.Job(
+                dataset_id=dataset.id,
+                status="Running",
+                query_type=job_label(job_data),
+                epsilon=job_data.epsilon,
+                delta=job_data.delta or 0.0,
+                mechanism=job_data.mechanism
+            ), job_cost(job_data))
+            for _, job_data in items
+        ]
+        if not reserve_for_jobs(db, budget.id, jobs):
+            refused.append((dataset, len(items)))
+            for index, _ in items:
+                results[index].error = "Privacy budget exceeded for epsilon or delta"
+            continue
+        held_job_ids.extend(job.id for job, _ in jobs)
+        reserved.append((dataset, items, jobs))
+
+    created_jobs = []     # (index, Job row, dataset name)
+    outcomes_by_dataset = []  # (dataset, [(Job row, its cost)], [(result, error)])
+    # Added once every dataset has run, as the stats refreshes commit or roll back the session
+    audit_entries = [
+        data_models.AuditLog(
+            user="system", action="CREATE_JOB_BATCH",
+            details=f"Batch of {job_count} jobs failed for dataset '{dataset.name}': Privacy budget exceeded.",
+            status="FAILED", ip_address="127.0.0.1"
+        )
+        for dataset, job_count in refused
+    ]
+
+    for dataset, items, jobs in reserved:
+        try:
+            refresh_column_stats(db, dataset)
+        except Exception as e:
+            print(f"Column stats refresh failed for dataset '{dataset.name}': {e}")
+        outcomes = run_compute(
+            compute_job_group, dataset_source(dataset, [c for _, job_data in items for c in job_columns(job_data)]),
+            [job_data.dict() for _, job_data in items]
+        )
+
+        for (index, _), (job, _), (_, error) in zip(items, jobs, outcomes):
+            if error is not None:
+                results[index].error = error
+            created_jobs.append((index, job, dataset.name))
+        outcomes_by_dataset.append((dataset, jobs, outcomes))
+
+        completed = len(items) - sum(1 for index, _ in items if results[index].error)
+        audit_entries.append(data_models.AuditLog(
+            user="system", action="CREATE_JOB_BATCH",
+            details=f"Batch of {len(items)} jobs run for dataset '{dataset.name}' ({completed} completed).",
+            status="SUCCESS" if completed else "FAILED", ip_address="127.0.0.1"
+        ))
+    db.add_all(audit_entries)
+
+    # Complete or fail every job, charging what the completed ones spent with one
+    # ledger row each, returning the rest of each reservation and queueing the
+    # alert emails the charges trigger. Done last, so the budget rows are locked
+    # only for the final commit.
+    for dataset, jobs, outcomes in outcomes_by_dataset:
+        consumed_epsilon = None
+        for (job, _), (result_dict, error) in zip(jobs, outcomes):
+            if error is None:
+                consumed_epsilon = convert_job_reservation(db, job.id, result=json.dumps(result_dict))
+                if consumed_epsilon is None:
+                    raise RuntimeError("The batch's budget reservation was released before it completed.")
+                record_spend(db, dataset.id, job.budget_id, job.epsilon, job.delta, job.id)
+            elif not release_job_reservation(db, job.id, errors=error):
+                raise RuntimeError("The batch's budget reservation was released before it completed.")
+        if consumed_epsilon is not None:
+            enqueue_threshold_alerts(db, jobs[0][0].budget_id, dataset.name, consumed_epsilon)
+    db.commit()
+    return results, created_jobs
 
 
 @router.get("/api/queries", response_model=List[data_schemas.Job])
@@ -279,6 +945,7 @@ def get_job(job_id: int, db: Session = Depends(get_db)):
     
     job_schema = data_schemas.JobDetail.from_orm(job)
     job_schema.dataset_name = job.dataset.name if job.dataset else "N/A"
+    _with_queue_metrics(job_schema)
     
     if job.result:
         try:
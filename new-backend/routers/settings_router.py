@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from core.database import get_db
+from core.job_queue import job_queue
 from models import data_models
 from schemas import data_schemas
 
@@ -31,4 +32,7 @@ def update_settings(settings_data: data_schemas.SettingsUpdate, db: Session = De
 
     db.commit()
     db.refresh(settings)
+
+    # Apply the new concurrency limit to the running worker pool
+    job_queue.resize(settings.max_concurrent_queries)
     return settings
\ No newline at end of file
@@ -1,88 +1,174 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
 import pandas as pd
-from diffprivlib.mechanisms import Laplace, Gaussian
+from diffprivlib.mechanisms import Laplace, Gaussian, GaussianAnalytic
 import numpy as np
+import json
 import os
 import time
+from types import SimpleNamespace
+from typing import Optional
 
 from core.database import get_db
+from core.process_pool import run_compute, map_compute
+from core.noise import mechanism_noise, noise_distribution
+from core.column_stats import summary_from_stats, content_fingerprint
+from core.result_cache import simulation_cache
+from core.rng import RNG_SHARD_SIZE, resolve_seed, sharded_draw
 from models import data_models
 from schemas import data_schemas
+from routers.job_router import (
+    get_dataframe_from_source, dataset_source, aggregates_at_source, summarize_source_column,
+    fresh_column_stats, refresh_column_stats, resolve_source
+)
 
 router = APIRouter()
 
-# --- USING YOUR EXACT DATA LOADING FUNCTION ---
-def get_dataframe_from_source(dataset: data_models.Dataset) -> pd.DataFrame:
-    source_type = dataset.source_type
-    conn_details = dataset.connection_details
-
+def load_simulation_dataframe(dataset, columns=None) -> pd.DataFrame:
+    """Loads the dataset through the shared (cached) loader used by jobs."""
     try:
-        if source_type == "file_upload" or source_type == "csv":
-            file_path = conn_details.get("path") or conn_details.get("filepath")
-            if not file_path or not os.path.exists(file_path):
-                raise FileNotFoundError(f"Data file not found at path: {file_path}")
-            return pd.read_csv(file_path)
-
-        elif source_type == "local_database":
-            file_path = conn_details.get("path") or conn_details.get("db_path")
-            table_name = conn_details.get("table") or conn_details.get("table_name")
-            if not file_path or not os.path.exists(file_path):
-                raise FileNotFoundError(f"Database file not found at path: {file_path}")
-            if not table_name:
-                raise ValueError("Table name not found in connection details for database.")
-            
-            engine = create_engine(f"sqlite:///{file_path}")
-            with engine.connect() as connection:
-                return pd.read_sql_table(table_name, connection)
-        
-        else:
-            raise NotImplementedError(f"Data source type '{source_type}' is not supported.")
-
+        return get_dataframe_from_source(dataset, columns=columns)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load data: {str(e)}")
 
 
-@router.post("/")
-def run_full_simulation(sim_in: data_schemas.SimulationCreate, db: Session = Depends(get_db)):
-    start_time = time.time()
-    
-    dataset = db.query(data_models.Dataset).filter(data_models.Dataset.id == sim_in.dataset_id).first()
-    if not dataset:
-        raise HTTPException(status_code=404, detail="Dataset not found")
+def compute_true_result(dataset, sim_in: data_schemas.SimulationCreate) -> float:
+    """
+    The exact answer to the simulated query, taken from the stored column stats
+    when they are fresh. SQLite tables and datasets above the streaming threshold
+    are otherwise aggregated at the source instead of being loaded.
+    """
+    summary = summary_from_stats(fresh_column_stats(dataset, sim_in.column_name), 'mean')
+    try:
+        at_source = summary is not None or aggregates_at_source(dataset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load data: {str(e)}")
 
-    df = get_dataframe_from_source(dataset)
-    
-    if sim_in.column_name not in df.columns:
-        raise HTTPException(status_code=400, detail=f"Column '{sim_in.column_name}' not found in dataset.")
+    if at_source:
+        try:
+            if summary is None:
+                summary = summarize_source_column(dataset, sim_in.column_name, sim_in.query_type)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to load data: {str(e)}")
+        if not summary.is_numeric:
+            raise HTTPException(status_code=400, detail=f"Column '{sim_in.column_name}' must be numerical for this simulation.")
+        aggregate = summary.aggregate
+        column_mean, column_sum = aggregate.mean, aggregate.total
+        row_count = aggregate.count + aggregate.null_count
+    else:
+        df = load_simulation_dataframe(dataset, columns=[sim_in.column_name])
+
+        if sim_in.column_name not in df.columns:
+            raise HTTPException(status_code=400, detail=f"Column '{sim_in.column_name}' not found in dataset.")
 
-    if df[sim_in.column_name].dtype not in ['int64', 'float64', 'int32', 'float32']:
-        raise HTTPException(status_code=400, detail=f"Column '{sim_in.column_name}' must be numerical for this simulation.")
+        if df[sim_in.column_name].dtype not in ['int64', 'float64', 'int32', 'float32']:
+            raise HTTPException(status_code=400, detail=f"Column '{sim_in.column_name}' must be numerical for this simulation.")
+        column_mean, column_sum = df[sim_in.column_name].mean(), df[sim_in.column_name].sum()
+        row_count = len(df)
 
     # Calculate true result based on the query_type from the UI
     if sim_in.query_type.lower() == 'mean':
-        true_result = df[sim_in.column_name].mean()
+        return column_mean
     elif sim_in.query_type.lower() == 'sum':
-        true_result = df[sim_in.column_name].sum()
+        return column_sum
     elif sim_in.query_type.lower() == 'count':
-        true_result = float(len(df))
+        return float(row_count)
     else:
         raise HTTPException(status_code=400, detail=f"Query type '{sim_in.query_type}' is not supported for simulation.")
 
-    mechanism = None
-    if sim_in.mechanism == 'laplace':
-        mechanism = Laplace(epsilon=sim_in.epsilon, sensitivity=sim_in.sensitivity)
-    elif sim_in.mechanism == 'gaussian':
-        mechanism = Gaussian(epsilon=sim_in.epsilon, delta=sim_in.delta or 0, sensitivity=sim_in.sensitivity)
-    else:
-        raise HTTPException(status_code=400, detail=f"Mechanism '{sim_in.mechanism}' not supported.")
 
-    # Run for the exact number of queries from the UI
-    dp_results = [mechanism.randomise(true_result) for _ in range(sim_in.queries)]
-    
-    noise = np.array([res - true_result for res in dp_results])
-    avg_noise = np.mean(np.abs(noise))
+def refresh_stats(db: Session, dataset: data_models.Dataset):
+    """Brings the dataset's stored column stats up to date; a failure only costs the shortcut."""
+    try:
+        refresh_column_stats(db, dataset)
+    except Exception as e:
+        db.rollback()
+        print(f"Column stats refresh failed for dataset '{dataset.name}': {e}")
+
+
+def simulation_cache_key(dataset: data_models.Dataset, sim_in: data_schemas.SimulationCreate, streamed: bool = False):
+    """
+    Identifies a simulation by the dataset's current content and every parameter that
+    shapes its result, or returns None when the source cannot be fingerprinted.
+    A streamed sampling run reports metrics built from running totals (see
+    NoiseAccumulator), which differ from POST /'s, so it is cached under its own key.
+    """
+    try:
+        _, file_path, table_name, _ = resolve_source(dataset)
+        version = content_fingerprint(file_path, table_name)
+    except Exception:
+        return None
+    return (dataset.id, version, sim_in.column_name, sim_in.query_type.lower(), sim_in.mechanism,
+            sim_in.epsilon, sim_in.delta or 0.0, sim_in.sensitivity, sim_in.queries,
+            sim_in.mode, sim_in.validation_samples, sim_in.seed,
+            streamed and sim_in.mode == "sampling")
+
+
+@router.post("/")
+def run_full_simulation(sim_in: data_schemas.SimulationCreate, response: Response, db: Session = Depends(get_db)):
+    """
+    Runs a simulation, or replays the cached result of an identical request made
+    against the same dataset content. The X-Cache header reports HIT or MISS.
+    """
+    dataset = db.query(data_models.Dataset).filter(data_models.Dataset.id == sim_in.dataset_id).first()
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    cache_key = simulation_cache_key(dataset, sim_in)
+    cached = simulation_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        result, age = cached
+        response.headers["X-Cache"] = "HIT"
+        response.headers["Age"] = str(int(age))
+        return result
+
+    refresh_stats(db, dataset)
+
+    result = run_compute(simulate_from_source, dataset_source(dataset, [sim_in.column_name]), sim_in.dict())
+    if cache_key:
+        simulation_cache.put(cache_key, result)
+    response.headers["X-Cache"] = "MISS"
+    return result
+
+
+@router.get("/cache/stats")
+def get_simulation_cache_stats():
+    """Returns hit/miss counters and occupancy of the simulation result cache."""
+    return simulation_cache.stats()
+
+
+def build_simulation_mechanism(mechanism: str, epsilon: float, delta: float, sensitivity: float):
+    if mechanism == 'laplace':
+        return Laplace(epsilon=epsilon, sensitivity=sensitivity)
+    elif mechanism == 'gaussian':
+        return Gaussian(epsilon=epsilon, delta=delta or 0, sensitivity=sensitivity)
+    elif mechanism == 'gaussian_analytic':
+        return GaussianAnalytic(epsilon=epsilon, delta=delta or 0, sensitivity=sensitivity)
+    raise HTTPException(status_code=400, detail=f"Mechanism '{mechanism}' not supported.")
+
+
+def simulated_noise(mechanism, queries: int, seed: int, *key: int, first_shard: int = 0) -> np.ndarray:
+    """
+    The noise of `queries` simulated releases, drawn from the seeded streams of
+    core.rng. Simulations publish nothing, so they use numpy's fast generator
+    rather than the CSPRNG.
+    """
+    return sharded_draw(lambda n, generator: mechanism_noise(mechanism, n, generator),
+                        max(queries, 0), seed, *key, first_shard=first_shard)
+
+
+def simulate_noise(true_result: float, mechanism, queries: int, seed: Optional[int] = None, key: tuple = ()) -> dict:
+    """
+    Noise statistics of `queries` simulated releases of `true_result`. The same
+    seed and stream key reproduce the same draws.
+    """
+    noise = simulated_noise(mechanism, queries, resolve_seed(seed), *key)
+    abs_noise = np.abs(noise)
+    avg_noise = abs_noise.mean() if noise.size else 0.0
     
     # Generate histogram data for the noise distribution chart
     hist, bin_edges = np.histogram(noise, bins=10)
@@ -90,23 +176,327 @@ def run_full_simulation(sim_in: data_schemas.SimulationCreate, db: Session = Dep
     # Calculate real success rate (e.g., how many results are within a certain % of the true result)
     # Here we define "success" as a result within 50% of the average noise range
     # This is an example metric; it can be adjusted for different needs.
-    successful_queries = np.sum(np.abs(noise) < (avg_noise * 5)) 
-    success_rate = (successful_queries / sim_in.queries) * 100 if sim_in.queries > 0 else 100
+    successful_queries = np.count_nonzero(abs_noise < (avg_noise * 5))
+    success_rate = (successful_queries / queries) * 100 if queries > 0 else 100
 
-    execution_time = time.time() - start_time
-
-    # Return the exact, non-fake data structure the frontend UI expects
     return {
-        "totalQueries": sim_in.queries,
         "successRate": round(success_rate, 2),
         "avgNoise": round(avg_noise, 4),
         "utilityScore": round(max(0, 100 - (avg_noise / (true_result if true_result != 0 else 1)) * 100), 2),
-        "privacyLoss": round(sim_in.epsilon * sim_in.queries, 2),
-        "executionTime": round(execution_time, 4),
         "noiseDistribution": {
             "values": hist.tolist(),
             "bins": [round(b, 2) for b in bin_edges.tolist()]
         },
+        "dp_results_sample": [round(r, 4) for r in (true_result + noise[:5]).tolist()]
+    }
+
+
+def noise_bin_edges(distribution, queries: int) -> np.ndarray:
+    """
+    Ten equal bins spanning the quantiles where the smallest and largest of
+    `queries` noise samples are expected to fall.
+    """
+    tail = 1 / (queries + 1)
+    low, high = distribution.ppf(tail), distribution.ppf(1 - tail)
+    if high <= low:
+        low, high = -distribution.mean_abs, distribution.mean_abs
+    return np.linspace(low, high, 11)
+
+
+def analytic_noise(true_result: float, mechanism, queries: int, seed: Optional[int] = None, key: tuple = ()) -> dict:
+    """
+    Closed-form counterpart of simulate_noise: the expected metrics of `queries`
+    releases, computed from the noise distribution in constant time.
+    """
+    distribution = noise_distribution(mechanism)
+    avg_noise = distribution.mean_abs
+    success_rate = distribution.abs_cdf(avg_noise * 5) * 100 if queries > 0 else 100
+
+    # Expected histogram of `queries` samples.
+    if queries > 0:
+        bin_edges = noise_bin_edges(distribution, queries)
+        cdf = distribution.cdf(bin_edges)
+        cdf[0], cdf[-1] = 0.0, 1.0  # the tails fall into the outer bins
+        # Round the expected counts so they still add up to `queries` (largest remainder first).
+        expected = np.diff(cdf) * queries
+        hist = np.floor(expected).astype(np.int64)
+        hist[np.argsort(hist - expected)[:queries - int(hist.sum())]] += 1
+    else:
+        hist, bin_edges = np.histogram([], bins=10)
+
+    return {
+        "successRate": round(success_rate, 2),
+        "avgNoise": round(avg_noise, 4),
+        "utilityScore": round(max(0, 100 - (avg_noise / (true_result if true_result != 0 else 1)) * 100), 2),
+        "noiseDistribution": {
+            "values": hist.tolist(),
+            "bins": [round(b, 2) + 0.0 for b in bin_edges.tolist()]  # + 0.0 turns -0.0 into 0.0
+        },
+        "dp_results_sample": [],
+        "errorQuantiles": {f"p{int(p * 100)}": round(distribution.abs_ppf(p), 4) for p in (0.5, 0.9, 0.95, 0.99)}
+    }
+
+
+SIMULATION_MODES = {"sampling": simulate_noise, "analytic": analytic_noise}
+
+
+def noise_metrics(mode: str, true_result: float, mechanism, queries: int, seed: Optional[int] = None,
+                  key: tuple = ()) -> dict:
+    if mode not in SIMULATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Simulation mode '{mode}' not supported.")
+    return SIMULATION_MODES[mode](true_result, mechanism, queries, seed, key)
+
+
+def simulate_from_source(source: dict, sim_params: dict) -> dict:
+    """Executor entry point: loads the simulated column by path and runs the simulation."""
+    start_time = time.time()
+    sim_in = data_schemas.SimulationCreate(**sim_params)
+
+    true_result = compute_true_result(SimpleNamespace(**source), sim_in)
+    mechanism = build_simulation_mechanism(sim_in.mechanism, sim_in.epsilon, sim_in.delta, sim_in.sensitivity)
+    seed = resolve_seed(sim_in.seed)
+    metrics = noise_metrics(sim_in.mode, true_result, mechanism, sim_in.queries, seed)
+    return simulation_response(sim_in, true_result, mechanism, metrics, start_time, seed)
+
+
+def simulation_response(sim_in: data_schemas.SimulationCreate, true_result: float, mechanism, metrics: dict,
+                        start_time: float, seed: int) -> dict:
+    """
+    The response body of a finished simulation, in the shape the frontend expects.
+    `seed` is reported so a run can be replayed.
+    """
+    execution_time = time.time() - start_time
+
+    # Return the exact, non-fake data structure the frontend UI expects
+    response = {
+        "totalQueries": sim_in.queries,
+        "successRate": metrics["successRate"],
+        "avgNoise": metrics["avgNoise"],
+        "utilityScore": metrics["utilityScore"],
+        "privacyLoss": round(sim_in.epsilon * sim_in.queries, 2),
+        "executionTime": round(execution_time, 4),
+        "noiseDistribution": metrics["noiseDistribution"],
+        "trueResult": round(true_result, 4),
+        "dp_results_sample": metrics["dp_results_sample"],
+        "seed": seed
+    }
+    if sim_in.mode == "analytic":
+        response["errorQuantiles"] = metrics["errorQuantiles"]
+        if sim_in.validation_samples:
+            sampled = simulate_noise(true_result, mechanism, sim_in.validation_samples, seed)
+            response["validation"] = {
+                "samples": sim_in.validation_samples,
+                "avgNoise": sampled["avgNoise"],
+                "successRate": sampled["successRate"],
+                "utilityScore": sampled["utilityScore"]
+            }
+    return response
+
+
+# --- STREAMED SIMULATIONS ---
+
+# Queries sampled between two progress events of a streamed simulation, rounded
+# to whole RNG shards so a seeded stream draws the same noise as POST /.
+SIMULATION_STREAM_BATCH = max(1, int(os.getenv("SIMULATION_STREAM_BATCH", "1000000")) // RNG_SHARD_SIZE) * RNG_SHARD_SIZE
+
+
+class NoiseAccumulator:
+    """
+    Running noise statistics of a simulation sampled in batches. The histogram
+    uses fixed bins (see noise_bin_edges) so batches can be added up; outliers
+    count towards the outer bins. A batch's successes are judged against the
+    running average noise, so the success rate is an estimate that settles as
+    sampling proceeds.
+    """
+
+    def __init__(self, mechanism, queries: int, seed: int):
+        self.mechanism = mechanism
+        self.seed = seed
+        self.bin_edges = noise_bin_edges(noise_distribution(mechanism), queries)
+        self.histogram = np.zeros(10, dtype=np.int64)
+        self.count = 0
+        self.abs_total = 0.0
+        self.successes = 0
+        self.sample = []
+
+    def add_batch(self, size: int):
+        # Batches start on a shard boundary, so they continue the run's shard sequence.
+        noise = simulated_noise(self.mechanism, size, self.seed, first_shard=self.count // RNG_SHARD_SIZE)
+        abs_noise = np.abs(noise)
+        self.count += size
+        self.abs_total += float(abs_noise.sum())
+        self.successes += int(np.count_nonzero(abs_noise < self.avg_noise * 5))
+        bins = np.clip(np.searchsorted(self.bin_edges, noise, side="right") - 1, 0, 9)
+        self.histogram += np.bincount(bins, minlength=10)
+        if len(self.sample) < 5:
+            self.sample.extend(noise[:5 - len(self.sample)].tolist())
+
+    @property
+    def avg_noise(self) -> float:
+        return self.abs_total / self.count if self.count else 0.0
+
+    def metrics(self, true_result: float) -> dict:
+        """Current statistics, in the layout of simulate_noise."""
+        avg_noise = self.avg_noise
+        return {
+            "successRate": round(self.successes / self.count * 100, 2) if self.count else 100,
+            "avgNoise": round(avg_noise, 4),
+            "utilityScore": round(max(0, 100 - (avg_noise / (true_result if true_result != 0 else 1)) * 100), 2),
+            "noiseDistribution": {
+                "values": self.histogram.tolist(),
+                "bins": [round(b, 2) + 0.0 for b in self.bin_edges.tolist()]
+            },
+            "dp_results_sample": [round(true_result + n, 4) for n in self.sample]
+        }
+
+
+def ndjson_event(event: str, payload: dict) -> str:
+    return json.dumps({"event": event, **payload}) + "\n"
+
+
+async def stream_simulation(request: Request, sim_in: data_schemas.SimulationCreate, true_result: float,
+                            mechanism, cache_key, start_time: float):
+    """
+    Yields NDJSON events for a simulation: "start", then one "progress" event per
+    sampled batch with the running metrics, then "result" in the layout of POST /.
+    A seeded run draws the same noise as POST /, but its histogram bins and
+    success rate come from the running totals, so only the analytic mode returns
+    the same body. Sampling stops as soon as the client disconnects.
+    """
+    seed = resolve_seed(sim_in.seed)
+    yield ndjson_event("start", {"totalQueries": sim_in.queries, "trueResult": round(true_result, 4), "seed": seed})
+
+    if sim_in.mode == "analytic":
+        metrics = await run_in_threadpool(noise_metrics, sim_in.mode, true_result, mechanism, sim_in.queries, seed)
+    else:
+        accumulator = NoiseAccumulator(mechanism, sim_in.queries, seed)
+        while accumulator.count < sim_in.queries:
+            if await request.is_disconnected():
+                return
+            batch = min(SIMULATION_STREAM_BATCH, sim_in.queries - accumulator.count)
+            # Sampling runs in a worker thread so other requests keep being served meanwhile.
+            await run_in_threadpool(accumulator.add_batch, batch)
+            metrics = accumulator.metrics(true_result)
+            yield ndjson_event("progress", {
+                "completedQueries": accumulator.count,
+                "totalQueries": sim_in.queries,
+                "progress": round(accumulator.count / sim_in.queries * 100, 2),
+                "successRate": metrics["successRate"],
+                "avgNoise": metrics["avgNoise"],
+                "noiseDistribution": metrics["noiseDistribution"]
+            })
+        metrics = accumulator.metrics(true_result)
+
+    result = await run_in_threadpool(simulation_response, sim_in, true_result, mechanism, metrics, start_time, seed)
+    if cache_key:
+        simulation_cache.put(cache_key, result)
+    yield ndjson_event("result", result)
+
+
+@router.post("/stream")
+def run_streamed_simulation(sim_in: data_schemas.SimulationCreate, request: Request, db: Session = Depends(get_db)):
+    """
+    Streaming variant of POST / for long simulations: returns chunked NDJSON
+    (see stream_simulation) instead of one blocking response. Invalid requests
+    still fail with a plain HTTP error before the stream starts.
+    """
+    start_time = time.time()
+    dataset = db.query(data_models.Dataset).filter(data_models.Dataset.id == sim_in.dataset_id).first()
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if sim_in.mode not in SIMULATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Simulation mode '{sim_in.mode}' not supported.")
+    mechanism = build_simulation_mechanism(sim_in.mechanism, sim_in.epsilon, sim_in.delta, sim_in.sensitivity)
+
+    headers = {"X-Cache": "MISS"}
+    cache_key = simulation_cache_key(dataset, sim_in, streamed=True)
+    cached = simulation_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        result, age = cached
+        events = iter([ndjson_event("result", result)])
+        headers = {"X-Cache": "HIT", "Age": str(int(age))}
+    else:
+        refresh_stats(db, dataset)
+        true_result = run_compute(true_result_from_source, dataset_source(dataset, [sim_in.column_name]),
+                                  sim_in.column_name, sim_in.query_type)
+        events = stream_simulation(request, sim_in, true_result, mechanism, cache_key, start_time)
+    return StreamingResponse(events, media_type="application/x-ndjson", headers=headers)
+
+
+# --- PARAMETER SWEEPS ---
+
+MAX_SWEEP_POINTS = 1000
+
+
+def true_result_from_source(source: dict, column_name: str, query_type: str) -> float:
+    """Executor entry point: the exact answer to a simulated query."""
+    query = SimpleNamespace(column_name=column_name, query_type=query_type)
+    return float(compute_true_result(SimpleNamespace(**source), query))
+
+
+def simulate_sweep_point(true_result: float, mechanism: str, epsilon: float, delta: float,
+                         sensitivity: float, queries: int, mode: str = "sampling", seed: Optional[int] = None,
+                         index: int = 0) -> dict:
+    """
+    One grid point of a sweep; invalid parameter combinations report an error
+    instead of failing the sweep. Point `index` samples its own stream of `seed`,
+    so points are independent and reproducible wherever they run.
+    """
+    point = {"mechanism": mechanism, "epsilon": epsilon, "delta": delta, "sensitivity": sensitivity,
+             "privacyLoss": round(epsilon * queries, 2)}
+    try:
+        metrics = noise_metrics(mode, true_result, build_simulation_mechanism(mechanism, epsilon, delta, sensitivity),
+                                queries, seed, (index,))
+    except Exception as e:
+        point["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+        return point
+    point.update(avgNoise=metrics["avgNoise"], successRate=metrics["successRate"], utilityScore=metrics["utilityScore"])
+    return point
+
+
+@router.post("/sweep")
+def run_simulation_sweep(sweep_in: data_schemas.SimulationSweepCreate, db: Session = Depends(get_db)):
+    """
+    Simulates every combination of the given mechanisms, epsilons, deltas and
+    sensitivities. The dataset is read and the true result computed once; the
+    grid points run in parallel (or in closed form with mode "analytic"). Points
+    are ordered by mechanism, delta, sensitivity and then epsilon, one chart
+    series per leading combination.
+    """
+    start_time = time.time()
+    dataset = db.query(data_models.Dataset).filter(data_models.Dataset.id == sweep_in.dataset_id).first()
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    grid = [
+        (mechanism, epsilon, delta, sensitivity)
+        for mechanism in sweep_in.mechanisms
+        for delta in sorted(set(sweep_in.deltas))
+        for sensitivity in sorted(set(sweep_in.sensitivities))
+        for epsilon in sorted(set(sweep_in.epsilons))
+    ]
+    if not grid:
+        raise HTTPException(status_code=400, detail="The sweep needs at least one epsilon, delta, mechanism and sensitivity.")
+    if sweep_in.mode not in SIMULATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Simulation mode '{sweep_in.mode}' not supported.")
+    if len(grid) > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=400, detail=f"The sweep has {len(grid)} points; the limit is {MAX_SWEEP_POINTS}.")
+
+    refresh_stats(db, dataset)
+
+    true_result = run_compute(true_result_from_source, dataset_source(dataset, [sweep_in.column_name]),
+                              sweep_in.column_name, sweep_in.query_type)
+    seed = resolve_seed(sweep_in.seed)
+    points = map_compute(
+        simulate_sweep_point,
+        [(true_result, mechanism, epsilon, delta, sensitivity, sweep_in.queries, sweep_in.mode, seed, index)
+         for index, (mechanism, epsilon, delta, sensitivity) in enumerate(grid)]
+    )
+
+    return {
         "trueResult": round(true_result, 4),
-        "dp_results_sample": [round(r, 4) for r in dp_results[:5]]
-    }
\ No newline at end of file
+        "seed": seed,
+        "totalQueries": sweep_in.queries,
+        "executionTime": round(time.time() - start_time, 4),
+        "points": points
+    }
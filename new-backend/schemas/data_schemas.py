@@ -21,11 +21,40 @@ class Budget(BaseModel):
     dataset_id: int
     total_epsilon: float
     total_delta: float
+    accountant: str = "basic"
     consumed_epsilon: float
     consumed_delta: float
+    reserved_epsilon: float = 0.0
+    reserved_delta: float = 0.0
+    lifetime_epsilon: float = 0.0
+    lifetime_delta: float = 0.0
 
     class Config:
         from_attributes = True
+
+
+class PrivacyLedgerEntry(BaseModel):
+    id: int
+    dataset_id: int
+    budget_id: Optional[int] = None
+    job_id: Optional[int] = None
+    entry_type: str
+    epsilon: float
+    delta: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BudgetWindow(BaseModel):
+    budget_id: int
+    dataset_id: int
+    days: float
+    since: datetime
+    epsilon_spent: float
+    delta_spent: float
+    spends: int
         
 
 # Corrected to exactly match the fields in models.data_models.Dataset
@@ -62,7 +91,10 @@ class Job(BaseModel):
 
 # This schema is now correctly aligned with the Job schema
 class JobDetail(Job):
-    pass
+    # Queue metrics, filled in while the job waits for a worker
+    queue_position: Optional[int] = None
+    queue_depth: Optional[int] = None
+    wait_seconds: Optional[float] = None
 
 
 
@@ -81,6 +113,7 @@ class DatasetBudget(BaseModel):
     delta_used: float = 0.0
     total_epsilon: float 
     total_delta: float   
+    accountant: str = "basic"
 
 
 class PrivacyBudget(BaseModel):
@@ -110,11 +143,37 @@ class JobCreate(BaseModel):
     delta: Optional[float] = None
     mechanism: str
     column_name: str
+    # Histogram options
+    bins: int = 10
+    threshold: Optional[float] = None # Drop bins (or groups) whose noisy count is below this value
+    top_k: Optional[int] = None # Release only the k largest noisy bins (or groups)
+    # GROUP BY options (query_type "group_by")
+    group_by_column: Optional[str] = None
+    group_aggregate: str = "count" # count, sum or mean of column_name per group
+    # Reproducible noise for testing; only accepted with ALLOW_SEEDED_RELEASES
+    seed: Optional[int] = None
+
+
+class JobBatchCreate(BaseModel):
+    jobs: List[JobCreate]
+
+
+class JobBatchItemResult(BaseModel):
+    index: int # Position of the job in the submitted batch
+    job: Optional[Job] = None
+    error: Optional[str] = None
+
+
+class JobBatchResult(BaseModel):
+    results: List[JobBatchItemResult]
+    completed: int
+    failed: int
 
 
 class BudgetCreate(BaseModel):
     dataset_id: int
     total_epsilon: float
+    accountant: str = "basic" # basic, advanced or rdp composition
 
 
 class PolicyUpdate(BaseModel):
@@ -124,6 +183,9 @@ class BudgetUpdate(BaseModel):
     epsilon_to_add: float
     delta_to_add: float
 
+class BudgetAccountantUpdate(BaseModel):
+    accountant: str # basic, advanced or rdp composition
+
 
 class AlertBase(BaseModel):
     dataset_id: int  # Frontend will send the dataset_id
@@ -156,6 +218,9 @@ class AuditLog(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditLogSearchResult(AuditLog):
+    score: float = 0.0  # relevance to the search; higher is better
+
 class Report(BaseModel):
     id: int
     name: str
@@ -182,6 +247,22 @@ class SimulationCreate(BaseModel):
     queries: int
     sensitivity: float
     delta: Optional[float] = 0.0
+    mode: str = "sampling" # "sampling" draws every query's noise, "analytic" uses closed forms
+    validation_samples: Optional[int] = None # analytic mode: also sample this many queries to cross-check
+    seed: Optional[int] = None # makes the sampled noise reproducible
+
+class SimulationSweepCreate(BaseModel):
+    dataset_id: int
+    column_name: str
+    query_type: str
+    queries: int
+    # Every combination of the values below is simulated
+    epsilons: List[float]
+    deltas: List[float] = [0.0]
+    mechanisms: List[str] = ["laplace"]
+    sensitivities: List[float] = [1.0]
+    mode: str = "sampling"
+    seed: Optional[int] = None
 
 class SimulationResult(BaseModel):
     true_result: float
@@ -10,6 +10,11 @@ const AuditContent = () => {
     const [error, setError] = useState(null);
     const [isModalOpen, setIsModalOpen] = useState(false);
     const [selectedLog, setSelectedLog] = useState(null);
+    // Keyset paging: cursor of the next page (null on the last one) and the filters it belongs to
+    const [nextCursor, setNextCursor] = useState(null);
+    const [pageFilters, setPageFilters] = useState({});
+    const [estimates, setEstimates] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     // --- STATE FOR FILTERS AND VISIBILITY ---
     const [showFilters, setShowFilters] = useState(false); // New state to toggle filter visibility
@@ -29,8 +34,11 @@ const AuditContent = () => {
             const activeFilters = Object.fromEntries(
                 Object.entries(currentFilters || filters).filter(([_, v]) => v)
             );
-            const data = await dpApiService.getAuditLogs(activeFilters);
-            setAuditLogs(data);
+            const page = await dpApiService.getAuditLogs(activeFilters);
+            setAuditLogs(page.logs);
+            setNextCursor(page.nextCursor);
+            setEstimates(page.estimates);
+            setPageFilters(activeFilters);
         } catch (err) {
             setError(err.message);
         } finally {
@@ -38,6 +46,19 @@ const AuditContent = () => {
         }
     };
 
+    const handleLoadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const page = await dpApiService.getAuditLogs(pageFilters, nextCursor);
+            setAuditLogs(prev => [...prev, ...page.logs]);
+            setNextCursor(page.nextCursor);
+        } catch (err) {
+            setError(err.message);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         fetchAuditLogs();
     }, []); // Initial fetch
@@ -104,9 +125,14 @@ const AuditContent = () => {
         }
     };
 
-    const totalEvents = auditLogs.length;
-    const successfulEvents = auditLogs.filter(log => log.status === 'SUCCESS').length;
-    const failedEvents = totalEvents - successfulEvents;
+    // The total and the status counts come from the same source: the server's estimates
+    // over every matching event, or the loaded pages when it sent none
+    const loadedSuccessful = auditLogs.filter(log => log.status === 'SUCCESS').length;
+    const { total: totalEvents, successful: successfulEvents, failed: failedEvents } = estimates ?? {
+        total: auditLogs.length,
+        successful: loadedSuccessful,
+        failed: auditLogs.length - loadedSuccessful,
+    };
     const uniqueUsers = new Set(auditLogs.map(log => log.user)).size;
 
     return (
@@ -243,6 +269,14 @@ const AuditContent = () => {
                                 </table>
                             </div>
                         </div>
+                        {nextCursor && (
+                            <div className="card-footer bg-white text-center">
+                                <button className="btn btn-outline-secondary btn-sm" onClick={handleLoadMore} disabled={loadingMore}>
+                                    {loadingMore ? <span className="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span> : <i className="bi bi-chevron-down me-1"></i>}
+                                    Load more ({auditLogs.length} shown)
+                                </button>
+                            </div>
+                        )}
                     </div>
 
                     {/* --- Information Box --- */}
@@ -180,6 +180,7 @@ const SimulationContent = () => {
                                         <select className="form-select" value={simulationConfig.mechanism} onChange={(e) => handleConfigChange('mechanism', e.target.value)}>
                                             <option value="laplace">Laplace</option>
                                             <option value="gaussian">Gaussian</option>
+                                            <option value="gaussian_analytic">Analytic Gaussian</option>
                                             <option value="exponential" disabled>Exponential (coming soon)</option>
                                         </select>
                                     </div>
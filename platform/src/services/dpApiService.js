@@ -139,7 +139,8 @@ const realApiService = {
     if (!response.ok) throw new Error('Failed to delete alert');
   },
 
-  async getAuditLogs(filters = {}) {
+  // Returns one page of logs, newest first; pass nextCursor back to get the following page
+  async getAuditLogs(filters = {}, cursor = null) {
     const params = new URLSearchParams();
     // Only add params if they have a value
     Object.entries(filters).forEach(([key, value]) => {
@@ -151,9 +152,21 @@ const realApiService = {
             else params.append(key, value);
         }
     });
+    if (cursor) params.append('cursor', cursor);
+    else params.append('include_total', 'true');
     const response = await fetch(`${API_BASE_URL}/api/audit-logs?${params.toString()}`);
     if (!response.ok) throw new Error('Network response was not ok');
-    return response.json();
+    const total = response.headers.get('X-Total-Count-Estimate');
+    return {
+      logs: await response.json(),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+      // Matching events in all and by status, or null when not asked for (later pages)
+      estimates: total !== null ? {
+        total: Number(total),
+        successful: Number(response.headers.get('X-Success-Count-Estimate')),
+        failed: Number(response.headers.get('X-Failed-Count-Estimate')),
+      } : null,
+    };
   },
   // this for audit log download PDF
   async getReport(reportName, filters = {}) {  